@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark compressed body storage.
+
+Builds the same synthetic book corpus (documents plus overlapping chunk spans)
+once per codec and reports file size, per-table page footprint and
+snippet-search latency.
+
+Usage:
+    python benchmarks/bench_compression.py --size-mb 1024
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from proof_of_self.core.chunker import DocumentChunker
+from proof_of_self.core.compression import DEFAULT_COMPRESS_THRESHOLD
+from proof_of_self.core.database import Database
+
+WORDS = (
+    "bitcoin node block chain proof work hash miner fee mempool script "
+    "signature wallet key privacy sovereign money time energy network peer "
+    "consensus soft fork upgrade halving supply scarcity market price value"
+).split()
+
+
+def make_book(rng: random.Random, size_bytes: int) -> str:
+    """Generate a book of roughly `size_bytes` made of paragraphs."""
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(3, 8))
+        ]
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def load_corpus(db: Database, size_mb: int, book_kb: int, seed: int) -> None:
+    """Insert books and their chunks until the source text reaches size_mb."""
+    rng = random.Random(seed)
+    chunker = DocumentChunker()
+    books = max(1, size_mb * 1024 // book_kb)
+
+    with db.bulk_load():
+        for i in range(books):
+            book = make_book(rng, book_kb * 1024)
+            doc_id = f"book-{i}"
+            db.insert_documents_many(
+                [{"doc_id": doc_id, "source_type": "file", "content": book, "is_chunked": True}]
+            )
+            db.insert_chunks_many(
+                {
+                    "chunk_id": chunk.chunk_id,
+                    "document_id": chunk.document_id,
+                    "chunk_index": chunk.chunk_index,
+                    "start_offset": chunk.start_offset,
+                    "end_offset": chunk.end_offset,
+                }
+                for chunk in chunker.chunk_document(doc_id, book)
+            )
+
+
+def table_bytes(db: Database) -> dict:
+    """Bytes used per table family (requires the dbstat virtual table)."""
+    try:
+        rows = db.conn.execute("SELECT name, SUM(pgsize) AS bytes FROM dbstat GROUP BY name")
+    except Exception:
+        return {}
+
+    families = {"documents": 0, "chunks": 0, "fts": 0, "other": 0}
+    for row in rows:
+        name = row["name"]
+        if "_fts" in name:
+            families["fts"] += row["bytes"]
+        elif name.startswith(("documents", "bodies")):
+            families["documents"] += row["bytes"]
+        elif name.startswith("chunks"):
+            families["chunks"] += row["bytes"]
+        else:
+            families["other"] += row["bytes"]
+    return families
+
+
+def search_latency(db: Database, queries: int = 200) -> float:
+    """Average milliseconds for a chunk snippet search."""
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(queries):
+        db.conn.execute(
+            """
+            SELECT snippet(chunks_fts, 1, '[', ']', '...', 20)
+            FROM chunks_fts WHERE chunks_fts MATCH ? LIMIT 10
+            """,
+            (f"{rng.choice(WORDS)} {rng.choice(WORDS)}",),
+        ).fetchall()
+    return (time.perf_counter() - start) * 1000 / queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=64, help="Source text size")
+    parser.add_argument("--book-kb", type=int, default=512, help="Size of each book")
+    parser.add_argument("--codecs", default="none,zlib,lzma")
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=DEFAULT_COMPRESS_THRESHOLD,
+        help="Compress bodies at least this many bytes (chunks are ~1 KB)",
+    )
+    parser.add_argument("--seed", type=int, default=21)
+    args = parser.parse_args()
+
+    print(f"Corpus: {args.size_mb} MB of source text in {args.book_kb} KB books\n")
+    print(f"{'codec':<6} {'file MB':>9} {'docs MB':>9} {'chunks MB':>10} {'fts MB':>8} "
+          f"{'load s':>7} {'snippet ms':>11}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec in args.codecs.split(","):
+            path = Path(tmp) / f"{codec}.db"
+            db = Database(
+                str(path),
+                compression=None if codec == "none" else codec,
+                compress_threshold=args.threshold,
+            )
+
+            start = time.perf_counter()
+            load_corpus(db, args.size_mb, args.book_kb, args.seed)
+            load_seconds = time.perf_counter() - start
+
+            sizes = table_bytes(db)
+            latency = search_latency(db)
+            db.close()
+
+            mb = 1024 * 1024
+            print(
+                f"{codec:<6} {path.stat().st_size / mb:>9.1f} "
+                f"{sizes.get('documents', 0) / mb:>9.1f} {sizes.get('chunks', 0) / mb:>10.1f} "
+                f"{sizes.get('fts', 0) / mb:>8.1f} {load_seconds:>7.1f} {latency:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
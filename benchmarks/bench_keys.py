@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Benchmark text versus integer document keys.
+
+Builds the key-bearing tables (documents, chunks, document_tags) twice: keyed
+by the 64-character id text as in schema version 4, and by integer rowid
+with a 16-byte external id as now. Reports file and index size, insert rate
+and the latency of the chunk and tag joins.
+
+Usage:
+    python benchmarks/bench_keys.py --documents 200000
+"""
+
+import argparse
+import hashlib
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+# Both layouts carry the same small payload so the keys dominate the difference
+LAYOUTS = {
+    "text": """
+        CREATE TABLE documents (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            created_at TEXT
+        );
+        CREATE TABLE chunks (
+            id TEXT PRIMARY KEY,
+            document_id TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+            chunk_index INTEGER NOT NULL,
+            start_offset INTEGER,
+            end_offset INTEGER,
+            UNIQUE(document_id, chunk_index)
+        );
+        CREATE INDEX idx_chunks_document_id ON chunks(document_id);
+        CREATE TABLE document_tags (
+            document_id TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (document_id, tag)
+        ) WITHOUT ROWID;
+        CREATE INDEX idx_document_tags_tag ON document_tags(tag, document_id);
+    """,
+    "integer": """
+        CREATE TABLE documents (
+            doc_rowid INTEGER PRIMARY KEY,
+            id BLOB NOT NULL UNIQUE,
+            title TEXT,
+            created_at TEXT
+        );
+        CREATE TABLE chunks (
+            chunk_rowid INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            document_id INTEGER NOT NULL REFERENCES documents(doc_rowid) ON DELETE CASCADE,
+            chunk_index INTEGER NOT NULL,
+            start_offset INTEGER,
+            end_offset INTEGER,
+            UNIQUE(document_id, chunk_index)
+        );
+        CREATE INDEX idx_chunks_document_id ON chunks(document_id);
+        CREATE TABLE document_tags (
+            document_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (document_id, tag)
+        ) WITHOUT ROWID;
+        CREATE INDEX idx_document_tags_tag ON document_tags(tag, document_id);
+    """,
+}
+
+INSERTS = {
+    "text": (
+        "INSERT INTO documents (id, title, created_at) VALUES (?, ?, ?)",
+        "INSERT INTO chunks (id, document_id, chunk_index, start_offset, end_offset) "
+        "VALUES (?, ?, ?, ?, ?)",
+        "INSERT INTO document_tags (document_id, tag) VALUES (?, ?)",
+    ),
+    "integer": (
+        "INSERT INTO documents (id, title, created_at) VALUES (?, ?, ?)",
+        "INSERT INTO chunks (id, document_id, chunk_index, start_offset, end_offset) "
+        "VALUES (?, (SELECT rowid FROM documents WHERE id = ?), ?, ?, ?)",
+        "INSERT INTO document_tags (document_id, tag) "
+        "VALUES ((SELECT rowid FROM documents WHERE id = ?), ?)",
+    ),
+}
+
+# Chunks of a set of documents, and documents carrying a tag
+JOINS = {
+    "chunks": """
+        SELECT d.title, c.chunk_index, c.start_offset
+        FROM documents d JOIN chunks c ON c.document_id = {key}
+        WHERE d.id IN ({placeholders})
+    """,
+    "tags": """
+        SELECT d.id, d.title FROM document_tags t
+        JOIN documents d ON {key} = t.document_id
+        WHERE t.tag = ?
+    """,
+}
+
+TAGS = ["bitcoin", "energy", "privacy", "money", "time", "books", "notes", "drafts"]
+
+
+def document_ids(count: int) -> list:
+    """Deterministic 64-character ids, as generate_document_id used to return."""
+    return [hashlib.sha256(f"document-{i}".encode()).hexdigest() for i in range(count)]
+
+
+def load(conn: sqlite3.Connection, layout: str, ids: list, chunks_per_doc: int) -> float:
+    """Insert every document with its chunks and tags; returns seconds."""
+    document_sql, chunk_sql, tag_sql = INSERTS[layout]
+    rng = random.Random(7)
+    start = time.perf_counter()
+    with conn:
+        for doc_id in ids:
+            key = doc_id if layout == "text" else bytes.fromhex(doc_id[:32])
+            conn.execute(document_sql, (key, f"Title {doc_id[:8]}", "2024-01-01"))
+            conn.executemany(
+                chunk_sql,
+                [
+                    (f"{doc_id}_chunk_{i}", key, i, i * 1000, (i + 1) * 1000)
+                    for i in range(chunks_per_doc)
+                ],
+            )
+            conn.executemany(tag_sql, [(key, tag) for tag in rng.sample(TAGS, 3)])
+    return time.perf_counter() - start
+
+
+def table_bytes(conn: sqlite3.Connection) -> dict:
+    """Bytes per table and index (requires the dbstat virtual table)."""
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return dict(rows)
+
+
+def join_latency(conn: sqlite3.Connection, layout: str, ids: list, queries: int) -> dict:
+    """Average milliseconds per query for each join in JOINS."""
+    key = "d.id" if layout == "text" else "d.rowid"
+    rng = random.Random(1)
+    latency = {}
+
+    batch = 20
+    sql = JOINS["chunks"].format(key=key, placeholders=", ".join("?" * batch))
+    start = time.perf_counter()
+    for _ in range(queries):
+        sample = rng.sample(ids, batch)
+        if layout == "integer":
+            sample = [bytes.fromhex(doc_id[:32]) for doc_id in sample]
+        conn.execute(sql, sample).fetchall()
+    latency["chunks"] = (time.perf_counter() - start) * 1000 / queries
+
+    sql = JOINS["tags"].format(key=key)
+    start = time.perf_counter()
+    for i in range(queries // 10 or 1):
+        conn.execute(sql, (TAGS[i % len(TAGS)],)).fetchall()
+    latency["tags"] = (time.perf_counter() - start) * 1000 / (queries // 10 or 1)
+    return latency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=50000)
+    parser.add_argument("--chunks-per-doc", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--cache-kb", type=int, default=8192, help="Page cache per connection")
+    args = parser.parse_args()
+
+    ids = document_ids(args.documents)
+    print(
+        f"{args.documents} documents, {args.chunks_per_doc} chunks and 3 tags each, "
+        f"{args.cache_kb} KB page cache\n"
+    )
+    print(f"{'layout':<8} {'file MB':>8} {'key idx MB':>11} {'chunks MB':>10} "
+          f"{'tags MB':>8} {'rows/s':>9} {'chunk join ms':>14} {'tag join ms':>12}")
+
+    mb = 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout, schema in LAYOUTS.items():
+            path = Path(tmp) / f"{layout}.db"
+            conn = sqlite3.connect(str(path))
+            conn.execute(f"PRAGMA cache_size = -{args.cache_kb}")
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.executescript(schema)
+
+            seconds = load(conn, layout, ids, args.chunks_per_doc)
+            rows = args.documents * (1 + args.chunks_per_doc + 3)
+            sizes = table_bytes(conn)
+            latency = join_latency(conn, layout, ids, args.queries)
+            conn.close()
+
+            key_index = sizes.get("sqlite_autoindex_documents_1", 0)
+            chunk_bytes = sum(v for k, v in sizes.items() if "chunks" in k)
+            tag_bytes = sum(v for k, v in sizes.items() if "tags" in k)
+            print(
+                f"{layout:<8} {path.stat().st_size / mb:>8.1f} {key_index / mb:>11.1f} "
+                f"{chunk_bytes / mb:>10.1f} {tag_bytes / mb:>8.1f} {rows / seconds:>9.0f} "
+                f"{latency['chunks']:>14.3f} {latency['tags']:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
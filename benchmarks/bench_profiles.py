@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark storage performance profiles.
+
+For each profile, loads the same synthetic tweet-like corpus into a fresh
+database and then runs a mix of search queries, reporting ingest and query
+throughput.
+
+Usage:
+    python benchmarks/bench_profiles.py --documents 200000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from proof_of_self.core.database import Database
+from proof_of_self.core.profiles import PROFILES
+from proof_of_self.core.search import Search
+
+WORDS = (
+    "bitcoin node block chain proof work hash miner fee mempool script "
+    "signature wallet key privacy sovereign money time energy network peer "
+    "consensus soft fork upgrade halving supply scarcity market price value"
+).split()
+
+
+def make_documents(count: int, seed: int):
+    """Yield tweet-like document records."""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "doc_id": f"doc-{i}",
+            "source_type": "twitter",
+            "content_type": "tweet",
+            "content": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))),
+            "metadata": {
+                "tweet_id": str(i),
+                "favorite_count": rng.randint(0, 500),
+                "retweet_count": rng.randint(0, 50),
+                "is_reply": False,
+                "is_retweet": False,
+            },
+            "tags": [rng.choice(WORDS)],
+            "created_at": f"20{10 + i % 14:02d}-{1 + i % 12:02d}-{1 + i % 28:02d} 12:00:00",
+        }
+
+
+def run_queries(search: Search, queries: int) -> float:
+    """Run a fixed query mix and return queries per second."""
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for i in range(queries):
+        query = f"{rng.choice(WORDS)} {rng.choice(WORDS)}"
+        if i % 3 == 0:
+            search.search_tweets(query, limit=20, sort_by="engagement")
+        elif i % 3 == 1:
+            search.search_documents(query, limit=10)
+        else:
+            search.get_recent_tweets(limit=20)
+    return queries / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--profiles", default=",".join(["default", *PROFILES]))
+    parser.add_argument("--seed", type=int, default=21)
+    args = parser.parse_args()
+
+    print(f"{args.documents} documents, {args.queries} queries per profile\n")
+    print(f"{'profile':<12} {'ingest docs/s':>14} {'queries/s':>10} {'file MB':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles.split(","):
+            path = Path(tmp) / f"{profile}.db"
+            db = Database(str(path), profile=None if profile == "default" else profile)
+
+            start = time.perf_counter()
+            db.insert_documents_many(make_documents(args.documents, args.seed))
+            ingest_rate = args.documents / (time.perf_counter() - start)
+
+            query_rate = run_queries(Search(db), args.queries)
+            db.close()
+
+            size_mb = sum(f.stat().st_size for f in Path(tmp).glob(f"{profile}.db*")) / 2**20
+            print(f"{profile:<12} {ingest_rate:>14,.0f} {query_rate:>10,.0f} {size_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
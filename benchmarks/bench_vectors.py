@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark approximate nearest-neighbour search in the vector index.
+
+For each corpus size, writes synthetic topic-clustered unit vectors (like
+embeddings of many short texts on related subjects) into a fresh index,
+IVF-partitioned at these sizes, then reports recall@10 against exact
+search and single-query p50/p99 latency per nprobe setting.
+
+Usage:
+    python benchmarks/bench_vectors.py --vectors 100000,1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from proof_of_self.core.embeddings import HashingEmbedder, normalize_rows
+from proof_of_self.core.vector_index import VectorIndex
+
+BLOCK = 65536
+
+# Length of the random offset from a vector's topic center (centers have length 1)
+DEFAULT_NOISE = 0.8
+
+
+def make_vectors(
+    centers: np.ndarray, count: int, seed: int, out: np.ndarray, noise_scale: float
+) -> None:
+    """Fill `out` with unit vectors scattered around random topic centers."""
+    rng = np.random.default_rng(seed)
+    topics, dim = centers.shape
+    for start in range(0, count, BLOCK):
+        size = min(BLOCK, count - start)
+        noise = rng.standard_normal((size, dim)).astype(np.float32) * (noise_scale / np.sqrt(dim))
+        out[start:start + size] = normalize_rows(centers[rng.integers(topics, size=size)] + noise)
+
+
+def percentile_ms(samples: list, pct: float) -> float:
+    return float(np.percentile(samples, pct)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vectors", default="100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--per-topic", type=int, default=20, help="vectors per topic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", default="1,4,8,16,32,64")
+    parser.add_argument("--noise", type=float, default=DEFAULT_NOISE)
+    parser.add_argument("--seed", type=int, default=21)
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder(dim=args.dim)  # Only names the index; vectors are synthetic
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in [int(n) for n in args.vectors.split(",")]:
+            staged = np.lib.format.open_memmap(
+                Path(tmp) / "staged.npy", mode="w+", dtype=np.float32, shape=(count, args.dim)
+            )
+            rng = np.random.default_rng(args.seed)
+            topics = max(1, count // args.per_topic)
+            centers = rng.standard_normal((topics, args.dim)).astype(np.float32)
+            centers = normalize_rows(centers)
+            make_vectors(centers, count, args.seed, staged, args.noise)
+            queries = np.empty((args.queries, args.dim), dtype=np.float32)
+            make_vectors(centers, args.queries, args.seed + 1, queries, args.noise)
+
+            path = Path(tmp) / f"vectors-{count}"
+            start = time.perf_counter()
+            report = VectorIndex(path, embedder).insert(
+                [(i.to_bytes(16, "big"), -1) for i in range(count)], staged
+            )
+            build = time.perf_counter() - start
+            del staged
+
+            start = time.perf_counter()
+            index = VectorIndex(path, embedder)
+            len(index)
+            load = time.perf_counter() - start
+
+            print(
+                f"\n{count:,} vectors x {args.dim}: {report['nlist']} lists, "
+                f"built in {build:.1f}s, loaded in {load * 1000:.0f} ms"
+            )
+            print(f"{'nprobe':>8} {'recall@10':>10} {'p50 ms':>8} {'p99 ms':>8}")
+
+            settings = [("exact", None)] + [(n, int(n)) for n in args.nprobe.split(",")]
+            truth = None
+            for label, nprobe in settings:
+                latencies, found = [], []
+                for query in queries:
+                    start = time.perf_counter()
+                    hits = index.search(query, 10, nprobe=nprobe, exact=nprobe is None)[0]
+                    latencies.append(time.perf_counter() - start)
+                    found.append({hit[0] for hit in hits})
+                truth = truth or found
+                recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+                print(
+                    f"{label:>8} {recall:>10.3f} "
+                    f"{percentile_ms(latencies, 50):>8.2f} {percentile_ms(latencies, 99):>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
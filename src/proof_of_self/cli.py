@@ -3,15 +3,41 @@ Command-line interface for Proof-of-Self
 """
 
 import os
+import shutil
 import sys
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
 
 import click
 from rich.console import Console
 from rich.table import Table
 
-from proof_of_self.core.database import Database
+from proof_of_self.config import (
+    backup_options,
+    database_options,
+    load_config,
+    open_database,
+    open_vector_index,
+    shard_directory,
+    vector_index_options,
+)
+from proof_of_self.core.backup import BackupManager
+from proof_of_self.core.database import DEFAULT_BATCH_SIZE, Database
+from proof_of_self.core.embeddings import load_embedder
 from proof_of_self.core.indexer import Indexer
+from proof_of_self.core.maintenance import (
+    DEFAULT_MERGE_BUDGET,
+    DEFAULT_PAGES_PER_STEP,
+    IndexMaintenance,
+)
+from proof_of_self.core.shards import MANIFEST_NAME, ShardedDatabase
+from proof_of_self.core.vector_index import (
+    DEFAULT_EMBED_BATCH,
+    DEFAULT_VECTOR_DTYPE,
+    VectorIndex,
+    vector_index_path,
+)
 from proof_of_self.adapters.twitter import TwitterAdapter
 from proof_of_self.adapters.file import FileAdapter
 from proof_of_self.core.inbox_scanner import InboxScanner
@@ -72,7 +98,26 @@ def init(db_path: str) -> None:
     is_flag=True,
     help="Exclude replies from indexing",
 )
-def index(twitter_archive: str, db_path: str, exclude_retweets: bool, exclude_replies: bool) -> None:
+@click.option(
+    "--batch-size",
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Documents written per database transaction",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--bulk",
+    is_flag=True,
+    help="Defer search-index updates and rebuild once at the end (faster for large imports)",
+)
+def index(
+    twitter_archive: str,
+    db_path: str,
+    exclude_retweets: bool,
+    exclude_replies: bool,
+    batch_size: int,
+    bulk: bool,
+) -> None:
     """Index your Twitter archive."""
     twitter_path = Path(twitter_archive).expanduser()
     db_path = Path(db_path).expanduser()
@@ -80,7 +125,9 @@ def index(twitter_archive: str, db_path: str, exclude_retweets: bool, exclude_re
     console.print(f"[yellow]Indexing Twitter archive from {twitter_path}...[/yellow]")
 
     # Initialize database
-    db = Database(str(db_path))
+    settings = load_config()
+    db = open_database(settings, db_path, role="ingest", with_read_pool=False)
+    bulk = _check_bulk(db, bulk)
 
     # Create Twitter adapter
     config = {
@@ -93,24 +140,24 @@ def index(twitter_archive: str, db_path: str, exclude_retweets: bool, exclude_re
     adapter = TwitterAdapter(config)
 
     # Index the data
-    indexer = Indexer(db)
+    indexer = Indexer(db, batch_size=batch_size, vectors=_open_vectors(settings, db, bulk))
 
     try:
-        counts = indexer.index_from_adapter(adapter)
+        with db.bulk_load() if bulk else nullcontext() as timings:
+            counts = indexer.index_from_adapter(adapter)
 
         # Display results
         table = Table(title="Indexing Complete")
         table.add_column("Data Type", style="cyan")
         table.add_column("Count", style="green", justify="right")
 
-        table.add_row("Tweets", str(counts["tweets"]))
-        table.add_row("Bookmarks", str(counts["bookmarks"]))
-        table.add_row("Likes", str(counts["likes"]))
+        table.add_row("Documents", str(counts["documents"]))
         if counts["errors"] > 0:
             table.add_row("Errors", str(counts["errors"]), style="red")
 
         console.print(table)
-        console.print(f"\n[green]Successfully indexed to {db_path}[/green]")
+        _print_bulk_timings(timings)
+        console.print(f"\n[green]Successfully indexed to {_location(db)}[/green]")
         console.print("\nYou can now:")
         console.print("  1. Run [cyan]proof-of-self stats[/cyan] to see statistics")
         console.print("  2. Use the MCP server with Claude Code or Claude Desktop")
@@ -146,7 +193,26 @@ def index(twitter_archive: str, db_path: str, exclude_retweets: bool, exclude_re
     is_flag=True,
     help="Keep files in inbox after indexing (don't move to processed)",
 )
-def index_inbox(inbox_path: str, db_path: str, processed_path: str, keep_files: bool) -> None:
+@click.option(
+    "--batch-size",
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Documents written per database transaction",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--bulk",
+    is_flag=True,
+    help="Defer search-index updates and rebuild once at the end (faster for large imports)",
+)
+def index_inbox(
+    inbox_path: str,
+    db_path: str,
+    processed_path: str,
+    keep_files: bool,
+    batch_size: int,
+    bulk: bool,
+) -> None:
     """Index files from the inbox directory."""
     inbox_path = Path(inbox_path).expanduser()
     db_path = Path(db_path).expanduser()
@@ -161,8 +227,10 @@ def index_inbox(inbox_path: str, db_path: str, processed_path: str, keep_files:
     console.print(f"[yellow]Scanning inbox: {inbox_path}...[/yellow]")
 
     # Initialize database
-    db = Database(str(db_path))
-    indexer = Indexer(db)
+    settings = load_config()
+    db = open_database(settings, db_path, role="ingest", with_read_pool=False)
+    bulk = _check_bulk(db, bulk)
+    indexer = Indexer(db, batch_size=batch_size, vectors=_open_vectors(settings, db, bulk))
 
     # Scan inbox
     scanner = InboxScanner(str(inbox_path), str(processed_path))
@@ -183,53 +251,54 @@ def index_inbox(inbox_path: str, db_path: str, processed_path: str, keep_files:
         "errors": 0,
     }
 
-    # Process each file
-    for file_path, file_type in files:
-        console.print(f"[cyan]Processing:[/cyan] {file_path.name} ({file_type})")
-
-        try:
-            if file_type == "twitter_archive":
-                # Twitter archive
-                config = {
-                    "archive_path": str(file_path / "data"),
-                    "exclude_retweets": False,
-                    "index_bookmarks": True,
-                    "index_likes": True,
-                }
-                adapter = TwitterAdapter(config)
-
-            elif file_type in ["markdown", "text", "org"]:
-                # Text-based files
-                config = {
-                    "file_path": str(file_path),
-                    "content_type": file_type,
-                }
-                adapter = FileAdapter(config)
-
-            else:
-                console.print(f"  [yellow]Skipping unsupported file type: {file_type}[/yellow]")
-                continue
-
-            # Index the file
-            counts = indexer.index_from_adapter(adapter)
-
-            # Update totals
-            for key in total_counts:
-                if key in counts:
-                    total_counts[key] += counts[key]
-
-            # Show what was indexed
-            indexed_items = [f"{v} {k}" for k, v in counts.items() if k != "errors" and v > 0]
-            if indexed_items:
-                console.print(f"  [green]✓ Indexed: {', '.join(indexed_items)}[/green]")
-
-            # Move to processed unless keep_files is set
-            if not keep_files:
-                scanner.move_to_processed(file_path)
-
-        except Exception as e:
-            console.print(f"  [red]✗ Error: {e}[/red]")
-            total_counts["errors"] += 1
+    # Process each file (with FTS maintenance deferred in bulk mode)
+    with db.bulk_load() if bulk else nullcontext() as timings:
+        for file_path, file_type in files:
+            console.print(f"[cyan]Processing:[/cyan] {file_path.name} ({file_type})")
+
+            try:
+                if file_type == "twitter_archive":
+                    # Twitter archive
+                    config = {
+                        "archive_path": str(file_path / "data"),
+                        "exclude_retweets": False,
+                        "index_bookmarks": True,
+                        "index_likes": True,
+                    }
+                    adapter = TwitterAdapter(config)
+
+                elif file_type in ["markdown", "text", "org"]:
+                    # Text-based files
+                    config = {
+                        "file_path": str(file_path),
+                        "content_type": file_type,
+                    }
+                    adapter = FileAdapter(config)
+
+                else:
+                    console.print(f"  [yellow]Skipping unsupported file type: {file_type}[/yellow]")
+                    continue
+
+                # Index the file
+                counts = indexer.index_from_adapter(adapter)
+
+                # Update totals
+                for key in total_counts:
+                    if key in counts:
+                        total_counts[key] += counts[key]
+
+                # Show what was indexed
+                indexed_items = [f"{v} {k}" for k, v in counts.items() if k != "errors" and v > 0]
+                if indexed_items:
+                    console.print(f"  [green]✓ Indexed: {', '.join(indexed_items)}[/green]")
+
+                # Move to processed unless keep_files is set
+                if not keep_files:
+                    scanner.move_to_processed(file_path)
+
+            except Exception as e:
+                console.print(f"  [red]✗ Error: {e}[/red]")
+                total_counts["errors"] += 1
 
     # Display final results
     console.print()
@@ -249,7 +318,8 @@ def index_inbox(inbox_path: str, db_path: str, processed_path: str, keep_files:
         table.add_row("Errors", str(total_counts["errors"]), style="red")
 
     console.print(table)
-    console.print(f"\n[green]Successfully indexed to {db_path}[/green]")
+    _print_bulk_timings(timings)
+    console.print(f"\n[green]Successfully indexed to {_location(db)}[/green]")
 
     if not keep_files:
         console.print(f"[green]Processed files moved to {processed_path}[/green]")
@@ -257,6 +327,66 @@ def index_inbox(inbox_path: str, db_path: str, processed_path: str, keep_files:
     db.close()
 
 
+def _check_bulk(db: Union[Database, ShardedDatabase], bulk: bool) -> bool:
+    """Whether --bulk can apply: it defers the search indexes of a single file."""
+    if bulk and isinstance(db, ShardedDatabase):
+        console.print("[yellow]--bulk only applies to a database file; writing shards directly[/yellow]")
+        return False
+    return bulk
+
+
+def _open_vectors(
+    config: Dict[str, Any], db: Union[Database, ShardedDatabase], bulk: bool
+) -> Optional[VectorIndex]:
+    """Vector index to embed new documents into while indexing, if semantic search is on."""
+    try:
+        vectors = open_vector_index(config, _location(db))
+    except ImportError as e:
+        console.print(f"[yellow]Not embedding new documents: {e}[/yellow]")
+        return None
+    if vectors is not None and bulk:
+        console.print("[yellow]--bulk skips embedding; run `proof-of-self embed` afterwards[/yellow]")
+        return None
+    return vectors
+
+
+def _maintained(db: Union[Database, ShardedDatabase]) -> Iterator[Tuple[str, Database]]:
+    """
+    Databases a maintenance command works on: the file, or each warm shard.
+
+    Cold shards were compacted when they were frozen and are never written
+    again, so they are skipped.
+
+    Yields:
+        (shard name, or "" for a single file, Database)
+    """
+    if isinstance(db, ShardedDatabase):
+        cold = sum(1 for entry in db.manifest.shards.values() if entry["cold"])
+        if cold:
+            console.print(f"[dim]Skipping {cold} cold shards[/dim]")
+        yield from db.warm_shards()
+    else:
+        yield "", db
+
+
+def _location(db: Union[Database, ShardedDatabase]) -> Path:
+    """Database file or shard directory a command works on."""
+    return db.shard_dir if isinstance(db, ShardedDatabase) else db.db_path
+
+
+def _print_bulk_timings(timings: Optional[Dict[str, float]]) -> None:
+    """Print the phase timings reported by Database.bulk_load."""
+    if not timings:
+        return
+
+    table = Table(title="Bulk Load Timings")
+    table.add_column("Phase", style="cyan")
+    table.add_column("Seconds", style="green", justify="right")
+    for phase, seconds in timings.items():
+        table.add_row(phase.removesuffix("_seconds").capitalize(), f"{seconds:.2f}")
+    console.print(table)
+
+
 @main.command()
 @click.option(
     "--db-path",
@@ -267,13 +397,19 @@ def index_inbox(inbox_path: str, db_path: str, processed_path: str, keep_files:
 def stats(db_path: str) -> None:
     """Show statistics about your indexed data."""
     db_path = Path(db_path).expanduser()
+    config = load_config()
 
-    if not db_path.exists():
+    if shard_directory(config) is None and not db_path.exists():
         console.print(f"[red]Database not found at {db_path}[/red]")
         console.print("Run [cyan]proof-of-self index --twitter-archive <path>[/cyan] first")
         return
 
-    db = Database(str(db_path))
+    try:
+        # Read-only, so it never blocks a running indexer
+        db = open_database(config, db_path, role="serve", with_read_pool=False, read_only=True)
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        return
 
     try:
         stats = db.get_stats()
@@ -282,17 +418,27 @@ def stats(db_path: str) -> None:
         table.add_column("Metric", style="cyan")
         table.add_column("Count", style="green", justify="right")
 
-        table.add_row("Total Tweets", str(stats["total_tweets"]))
-        table.add_row("  - Original Tweets", str(stats["original_tweets"]))
-        table.add_row("  - Replies", str(stats["replies"]))
-        table.add_row("  - Retweets", str(stats["retweets"]))
-        table.add_row("", "")
-        table.add_row("Bookmarks", str(stats["bookmarks"]))
-        table.add_row("Likes", str(stats["likes"]))
-        table.add_row("", "")
-        table.add_row("Documents", str(stats["documents"]))
-        table.add_row("Thoughts/Notes", str(stats["thoughts"]))
-        table.add_row("Articles", str(stats["articles"]))
+        table.add_row("Total Documents", str(stats["total_documents"]))
+        table.add_row("  - Complete", str(stats["complete_documents"]))
+        table.add_row("  - Chunked", str(stats["chunked_documents"]))
+        table.add_row("Chunks", str(stats["total_chunks"]))
+        if isinstance(db, ShardedDatabase):
+            table.add_row("Shards", str(stats["shards"]))
+        else:
+            table.add_row("Schema Version", str(db.schema_version()))
+
+        for prefix, heading in (("source_", "By Source"), ("type_", "By Type")):
+            table.add_row("", "")
+            table.add_row(heading, "")
+            for key, count in stats.items():
+                if key.startswith(prefix):
+                    table.add_row(f"  - {key[len(prefix):]}", str(count))
+
+        if isinstance(db, Database):
+            table.add_row("", "")
+            table.add_row("Storage", "")
+            for key, value in db.storage_settings().items():
+                table.add_row(f"  - {key}", str(value))
 
         console.print(table)
 
@@ -300,6 +446,439 @@ def stats(db_path: str) -> None:
         db.close()
 
 
+@main.command()
+@click.option(
+    "--db-path",
+    default="./data/proof-of-self.db",
+    help="Path to database file",
+    type=click.Path(),
+)
+def recount(db_path: str) -> None:
+    """Rebuild the statistics counters and report any drift."""
+    db_path = Path(db_path).expanduser()
+    config = load_config()
+
+    if shard_directory(config) is None and not db_path.exists():
+        console.print(f"[red]Database not found at {db_path}[/red]")
+        return
+
+    db = open_database(config, db_path, role="ingest", with_read_pool=False)
+
+    try:
+        drift = {}
+        for name, database in _maintained(db):
+            for counter, values in database.recount().items():
+                drift[f"{name}: {counter}" if name else counter] = values
+
+        if not drift:
+            console.print("[green]Counters are accurate, nothing to repair.[/green]")
+            return
+
+        table = Table(title="Counter Drift Repaired")
+        table.add_column("Counter", style="cyan")
+        table.add_column("Stored", justify="right")
+        table.add_column("Actual", style="green", justify="right")
+        for counter, (stored, actual) in sorted(drift.items()):
+            table.add_row(counter, str(stored), str(actual))
+        console.print(table)
+
+    finally:
+        db.close()
+
+
+@main.command()
+@click.option(
+    "--db-path",
+    default="./data/proof-of-self.db",
+    help="Path to database file",
+    type=click.Path(),
+)
+@click.option(
+    "--top",
+    default=10,
+    show_default=True,
+    help="Most costly duplicated bodies to list",
+    type=click.IntRange(min=0),
+)
+def duplicates(db_path: str, top: int) -> None:
+    """Show how much of your corpus repeats the same text."""
+    db_path = Path(db_path).expanduser()
+    config = load_config()
+
+    # Bodies are shared within a file only, so shards have no corpus-wide report
+    if shard_directory(config) is not None:
+        console.print("[red]duplicates is not supported with database.shard_dir[/red]")
+        sys.exit(1)
+
+    if not db_path.exists():
+        console.print(f"[red]Database not found at {db_path}[/red]")
+        return
+
+    try:
+        options = database_options(config, role="serve", with_read_pool=False)
+        db = Database(str(db_path), read_only=True, **options)
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        return
+
+    try:
+        report = db.duplication_report(top=top)
+
+        table = Table(title="Duplicate Bodies")
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", style="green", justify="right")
+        table.add_row("Documents with a body", str(report["documents"]))
+        table.add_row("Distinct bodies", str(report["unique_bodies"]))
+        table.add_row(
+            "Duplicate documents",
+            f"{report['duplicate_documents']} ({report['duplicate_ratio']:.1%})",
+        )
+        table.add_row("Bodies with copies", str(report["duplicated_bodies"]))
+        table.add_row("Body text, one per document", _format_bytes(report["logical_bytes"]))
+        table.add_row("Body text, stored", _format_bytes(report["stored_bytes"]))
+        table.add_row("Saved", _format_bytes(report["saved_bytes"]))
+        table.add_row("FTS body postings", str(report["fts_body_postings"]))
+        table.add_row("FTS postings saved", str(report["fts_postings_saved"]))
+        console.print(table)
+
+        if report["top"]:
+            top_table = Table(title="Most Duplicated")
+            top_table.add_column("Document", style="cyan")
+            top_table.add_column("Copies", justify="right")
+            top_table.add_column("Saved", justify="right")
+            for row in report["top"]:
+                top_table.add_row(
+                    row["title"] or row["source_path"] or "Untitled",
+                    str(row["copies"]),
+                    _format_bytes(row["bytes_saved"]),
+                )
+            console.print(top_table)
+
+    finally:
+        db.close()
+
+
+@main.command()
+@click.option(
+    "--db-path",
+    default="./data/proof-of-self.db",
+    help="Path to database file",
+    type=click.Path(),
+)
+@click.option(
+    "--merge-budget",
+    default=DEFAULT_MERGE_BUDGET,
+    show_default=True,
+    help="Total pages of FTS merge work to do (per shard with database.shard_dir)",
+    type=click.IntRange(min=0),
+)
+@click.option(
+    "--pages-per-step",
+    default=DEFAULT_PAGES_PER_STEP,
+    show_default=True,
+    help="Pages of FTS merge work per transaction",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--vacuum",
+    is_flag=True,
+    help="Also rewrite the whole file (enables incremental vacuum on older databases)",
+)
+def optimize(db_path: str, merge_budget: int, pages_per_step: int, vacuum: bool) -> None:
+    """Compact the search indexes and reclaim free space."""
+    db_path = Path(db_path).expanduser()
+    config = load_config()
+
+    if shard_directory(config) is None and not db_path.exists():
+        console.print(f"[red]Database not found at {db_path}[/red]")
+        return
+
+    db = open_database(config, db_path, role="ingest", with_read_pool=False)
+
+    try:
+        for shard, database in _maintained(db):
+            maintenance = IndexMaintenance(database)
+            if vacuum:
+                console.print(f"[yellow]Rewriting {database.db_path} (VACUUM)...[/yellow]")
+                maintenance.vacuum()
+
+            console.print(f"[yellow]Merging search index segments of {database.db_path}...[/yellow]")
+            report = maintenance.run(budget=merge_budget, pages_per_step=pages_per_step)
+
+            table = Table(title=f"Index Maintenance: {shard}" if shard else "Index Maintenance")
+            table.add_column("Index", style="cyan")
+            table.add_column("Segments", justify="right")
+            table.add_column("Size", justify="right")
+            for name, before in report["before"].items():
+                after = report["after"][name]
+                table.add_row(
+                    name,
+                    f"{before['segments']} → {after['segments']}",
+                    f"{_format_bytes(before['bytes'])} → {_format_bytes(after['bytes'])}",
+                )
+            table.add_row(
+                "database",
+                "",
+                f"{_format_bytes(report['database_bytes_before'])} → "
+                f"{_format_bytes(report['database_bytes_after'])}",
+            )
+
+            console.print(table)
+            console.print(
+                f"[green]{report['merge_steps']} merge steps, "
+                f"{report['bodies_pruned']} unreferenced bodies pruned, "
+                f"{report['pages_vacuumed']} pages vacuumed in {report['seconds']:.2f}s[/green]"
+            )
+
+    finally:
+        db.close()
+
+
+@main.command()
+@click.option(
+    "--db-path",
+    default="./data/proof-of-self.db",
+    help="Path to database file",
+    type=click.Path(),
+)
+@click.option(
+    "--batch-size",
+    default=DEFAULT_EMBED_BATCH,
+    show_default=True,
+    help="Texts embedded per batch",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--rebuild",
+    is_flag=True,
+    help="Embed everything again (needed after changing search.embedder)",
+)
+@click.option(
+    "--retrain",
+    is_flag=True,
+    help="Retrain the IVF list centroids even if the current ones still fit",
+)
+def embed(db_path: str, batch_size: int, rebuild: bool, retrain: bool) -> None:
+    """Build or refresh the vectors behind semantic search."""
+    db_path = Path(db_path).expanduser()
+    config = load_config()
+
+    if shard_directory(config) is None and not db_path.exists():
+        console.print(f"[red]Database not found at {db_path}[/red]")
+        return
+
+    search_config = config.get("search") or {}
+    try:
+        embedder = load_embedder(search_config.get("embedder"))
+    except ImportError as e:
+        console.print(f"[red]{e}[/red]")
+        return
+
+    db = open_database(config, db_path, role="serve", with_read_pool=False, read_only=True)
+    index = VectorIndex(
+        search_config.get("vector_index_path") or vector_index_path(_location(db)),
+        embedder,
+        **vector_index_options(config),
+    )
+
+    try:
+        console.print(f"[yellow]Embedding new documents with {embedder.name}...[/yellow]")
+        report = index.update(
+            db,
+            batch_size=batch_size,
+            rebuild=rebuild,
+            dtype=search_config.get("vector_dtype") or DEFAULT_VECTOR_DTYPE,
+            retrain=retrain,
+        )
+        lists = f", {report['nlist']} IVF lists" if report["nlist"] else ""
+        console.print(
+            f"[green]{report['added']} vectors added, {report['removed']} removed, "
+            f"{report['total']} in {index.path}{lists} ({report['seconds']:.2f}s)[/green]"
+        )
+
+    finally:
+        db.close()
+
+
+@main.command()
+@click.option(
+    "--db-path",
+    default="./data/proof-of-self.db",
+    help="Path to database file",
+    type=click.Path(),
+)
+@click.option("--backup-path", help="Backup directory (default: database.backup_path)")
+@click.option("--keep", type=click.IntRange(min=0), help="Backups to keep (0 = all)")
+@click.option("--compress/--no-compress", default=None, help="gzip the backup")
+@click.option(
+    "--pages-per-step",
+    type=click.IntRange(min=1),
+    help="Pages copied per step (smaller = shorter pauses for writers)",
+)
+@click.option("--sleep-ms", type=click.IntRange(min=0), help="Pause between steps")
+@click.option("--verify", is_flag=True, help="Only check existing backups against their checksums")
+def backup(
+    db_path: str,
+    backup_path: Optional[str],
+    keep: Optional[int],
+    compress: Optional[bool],
+    pages_per_step: Optional[int],
+    sleep_ms: Optional[int],
+    verify: bool,
+) -> None:
+    """Back up the database (or each shard) while it is in use."""
+    db_path = Path(db_path).expanduser()
+    config = load_config()
+    settings = backup_options(config)
+    backup_dir = Path(backup_path or settings["path"]).expanduser()
+
+    # Each shard is backed up into a directory of its own; cold shards never
+    # change, so one backup of them is enough
+    files = {"": db_path}
+    cold = set()
+    shard_dir = shard_directory(config)
+    if shard_dir:
+        with open_database(config, db_path, with_read_pool=False) as sharded:
+            files = sharded.shard_files()
+            cold = {name for name, entry in sharded.manifest.shards.items() if entry["cold"]}
+
+    managers = {
+        name: BackupManager(
+            str(path),
+            str(backup_dir / name),
+            keep=settings["keep"] if keep is None else keep,
+            compress=settings["compress"] if compress is None else compress,
+        )
+        for name, path in files.items()
+    }
+
+    if verify:
+        table = Table(title="Backups")
+        table.add_column("Backup", style="cyan")
+        table.add_column("Size", justify="right")
+        table.add_column("Checksum")
+        for name, manager in managers.items():
+            for path in manager.backups():
+                ok = manager.verify(path)
+                table.add_row(
+                    f"{name}/{path.name}" if name else path.name,
+                    _format_bytes(path.stat().st_size),
+                    "[green]ok[/green]" if ok else "[red]MISMATCH[/red]",
+                )
+        console.print(table)
+        return
+
+    if shard_dir is None and not db_path.exists():
+        console.print(f"[red]Database not found at {db_path}[/red]")
+        return
+
+    for name, manager in managers.items():
+        if name in cold and manager.backups():
+            console.print(f"[dim]Cold shard {name} is already backed up[/dim]")
+            continue
+
+        console.print(f"[yellow]Backing up {manager.db_path}...[/yellow]")
+        report = manager.run(
+            pages_per_step=pages_per_step or settings["pages_per_step"],
+            sleep_ms=settings["sleep_ms"] if sleep_ms is None else sleep_ms,
+        )
+
+        console.print(f"[green]Backup written to {report['path']}[/green]")
+        console.print(
+            f"  {_format_bytes(report['bytes'])}, {report['pages']} pages in "
+            f"{report['steps']} steps, {report['seconds']:.2f}s"
+        )
+        console.print(f"  sha256 {report['sha256']}")
+        for path in report["rotated"]:
+            console.print(f"  [dim]Rotated out {path}[/dim]")
+
+    if shard_dir:
+        # The manifest maps the backed-up files back to their date ranges
+        backup_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(shard_dir / MANIFEST_NAME, backup_dir / MANIFEST_NAME)
+        console.print(f"[green]Shard manifest copied to {backup_dir}[/green]")
+
+
+def _format_bytes(size: int) -> str:
+    """Format a byte count for display."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+@main.command()
+@click.option(
+    "--db-path",
+    default="./data/proof-of-self.db",
+    help="Path to database file",
+    type=click.Path(),
+)
+@click.option(
+    "--shard-dir",
+    default="./data/shards",
+    help="Directory for the per-source, per-year shard files",
+    type=click.Path(),
+)
+@click.option(
+    "--freeze-before",
+    help="Mark shards older than this year cold (read-only, opened immutable)",
+    type=int,
+)
+@click.option(
+    "--batch-size",
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Documents written per transaction",
+    type=click.IntRange(min=1),
+)
+def shard(db_path: str, shard_dir: str, freeze_before: Optional[int], batch_size: int) -> None:
+    """Split a database into one file per source type and year."""
+    db_path = Path(db_path).expanduser()
+    shard_dir = Path(shard_dir).expanduser()
+
+    if (shard_dir / MANIFEST_NAME).exists():
+        console.print(f"[red]Shards already exist in {shard_dir}[/red]")
+        return
+    if not db_path.exists():
+        console.print(f"[red]Database not found at {db_path}[/red]")
+        return
+
+    console.print(f"[yellow]Splitting {db_path} into {shard_dir}...[/yellow]")
+    db = Database(str(db_path))
+    options = database_options(load_config(), role="ingest", with_read_pool=False)
+
+    try:
+        with ShardedDatabase.split(db, str(shard_dir), batch_size, **options) as sharded:
+            if freeze_before:
+                frozen = sharded.freeze_before(freeze_before)
+                console.print(f"[green]Froze {len(frozen)} shards before {freeze_before}[/green]")
+
+            table = Table(title="Shards")
+            table.add_column("Shard", style="cyan")
+            table.add_column("Documents", justify="right")
+            table.add_column("From")
+            table.add_column("To")
+            table.add_column("Cold")
+            for name, entry in sorted(sharded.manifest.shards.items()):
+                table.add_row(
+                    name,
+                    str(entry["documents"]),
+                    entry["min_created_at"][:10],
+                    entry["max_created_at"][:10],
+                    "yes" if entry["cold"] else "",
+                )
+            console.print(table)
+            console.print(
+                f"\nSet [cyan]database.shard_dir: {shard_dir}[/cyan] in config.yaml "
+                "to serve, index and search the shards"
+            )
+
+    finally:
+        db.close()
+
+
 @main.command()
 @click.option(
     "--db-path",
@@ -311,13 +890,15 @@ def serve(db_path: str) -> None:
     """Start the MCP server."""
     db_path = Path(db_path).expanduser()
 
-    if not db_path.exists():
+    shard_dir = shard_directory(load_config())
+
+    if shard_dir is None and not db_path.exists():
         console.print(f"[red]Database not found at {db_path}[/red]")
         console.print("Run [cyan]proof-of-self index --twitter-archive <path>[/cyan] first")
         return
 
     console.print("[green]Starting Proof-of-Self MCP server...[/green]")
-    console.print(f"Using database: {db_path}")
+    console.print(f"Using database: {shard_dir or db_path}")
 
     # Set environment variable and run server
     os.environ["PROOF_OF_SELF_DB"] = str(db_path)
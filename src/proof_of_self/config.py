@@ -0,0 +1,213 @@
+"""
+Configuration loading for Proof-of-Self
+
+Reads config.yaml (see config/config.example.yaml) and maps its sections
+onto the options understood by the core modules.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import yaml
+
+from proof_of_self.core.backup import (
+    DEFAULT_BACKUP_KEEP,
+    DEFAULT_BACKUP_PAGES,
+    DEFAULT_BACKUP_SLEEP_MS,
+)
+from proof_of_self.core.database import Database
+from proof_of_self.core.embeddings import load_embedder
+from proof_of_self.core.profiles import resolve_profile
+from proof_of_self.core.shards import MANIFEST_NAME, ShardedDatabase
+from proof_of_self.core.vector_index import VectorIndex, vector_index_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = "./config/config.yaml"
+DEFAULT_BACKUP_PATH = "./data/backups"
+
+
+def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load configuration from YAML.
+
+    Looks at `config_path`, then the PROOF_OF_SELF_CONFIG environment
+    variable, then ./config/config.yaml. A missing file is not an error.
+
+    Args:
+        config_path: Optional explicit path to config.yaml
+
+    Returns:
+        Configuration dictionary (empty if no config file exists)
+    """
+    path = Path(
+        config_path or os.getenv("PROOF_OF_SELF_CONFIG", DEFAULT_CONFIG_PATH)
+    ).expanduser()
+
+    if not path.exists():
+        logger.debug(f"No config file at {path}, using defaults")
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        config = yaml.safe_load(f) or {}
+
+    logger.info(f"Loaded config from {path}")
+    return config
+
+
+def database_options(
+    config: Dict[str, Any],
+    role: Optional[str] = None,
+    with_read_pool: bool = True,
+) -> Dict[str, Any]:
+    """
+    Build Database keyword arguments from the `database:` config section.
+
+    Args:
+        config: Configuration dictionary from load_config
+        role: Performance profile for the caller's role ("ingest" or
+            "serve"); `database.profile` in the config takes precedence
+        with_read_pool: Include read_pool_size (only useful for the server)
+
+    Returns:
+        Keyword arguments for Database (only keys present in the config)
+    """
+    section = config.get("database") or {}
+    options: Dict[str, Any] = {}
+
+    if "wal_mode" in section:
+        options["wal_mode"] = bool(section["wal_mode"])
+    if "busy_timeout_ms" in section:
+        options["busy_timeout_ms"] = int(section["busy_timeout_ms"])
+    if with_read_pool and "read_pool_size" in section:
+        options["read_pool_size"] = int(section["read_pool_size"])
+    if section.get("compression") not in (None, "none"):
+        options["compression"] = section["compression"]
+    if "compress_threshold_bytes" in section:
+        options["compress_threshold"] = int(section["compress_threshold_bytes"])
+
+    profile = section.get("profile") or role
+    if profile:
+        options["profile"] = resolve_profile(profile, section.get("profiles"))
+
+    return options
+
+
+def shard_directory(config: Dict[str, Any]) -> Optional[Path]:
+    """
+    Get the shard directory that takes the place of the database file.
+
+    Args:
+        config: Configuration dictionary from load_config
+
+    Returns:
+        The `database.shard_dir` path once `proof-of-self shard` has written
+        its manifest there, otherwise None
+    """
+    shard_dir = (config.get("database") or {}).get("shard_dir")
+    if not shard_dir:
+        return None
+
+    path = Path(shard_dir).expanduser()
+    if not (path / MANIFEST_NAME).exists():
+        logger.warning(f"No shard manifest in {path}, using the database file")
+        return None
+    return path
+
+
+def open_database(
+    config: Dict[str, Any],
+    db_path: Union[str, Path],
+    role: Optional[str] = None,
+    with_read_pool: bool = True,
+    read_only: bool = False,
+) -> Union[Database, ShardedDatabase]:
+    """
+    Open the configured shard directory, or else the database file.
+
+    Args:
+        config: Configuration dictionary from load_config
+        db_path: Database file used when no shard directory is configured
+        role: See database_options
+        with_read_pool: See database_options
+        read_only: Open the database file read-only (shards are only read
+            read-only, and opened for writing when first written)
+
+    Returns:
+        ShardedDatabase or Database
+    """
+    options = database_options(config, role=role, with_read_pool=with_read_pool)
+    shard_dir = shard_directory(config)
+    if shard_dir:
+        return ShardedDatabase(str(shard_dir), **options)
+    return Database(str(db_path), read_only=read_only, **options)
+
+
+def backup_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Read the backup settings from the `database:` config section.
+
+    Args:
+        config: Configuration dictionary from load_config
+
+    Returns:
+        Dictionary with enabled, path, interval_hours, keep, compress,
+        pages_per_step and sleep_ms (defaults filled in)
+    """
+    section = config.get("database") or {}
+    return {
+        "enabled": bool(section.get("backup_enabled", False)),
+        "path": section.get("backup_path") or DEFAULT_BACKUP_PATH,
+        "interval_hours": float(section.get("backup_interval_hours") or 0),
+        "keep": int(section.get("backup_keep", DEFAULT_BACKUP_KEEP)),
+        "compress": bool(section.get("backup_compress", False)),
+        "pages_per_step": int(section.get("backup_pages_per_step", DEFAULT_BACKUP_PAGES)),
+        "sleep_ms": int(section.get("backup_sleep_ms", DEFAULT_BACKUP_SLEEP_MS)),
+    }
+
+
+def vector_index_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build VectorIndex keyword arguments from the `search:` config section.
+
+    Args:
+        config: Configuration dictionary from load_config
+
+    Returns:
+        Keyword arguments for VectorIndex (only keys present in the config)
+    """
+    section = config.get("search") or {}
+    options: Dict[str, Any] = {}
+
+    if "ann_nprobe" in section:
+        options["nprobe"] = int(section["ann_nprobe"])
+    if "ann_min_vectors" in section:
+        options["ann_min_vectors"] = int(section["ann_min_vectors"])
+
+    return options
+
+
+def open_vector_index(config: Dict[str, Any], location: Union[str, Path]) -> Optional[VectorIndex]:
+    """
+    Open the vectors behind semantic search, if the `search:` section turns it on.
+
+    Args:
+        config: Configuration dictionary from load_config
+        location: Database file or shard directory the vectors belong to
+
+    Returns:
+        VectorIndex, or None when semantic_search is off
+
+    Raises:
+        ImportError: If numpy or the configured embedder is not installed
+    """
+    section = config.get("search") or {}
+    if not section.get("semantic_search"):
+        return None
+    return VectorIndex(
+        section.get("vector_index_path") or vector_index_path(location),
+        load_embedder(section.get("embedder")),
+        **vector_index_options(config),
+    )
@@ -0,0 +1,191 @@
+"""
+Async facade over Database and Search for Proof-of-Self
+
+MCP tool handlers are coroutines; running sqlite3 queries directly in them
+blocks the event loop (and the MCP transport) for the length of the query.
+These wrappers run each call on a thread-pool executor instead, so
+concurrent tool calls overlap and a cancelled call stops its query.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from proof_of_self.core.database import Database
+from proof_of_self.core.search import Search
+from proof_of_self.core.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# SQLite VM instructions between cancellation checks
+DEFAULT_PROGRESS_OPS = 1000
+
+# Cancellation flag of the call running on the current worker thread
+_current_call = threading.local()
+
+
+def _check_cancelled() -> int:
+    """SQLite progress handler: a nonzero return interrupts the statement."""
+    cancelled = getattr(_current_call, "cancelled", None)
+    return 1 if cancelled is not None and cancelled.is_set() else 0
+
+
+class AsyncDatabase:
+    """Runs Database work on executors so the event loop never blocks."""
+
+    def __init__(
+        self,
+        database: Database,
+        progress_ops: int = DEFAULT_PROGRESS_OPS,
+        vectors: Optional[VectorIndex] = None,
+    ):
+        """
+        Initialize the executors.
+
+        With a read pool, reads get one worker per pooled connection so each
+        worker always has a connection of its own. Without one, every call
+        shares the writer connection and runs on a single worker.
+
+        Args:
+            database: Database instance to wrap
+            progress_ops: SQLite instructions between cancellation checks
+            vectors: Vector index to add new thoughts to (None to leave
+                them to `proof-of-self embed`)
+        """
+        self.db = database
+        self.vectors = vectors
+
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pos-db-write")
+        if database.read_pool_size > 0:
+            self._readers = ThreadPoolExecutor(
+                max_workers=database.read_pool_size, thread_name_prefix="pos-db-read"
+            )
+        else:
+            self._readers = self._writer
+
+        database.set_progress_handler(_check_cancelled, progress_ops)
+
+    async def read(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a read-only call on a reader worker.
+
+        If the awaiting task is cancelled, the running query is interrupted.
+
+        Args:
+            func: Callable that reads through Database.reader()
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        return await self._run(self._readers, True, func, *args, **kwargs)
+
+    async def write(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a call that uses the writer connection on the writer worker.
+
+        Writes are serialized. A write cancelled before it starts is skipped;
+        once started it runs to completion so no transaction is cut short.
+
+        Args:
+            func: Callable that writes through Database.conn
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        return await self._run(self._writer, False, func, *args, **kwargs)
+
+    async def _run(
+        self,
+        executor: ThreadPoolExecutor,
+        interruptible: bool,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        """Submit a call to an executor and interrupt it if cancelled."""
+        cancelled = threading.Event()
+
+        def call() -> T:
+            _current_call.cancelled = cancelled if interruptible else None
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current_call.cancelled = None
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor, call)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # A queued call is dropped by the future's cancel; a running
+            # read is stopped by the progress handler at its next check
+            cancelled.set()
+            logger.debug(f"Cancelled {getattr(func, '__name__', func)}")
+            raise
+
+    async def get_stats(self) -> Dict[str, int]:
+        """Async Database.get_stats."""
+        return await self.read(self.db.get_stats)
+
+    async def insert_thought(
+        self,
+        content: str,
+        tags: Optional[List[str]] = None,
+        category: Optional[str] = None,
+    ) -> str:
+        """Async Database.insert_thought, embedding the thought if there is a vector index."""
+        doc_id = await self.write(
+            self.db.insert_thought, content=content, tags=tags, category=category
+        )
+        if self.vectors is not None:
+            try:
+                await self.write(self.vectors.add, self.db, [doc_id])
+            except Exception as e:
+                logger.warning(f"Could not embed thought {doc_id} ({e}); run `proof-of-self embed`")
+        return doc_id
+
+    def close(self) -> None:
+        """Stop the executors, dropping calls that have not started."""
+        self._readers.shutdown(wait=True, cancel_futures=True)
+        if self._writer is not self._readers:
+            self._writer.shutdown(wait=True, cancel_futures=True)
+
+
+class AsyncSearch:
+    """
+    Async view of a Search instance.
+
+    Every public Search method is available as a coroutine with the same
+    signature, run through AsyncDatabase.read().
+    """
+
+    def __init__(self, search: Search, async_db: AsyncDatabase):
+        """
+        Initialize the wrapper.
+
+        Args:
+            search: Search instance to wrap
+            async_db: AsyncDatabase over the same Database
+        """
+        self.search = search
+        self.async_db = async_db
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        method = getattr(self.search, name)
+        if name.startswith("_") or not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self.async_db.read(method, *args, **kwargs)
+
+        return call
@@ -0,0 +1,207 @@
+"""
+Online backups for Proof-of-Self
+
+Copies the live database with SQLite's backup API a few pages at a time,
+sleeping between steps so the MCP server and indexers keep running.
+Each backup gets a SHA-256 sidecar file and old backups are rotated out.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Pages copied per backup step, and the pause between steps
+DEFAULT_BACKUP_PAGES = 256
+DEFAULT_BACKUP_SLEEP_MS = 50
+
+# Number of backups kept by rotation
+DEFAULT_BACKUP_KEEP = 7
+
+BACKUP_PREFIX = "proof-of-self-"
+CHECKSUM_SUFFIX = ".sha256"
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: Path) -> str:
+    """Hex SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BackupManager:
+    """Incremental online backups of one database file."""
+
+    def __init__(
+        self,
+        db_path: str,
+        backup_dir: str,
+        keep: int = DEFAULT_BACKUP_KEEP,
+        compress: bool = False,
+    ):
+        """
+        Initialize backups.
+
+        Args:
+            db_path: Path to the live database file
+            backup_dir: Directory the backups are written to
+            keep: Number of most recent backups to keep (0 keeps all)
+            compress: gzip each backup after copying it
+        """
+        self.db_path = Path(db_path)
+        self.backup_dir = Path(backup_dir)
+        self.keep = keep
+        self.compress = compress
+
+    def backups(self) -> List[Path]:
+        """Existing backups, oldest first."""
+        if not self.backup_dir.exists():
+            return []
+        return sorted(
+            path
+            for path in self.backup_dir.glob(f"{BACKUP_PREFIX}*")
+            if path.suffix in (".db", ".gz")
+        )
+
+    def run(
+        self,
+        pages_per_step: int = DEFAULT_BACKUP_PAGES,
+        sleep_ms: int = DEFAULT_BACKUP_SLEEP_MS,
+    ) -> Dict[str, Any]:
+        """
+        Take a backup, checksum it and rotate old ones.
+
+        The copy reads through its own read-only connection. Writers are only
+        blocked for the length of one step; if another connection writes
+        between steps, SQLite restarts the copy from the first page.
+
+        Args:
+            pages_per_step: Pages copied per step
+            sleep_ms: Pause between steps (milliseconds)
+
+        Returns:
+            Dictionary with path, bytes, pages, sha256, seconds and the
+            backups removed by rotation
+        """
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+
+        name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.db"
+        target = self.backup_dir / name
+        partial = target.with_name(f"{name}.partial")
+        pages = {"total": 0, "steps": 0}
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            pages["total"] = total
+            pages["steps"] += 1
+
+        source = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        dest = sqlite3.connect(str(partial))
+        try:
+            source.backup(dest, pages=pages_per_step, progress=progress, sleep=sleep_ms / 1000)
+            # Backups of WAL databases stay in rollback-journal mode so they
+            # are a single self-contained file
+            dest.execute("PRAGMA journal_mode = DELETE")
+        except BaseException:
+            dest.close()
+            partial.unlink(missing_ok=True)
+            raise
+        finally:
+            source.close()
+        dest.close()
+
+        if self.compress:
+            target = target.with_name(f"{name}.gz")
+            with open(partial, "rb") as raw, gzip.open(f"{target}.partial", "wb") as packed:
+                shutil.copyfileobj(raw, packed)
+            partial.unlink()
+            partial = Path(f"{target}.partial")
+        partial.rename(target)
+
+        checksum = file_sha256(target)
+        Path(f"{target}{CHECKSUM_SUFFIX}").write_text(f"{checksum}  {target.name}\n")
+
+        report = {
+            "path": str(target),
+            "bytes": target.stat().st_size,
+            "pages": pages["total"],
+            "steps": pages["steps"],
+            "sha256": checksum,
+            "rotated": self.rotate(),
+            "seconds": time.perf_counter() - start,
+        }
+        logger.info(
+            f"Backup written to {target} ({report['pages']} pages in "
+            f"{report['steps']} steps, {report['seconds']:.2f}s)"
+        )
+        return report
+
+    def rotate(self) -> List[str]:
+        """
+        Delete all but the newest `keep` backups.
+
+        Returns:
+            Paths of the removed backups
+        """
+        if self.keep <= 0:
+            return []
+
+        removed = []
+        for path in self.backups()[: -self.keep]:
+            path.unlink()
+            Path(f"{path}{CHECKSUM_SUFFIX}").unlink(missing_ok=True)
+            removed.append(str(path))
+            logger.info(f"Rotated out backup {path}")
+        return removed
+
+    def verify(self, path: Path) -> bool:
+        """
+        Check a backup against its checksum file.
+
+        Returns:
+            True if the checksum file exists and matches
+        """
+        checksum_path = Path(f"{path}{CHECKSUM_SUFFIX}")
+        if not checksum_path.exists():
+            return False
+        expected = checksum_path.read_text().split()[0]
+        return file_sha256(path) == expected
+
+
+async def run_backup_loop(
+    manager: BackupManager,
+    interval_seconds: float,
+    pages_per_step: int = DEFAULT_BACKUP_PAGES,
+    sleep_ms: int = DEFAULT_BACKUP_SLEEP_MS,
+) -> None:
+    """
+    Background task for the MCP server: take a backup every interval.
+
+    The copy runs on its own thread and connection, so tool calls and the
+    writer worker are only paused for one step at a time.
+
+    Args:
+        manager: BackupManager for the server's database
+        interval_seconds: Time between backups
+        pages_per_step: Pages copied per step
+        sleep_ms: Pause between steps (milliseconds)
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+
+        try:
+            await asyncio.to_thread(manager.run, pages_per_step, sleep_ms)
+        except Exception as e:
+            logger.error(f"Scheduled backup failed: {e}")
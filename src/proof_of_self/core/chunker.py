@@ -7,18 +7,65 @@ with configurable chunk size and overlap.
 
 import hashlib
 import re
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
 
 
 @dataclass
 class Chunk:
-    """Represents a chunk of a larger document."""
+    """A span of a larger document's text."""
     chunk_id: str
     document_id: str
     chunk_index: int
-    content: str
+    start_offset: int
+    end_offset: int
     metadata: Dict[str, Any]
+    source: str = field(default="", repr=False)
+
+    @property
+    def content(self) -> str:
+        """The chunk's text, sliced from the parent document on access."""
+        return self.source[self.start_offset:self.end_offset]
+
+
+# Paragraph and sentence boundaries
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+# Characters per estimated token (see DocumentChunker._estimate_tokens)
+CHARS_PER_TOKEN = 4
+
+# Documents are keyed by the first 16 bytes of their ID hash (see document_key)
+DOCUMENT_ID_BYTES = 16
+_HEX_ID = re.compile(r"[0-9a-f]+")
+
+
+def _split_spans(
+    text: str, pattern: re.Pattern, start: int = 0, end: int = -1
+) -> List[Tuple[int, int]]:
+    """
+    Split text[start:end] on a pattern into whitespace-trimmed spans.
+
+    Returns:
+        (start, end) offsets into `text` of each non-blank piece
+    """
+    end = len(text) if end < 0 else end
+    spans = []
+    position = start
+    for match in pattern.finditer(text, start, end):
+        spans.append((position, match.start()))
+        position = match.end()
+    spans.append((position, end))
+
+    trimmed = []
+    for span_start, span_end in spans:
+        while span_start < span_end and text[span_start].isspace():
+            span_start += 1
+        while span_end > span_start and text[span_end - 1].isspace():
+            span_end -= 1
+        if span_start < span_end:
+            trimmed.append((span_start, span_end))
+    return trimmed
 
 
 class DocumentChunker:
@@ -63,7 +110,10 @@ class DocumentChunker:
         metadata: Optional[Dict[str, Any]] = None,
     ) -> List[Chunk]:
         """
-        Chunk a document into overlapping pieces.
+        Chunk a document into overlapping spans of its text.
+
+        Chunks hold offsets into `content` rather than copies of it; each
+        chunk's text is only built when its `content` is read.
 
         Args:
             document_id: Unique document ID
@@ -77,140 +127,85 @@ class DocumentChunker:
             # Don't chunk if content is small enough
             return []
 
-        # Split into semantic boundaries (paragraphs, then sentences)
-        segments = self._split_into_segments(content)
-
-        # Group segments into chunks
-        chunks = []
-        current_chunk_content = []
-        current_token_count = 0
-        chunk_index = 0
-
-        for segment in segments:
-            segment_tokens = self._estimate_tokens(segment)
-
-            # If this segment alone exceeds chunk size, split it further
-            if segment_tokens > self.chunk_size * 1.5:
-                # Force split long segment at sentence boundaries
-                sentences = self._split_into_sentences(segment)
-                for sentence in sentences:
-                    sentence_tokens = self._estimate_tokens(sentence)
-
-                    if current_token_count + sentence_tokens > self.chunk_size:
-                        # Save current chunk
-                        if current_chunk_content:
-                            chunk = self._create_chunk(
-                                document_id,
-                                chunk_index,
-                                " ".join(current_chunk_content),
-                                metadata,
-                            )
-                            chunks.append(chunk)
-                            chunk_index += 1
-
-                        # Start new chunk with overlap from previous
-                        overlap_content = self._get_overlap_content(current_chunk_content)
-                        current_chunk_content = [overlap_content, sentence] if overlap_content else [sentence]
-                        current_token_count = self._estimate_tokens(" ".join(current_chunk_content))
-                    else:
-                        current_chunk_content.append(sentence)
-                        current_token_count += sentence_tokens
-
-            elif current_token_count + segment_tokens > self.chunk_size:
-                # Save current chunk
-                if current_chunk_content:
-                    chunk = self._create_chunk(
-                        document_id,
-                        chunk_index,
-                        "\n\n".join(current_chunk_content),
-                        metadata,
-                    )
-                    chunks.append(chunk)
-                    chunk_index += 1
-
-                # Start new chunk with overlap
-                overlap_content = self._get_overlap_content(current_chunk_content)
-                current_chunk_content = [overlap_content, segment] if overlap_content else [segment]
-                current_token_count = self._estimate_tokens("\n\n".join(current_chunk_content))
-            else:
-                # Add to current chunk
-                current_chunk_content.append(segment)
-                current_token_count += segment_tokens
-
-        # Save final chunk
-        if current_chunk_content:
-            chunk = self._create_chunk(
-                document_id,
-                chunk_index,
-                "\n\n".join(current_chunk_content),
-                metadata,
-            )
-            chunks.append(chunk)
-
-        return chunks
-
-    def _split_into_segments(self, content: str) -> List[str]:
-        """
-        Split content into semantic segments (paragraphs).
+        return [
+            self._create_chunk(document_id, chunk_index, content, start, end, metadata)
+            for chunk_index, (start, end) in enumerate(self.chunk_spans(content))
+        ]
 
-        Args:
-            content: Document content
-
-        Returns:
-            List of paragraph segments
+    def chunk_spans(self, content: str) -> List[Tuple[int, int]]:
         """
-        # Split on multiple newlines (paragraph boundaries)
-        segments = re.split(r'\n\s*\n', content)
+        Group paragraphs (or sentences of very long paragraphs) into spans.
 
-        # Filter out empty segments
-        segments = [s.strip() for s in segments if s.strip()]
-
-        return segments
-
-    def _split_into_sentences(self, text: str) -> List[str]:
-        """
-        Split text into sentences.
+        Each span after the first starts about `overlap_size` tokens before
+        the previous one ended, on a word boundary.
 
         Args:
-            text: Text to split
+            content: Full document content
 
         Returns:
-            List of sentences
+            (start_offset, end_offset) of each chunk, in order
         """
-        # Simple sentence splitting (could be improved with nltk if needed)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        return [s.strip() for s in sentences if s.strip()]
+        max_chars = self.chunk_size * CHARS_PER_TOKEN
+        overlap_chars = self.overlap_size * CHARS_PER_TOKEN
 
-    def _get_overlap_content(self, chunks: List[str]) -> str:
+        # Split into semantic boundaries (paragraphs, then sentences)
+        units = []
+        for start, end in _split_spans(content, PARAGRAPH_BREAK):
+            if end - start > max_chars * 1.5:
+                # Force split long paragraph at sentence boundaries
+                units.extend(_split_spans(content, SENTENCE_BREAK, start, end))
+            else:
+                units.append((start, end))
+
+        spans: List[Tuple[int, int]] = []
+        chunk_start = chunk_end = None
+        for start, end in units:
+            if chunk_start is not None and end - chunk_start > max_chars:
+                spans.append((chunk_start, chunk_end))
+                chunk_start = self._overlap_start(content, chunk_start, chunk_end, overlap_chars)
+                if chunk_start >= chunk_end:
+                    chunk_start = start
+            elif chunk_start is None:
+                chunk_start = start
+            chunk_end = end
+
+        if chunk_start is not None:
+            spans.append((chunk_start, chunk_end))
+        return spans
+
+    @staticmethod
+    def _overlap_start(content: str, start: int, end: int, overlap_chars: int) -> int:
         """
-        Get overlap content from previous chunks.
+        Offset the next chunk starts at to overlap the span start..end.
 
         Args:
-            chunks: List of content chunks
+            content: Full document content
+            start: Start of the previous chunk
+            end: End of the previous chunk
+            overlap_chars: Characters of overlap wanted
 
         Returns:
-            Overlap content string
+            Offset of the first word within the last `overlap_chars` of the
+            previous chunk (`end` when there is no room for overlap)
         """
-        if not chunks:
-            return ""
-
-        # Get last chunk(s) for overlap
-        full_content = " ".join(chunks)
-        tokens = self._estimate_tokens(full_content)
-
-        if tokens <= self.overlap_size:
-            return full_content
+        if overlap_chars <= 0:
+            return end
 
-        # Take approximately overlap_size worth of content from the end
-        words = full_content.split()
-        overlap_words = int(len(words) * (self.overlap_size / tokens))
-        return " ".join(words[-overlap_words:]) if overlap_words > 0 else ""
+        position = max(start + 1, end - overlap_chars)
+        # Move forward to the start of the next whole word
+        while position < end and not content[position - 1].isspace():
+            position += 1
+        while position < end and content[position].isspace():
+            position += 1
+        return position
 
     def _create_chunk(
         self,
         document_id: str,
         chunk_index: int,
         content: str,
+        start_offset: int,
+        end_offset: int,
         metadata: Optional[Dict[str, Any]],
     ) -> Chunk:
         """
@@ -219,7 +214,9 @@ class DocumentChunker:
         Args:
             document_id: Parent document ID
             chunk_index: Position in document
-            content: Chunk content
+            content: Full parent document content
+            start_offset: Start of the chunk in `content`
+            end_offset: End of the chunk in `content`
             metadata: Additional metadata
 
         Returns:
@@ -229,10 +226,11 @@ class DocumentChunker:
         chunk_id = f"{document_id}_chunk_{chunk_index}"
 
         # Build chunk metadata
+        char_count = end_offset - start_offset
         chunk_metadata = {
             "chunk_index": chunk_index,
-            "token_count": self._estimate_tokens(content),
-            "char_count": len(content),
+            "token_count": char_count // CHARS_PER_TOKEN,
+            "char_count": char_count,
         }
         if metadata:
             chunk_metadata.update(metadata)
@@ -241,8 +239,10 @@ class DocumentChunker:
             chunk_id=chunk_id,
             document_id=document_id,
             chunk_index=chunk_index,
-            content=content,
+            start_offset=start_offset,
+            end_offset=end_offset,
             metadata=chunk_metadata,
+            source=content,
         )
 
     def _estimate_tokens(self, text: str) -> int:
@@ -258,7 +258,7 @@ class DocumentChunker:
         Returns:
             Estimated token count
         """
-        return len(text) // 4
+        return len(text) // CHARS_PER_TOKEN
 
 
 def generate_document_id(
@@ -275,10 +275,29 @@ def generate_document_id(
         created_at: Creation timestamp (ISO format)
 
     Returns:
-        SHA256 hash as document ID
+        First DOCUMENT_ID_BYTES of the SHA256 hash, as hex
     """
     # For large content, only use first 1000 chars for hashing
     content_sample = content[:1000] if len(content) > 1000 else content
 
     unique_str = f"{content_sample}{source_path}{created_at}"
-    return hashlib.sha256(unique_str.encode()).hexdigest()
+    return hashlib.sha256(unique_str.encode()).hexdigest()[:DOCUMENT_ID_BYTES * 2]
+
+
+def document_key(doc_id: str) -> bytes:
+    """
+    The DOCUMENT_ID_BYTES key a document id is stored under.
+
+    Hex ids (from generate_document_id, including the 64-character ids of
+    earlier releases) keep their first 16 bytes, in either case. Any other
+    string is hashed, so caller-chosen ids map to a stable key as well.
+
+    Args:
+        doc_id: External document ID
+
+    Returns:
+        Key for documents.id; its .hex() is the ID queries return
+    """
+    if len(doc_id) >= DOCUMENT_ID_BYTES * 2 and _HEX_ID.fullmatch(doc_id.lower()):
+        return bytes.fromhex(doc_id[:DOCUMENT_ID_BYTES * 2])
+    return hashlib.sha256(doc_id.encode("utf-8")).digest()[:DOCUMENT_ID_BYTES]
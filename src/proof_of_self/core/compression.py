@@ -0,0 +1,158 @@
+"""
+Body compression for Proof-of-Self
+
+Large document and chunk bodies can be stored compressed in a `content_z`
+BLOB column instead of `content`. Each blob starts with a one-byte codec
+marker so files can mix codecs. SQL functions registered on every
+connection let the FTS views, snippet() and read queries see plain text.
+Bodies are content-addressed by body_hash(), the SHA-256 of their text.
+Chunks are spans of a body, read with pos_span()/pos_span_load().
+"""
+
+import hashlib
+import lzma
+import sqlite3
+import zlib
+from typing import Any, Dict, Optional
+
+# Codec marker byte -> codec name
+CODECS = {b"z": "zlib", b"x": "lzma"}
+CODEC_MARKERS = {name: marker for marker, name in CODECS.items()}
+
+# Bodies shorter than this (in UTF-8 bytes) are stored as plain text
+DEFAULT_COMPRESS_THRESHOLD = 8192
+
+# UTF-8 needs at most 4 bytes per character
+_MAX_BYTES_PER_CHAR = 4
+
+
+def compress(text: str, codec: str) -> bytes:
+    """
+    Compress a body for the content_z column.
+
+    Args:
+        text: Body text
+        codec: "zlib" or "lzma"
+
+    Returns:
+        Codec marker byte followed by the compressed UTF-8 bytes
+    """
+    if codec not in CODEC_MARKERS:
+        raise ValueError(f"Unknown compression codec '{codec}', expected one of {list(CODEC_MARKERS)}")
+
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        packed = zlib.compress(data, 6)
+    else:
+        packed = lzma.compress(data, preset=6)
+    return CODEC_MARKERS[codec] + packed
+
+
+def decompress(blob: bytes, max_chars: Optional[int] = None) -> str:
+    """
+    Decompress a content_z blob.
+
+    Args:
+        blob: Value from a content_z column
+        max_chars: Only decompress enough to return this many characters
+
+    Returns:
+        Body text (or its first `max_chars` characters)
+    """
+    marker, payload = bytes(blob[:1]), blob[1:]
+    codec = CODECS.get(marker)
+    if codec is None:
+        raise ValueError(f"Unknown compression marker {marker!r}")
+
+    if max_chars is None:
+        data = zlib.decompress(payload) if codec == "zlib" else lzma.decompress(payload)
+        return data.decode("utf-8")
+
+    # Partial decompression: stop once enough bytes for max_chars are out
+    decompressor = zlib.decompressobj() if codec == "zlib" else lzma.LZMADecompressor()
+    data = decompressor.decompress(payload, max_chars * _MAX_BYTES_PER_CHAR)
+    return data.decode("utf-8", errors="ignore")[:max_chars]
+
+
+def body_hash(text: str) -> bytes:
+    """
+    Content address of a body.
+
+    Args:
+        text: Body text
+
+    Returns:
+        32-byte SHA-256 digest of the UTF-8 text
+    """
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def _body(content: Optional[str], content_z: Optional[bytes]) -> Optional[str]:
+    """SQL pos_body(content, content_z): the stored body as text."""
+    if content_z is not None:
+        return decompress(content_z)
+    return content
+
+
+def _preview(
+    content: Optional[str], content_z: Optional[bytes], max_chars: int
+) -> Optional[str]:
+    """SQL pos_preview(content, content_z, n): first n characters of the body."""
+    if content_z is not None:
+        return decompress(content_z, max_chars)
+    return content[:max_chars] if content is not None else None
+
+
+def _hash(content: Optional[str], content_z: Optional[bytes]) -> Optional[bytes]:
+    """SQL pos_hash(content, content_z): body_hash() of the stored body."""
+    text = _body(content, content_z)
+    return body_hash(text) if text is not None else None
+
+
+def _register_span_functions(conn: sqlite3.Connection) -> None:
+    """
+    Register pos_span()/pos_span_load(), sharing a one-body cache.
+
+    Consecutive chunks of a book read the same body, so it is decoded once
+    instead of once per chunk. Use them as
+
+        COALESCE(pos_span(hash, start, end),
+                 (SELECT pos_span_load(hash, content, content_z, start, end)
+                  FROM bodies WHERE hash = ...))
+
+    COALESCE only evaluates the subquery (and copies the body blob out of
+    SQLite) when the cache misses.
+    """
+    cache: Dict[str, Any] = {"hash": None, "text": None}
+
+    def span(hash_: Optional[bytes], start: int, end: int) -> Optional[str]:
+        """SQL pos_span(hash, start, end): the span, or NULL if not cached."""
+        if hash_ is None or hash_ != cache["hash"]:
+            return None
+        return cache["text"][start:end]
+
+    def span_load(
+        hash_: bytes, content: Optional[str], content_z: Optional[bytes], start: int, end: int
+    ) -> Optional[str]:
+        """SQL pos_span_load(hash, content, content_z, start, end): cache the body."""
+        text = _body(content, content_z)
+        if text is None:
+            return None
+        cache["hash"], cache["text"] = hash_, text
+        return text[start:end]
+
+    conn.create_function("pos_span", 3, span)
+    conn.create_function("pos_span_load", 5, span_load)
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """
+    Register the body SQL functions on a connection.
+
+    Every connection that reads the FTS views or writes documents/chunks
+    needs these, because the FTS triggers call pos_body() and pos_span().
+    """
+    conn.create_function("pos_body", 2, _body, deterministic=True)
+    conn.create_function("pos_preview", 3, _preview, deterministic=True)
+    conn.create_function("pos_hash", 2, _hash, deterministic=True)
+    _register_span_functions(conn)
@@ -0,0 +1,99 @@
+"""
+Read-only connection pool for Proof-of-Self
+
+Lets query handlers read the database on their own connections so they are
+not serialized behind the writer connection used for indexing.
+"""
+
+import logging
+import queue
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from proof_of_self.core.compression import register_functions
+from proof_of_self.core.profiles import apply_connection_pragmas
+
+logger = logging.getLogger(__name__)
+
+
+class ReadConnectionPool:
+    """Fixed-size pool of read-only SQLite connections."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        size: int,
+        busy_timeout_ms: int,
+        profile: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Open the pooled connections.
+
+        Args:
+            db_path: Path to an existing SQLite database file
+            size: Number of connections to keep open
+            busy_timeout_ms: How long a reader waits on a lock before failing
+            profile: Resolved performance profile (cache/mmap/temp store
+                settings are applied to each connection)
+        """
+        if size < 1:
+            raise ValueError(f"Read pool size must be at least 1, got {size}")
+
+        self.db_path = Path(db_path)
+        self.size = size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.profile = profile or {}
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        self._all: List[sqlite3.Connection] = []
+
+        for _ in range(size):
+            conn = self._open()
+            self._all.append(conn)
+            self._idle.put(conn)
+
+        logger.info(f"Opened {size} read-only connections to {self.db_path}")
+
+    def _open(self) -> sqlite3.Connection:
+        """Open one read-only connection."""
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,  # Borrowed by whichever thread holds it
+        )
+        conn.row_factory = sqlite3.Row
+        register_functions(conn)  # FTS views and previews decompress bodies
+        apply_connection_pragmas(conn, self.profile)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection, blocking until one is free.
+
+        Yields:
+            Read-only sqlite3.Connection
+        """
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            # Never hand back a connection holding an open read snapshot
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def set_progress_handler(self, handler: Callable[[], int], n: int) -> None:
+        """Install a SQLite progress handler on every pooled connection."""
+        for conn in self._all:
+            conn.set_progress_handler(handler, n)
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        for conn in self._all:
+            conn.close()
+        self._all.clear()
+        logger.info("Read connection pool closed")
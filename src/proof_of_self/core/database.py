@@ -5,153 +5,1275 @@ Handles SQLite database operations, schema management, and full-text search inde
 """
 
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import json
 import logging
+import time
+import uuid
+
+from proof_of_self.core.chunker import document_key, generate_document_id
+from proof_of_self.core.compression import (
+    DEFAULT_COMPRESS_THRESHOLD,
+    body_hash,
+    compress,
+    register_functions,
+)
+from proof_of_self.core.connection_pool import ReadConnectionPool
+from proof_of_self.core.profiles import apply_connection_pragmas, read_settings, resolve_profile
 
 logger = logging.getLogger(__name__)
 
+# Rows written per transaction by the bulk insert methods
+DEFAULT_BATCH_SIZE = 1000
+
+# Rows fetched per round trip by the streaming iterators (iter_rows & co.)
+DEFAULT_FETCH_SIZE = 500
+
+# How long a connection waits on a locked database before raising
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+# Schema version stored in PRAGMA user_version once every migration in
+# Database._migrations() has been applied. Bump it with each new migration.
+SCHEMA_VERSION = 7
+
+# documents.id holds document_key(doc_id); queries return it as lower(hex(id))
+DOCUMENT_INSERT_SQL = """
+    INSERT OR REPLACE INTO documents (
+        id, source_type, content_type, title, author, body_hash,
+        source_path, is_chunked, metadata, tags, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Document bodies are stored once per distinct text, keyed by body_hash()
+BODY_INSERT_SQL = """
+    INSERT INTO bodies (hash, content, content_z, size) VALUES (?, ?, ?, ?)
+    ON CONFLICT(hash) DO NOTHING
+"""
+
+# Hot metadata keys exposed as virtual generated columns on documents,
+# so filters and sorts use B-tree indexes instead of json_extract scans
+METADATA_COLUMNS = {
+    "tweet_id": "TEXT",
+    "reply_to_tweet_id": "TEXT",
+    "favorite_count": "INTEGER",
+    "retweet_count": "INTEGER",
+    "is_reply": "INTEGER",
+    "is_retweet": "INTEGER",
+}
+
+# Newest first within equal engagement, so engagement-ordered searches can
+# walk the index and stop after the top rows
+ENGAGEMENT_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_documents_engagement "
+    "ON documents(favorite_count + retweet_count, created_at) WHERE tweet_id IS NOT NULL"
+)
+
+METADATA_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_documents_tweet_id "
+    "ON documents(tweet_id) WHERE tweet_id IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS idx_documents_reply_to "
+    "ON documents(reply_to_tweet_id) WHERE reply_to_tweet_id IS NOT NULL",
+    ENGAGEMENT_INDEX_SQL,
+    "CREATE INDEX IF NOT EXISTS idx_documents_is_reply "
+    "ON documents(is_reply, created_at) WHERE tweet_id IS NOT NULL",
+]
+
+
+def _metadata_column_sql(name: str, sql_type: str) -> str:
+    """Column definition for a virtual column extracted from metadata JSON."""
+    return (
+        f"{name} {sql_type} GENERATED ALWAYS AS "
+        f"(json_extract(metadata, '$.{name}')) VIRTUAL"
+    )
+
+
+def _documents_table_sql(table: str) -> str:
+    """
+    Documents table definition, including the generated metadata columns.
+
+    Rows are keyed by an integer rowid (doc_rowid), which chunks, tags and
+    both FTS tables reference; `id` is the 16-byte external document key.
+    """
+    metadata_columns = "".join(
+        f",\n                {_metadata_column_sql(name, sql_type)}"
+        for name, sql_type in METADATA_COLUMNS.items()
+    )
+    return f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                doc_rowid INTEGER PRIMARY KEY,
+                id BLOB NOT NULL UNIQUE,
+                source_type TEXT NOT NULL,
+                content_type TEXT,
+                title TEXT,
+                author TEXT,
+                content TEXT,
+                content_z BLOB,
+                body_hash BLOB,
+                source_path TEXT,
+                is_chunked BOOLEAN DEFAULT 0,
+                metadata TEXT,
+                tags TEXT,
+                created_at TIMESTAMP,
+                indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP{metadata_columns}
+            )
+        """
+
+
+def _chunks_table_sql(table: str) -> str:
+    """
+    Chunks table definition.
+
+    chunk_rowid keeps chunks_fts rowids stable across VACUUM; document_id
+    is the parent's doc_rowid.
+    """
+    return f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                chunk_rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                document_id INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                content_z BLOB,
+                body_hash BLOB,
+                start_offset INTEGER,
+                end_offset INTEGER,
+                metadata TEXT,
+                FOREIGN KEY (document_id) REFERENCES documents(doc_rowid) ON DELETE CASCADE,
+                UNIQUE(document_id, chunk_index)
+            )
+        """
+
+
+def _owned_body_sql(row: str) -> str:
+    """
+    The body text documents_fts indexes for a documents row.
+
+    Only the first document (lowest rowid) referencing a body carries its
+    text; later copies index their title, author and tags alone.
+    """
+    return f"""CASE WHEN NOT EXISTS (
+            SELECT 1 FROM documents o
+            WHERE o.body_hash = {row}.body_hash AND o.rowid < {row}.rowid
+        ) THEN (
+            SELECT pos_body(content, content_z) FROM bodies WHERE hash = {row}.body_hash
+        ) END"""
+
+
+def chunk_text_sql(row: str, bodies: str = "bodies") -> str:
+    """
+    The text of a chunks row: a span of its document's body, or the inline
+    content of chunks written before chunks were spans.
+
+    Args:
+        row: Alias of the chunks row
+        bodies: The bodies table, schema-qualified when reading a shard
+    """
+    return f"""CASE WHEN {row}.start_offset IS NULL
+            THEN pos_body({row}.content, {row}.content_z)
+            ELSE COALESCE(
+                pos_span({row}.body_hash, {row}.start_offset, {row}.end_offset),
+                (SELECT pos_span_load(hash, content, content_z,
+                                      {row}.start_offset, {row}.end_offset)
+                 FROM {bodies} WHERE hash = {row}.body_hash)
+            ) END"""
+
+
+# External-content FTS5 tables and the triggers that keep them in sync.
+# The FTS tables read their text through views so compressed bodies
+# (content_z) are indexed and snippet() works on them.
+FTS_TABLES = ("documents_fts", "chunks_fts")
+
+FTS_CONTENT_VIEWS = {
+    "documents_body": f"""
+        CREATE VIEW IF NOT EXISTS documents_body AS
+        SELECT d.rowid AS doc_rowid, d.id, d.title, d.author,
+               {_owned_body_sql("d")} AS content, d.tags
+        FROM documents d
+    """,
+    "chunks_body": f"""
+        CREATE VIEW IF NOT EXISTS chunks_body AS
+        SELECT c.rowid AS chunk_rowid, c.id, {chunk_text_sql("c")} AS content
+        FROM chunks c
+    """,
+}
+
+FTS_TABLE_SQL = {
+    "documents_fts": """
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            id UNINDEXED,
+            title,
+            author,
+            content,
+            tags,
+            content=documents_body,
+            content_rowid=doc_rowid,
+            tokenize='porter unicode61'
+        )
+    """,
+    "chunks_fts": """
+        CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+            id UNINDEXED,
+            content,
+            content=chunks_body,
+            content_rowid=chunk_rowid,
+            tokenize='porter unicode61'
+        )
+    """,
+}
+
+# The document that takes over a body's text when its first copy is deleted
+_NEXT_BODY_OWNER = """
+    n.rowid = (SELECT MIN(rowid) FROM documents WHERE body_hash = old.body_hash)
+    AND n.rowid > old.rowid
+"""
+
+DOCUMENT_FTS_TRIGGERS = ("documents_ai", "documents_ad", "documents_au")
+CHUNK_FTS_TRIGGERS = ("chunks_ai", "chunks_ad", "chunks_au")
+
+FTS_TRIGGERS = {
+    "documents_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+            INSERT INTO documents_fts(rowid, id, title, author, content, tags)
+            VALUES (new.rowid, new.id, new.title, new.author,
+                    {_owned_body_sql("new")}, new.tags);
+        END
+    """,
+    # External-content FTS5 tables must be told the old values to delete them.
+    # Deleting the first copy of a body re-indexes the next copy with its text.
+    "documents_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+            INSERT INTO documents_fts(documents_fts, rowid, id, title, author, content, tags)
+            VALUES ('delete', old.rowid, old.id, old.title, old.author,
+                    {_owned_body_sql("old")}, old.tags);
+            INSERT INTO documents_fts(documents_fts, rowid, id, title, author, content, tags)
+            SELECT 'delete', n.rowid, n.id, n.title, n.author, NULL, n.tags
+            FROM documents n WHERE {_NEXT_BODY_OWNER};
+            INSERT INTO documents_fts(rowid, id, title, author, content, tags)
+            SELECT n.rowid, n.id, n.title, n.author, {_owned_body_sql("n")}, n.tags
+            FROM documents n WHERE {_NEXT_BODY_OWNER};
+        END
+    """,
+    # body_hash never changes in place (see BODY_TRIGGERS), so the row keeps
+    # whether it carries its body's text
+    "documents_au": f"""
+        CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+            INSERT INTO documents_fts(documents_fts, rowid, id, title, author, content, tags)
+            VALUES ('delete', old.rowid, old.id, old.title, old.author,
+                    {_owned_body_sql("old")}, old.tags);
+            INSERT INTO documents_fts(rowid, id, title, author, content, tags)
+            VALUES (new.rowid, new.id, new.title, new.author,
+                    {_owned_body_sql("new")}, new.tags);
+        END
+    """,
+    # Span chunks read their text from `bodies`, which keeps every body
+    # until prune_bodies(), so it is still there when a chunk is deleted
+    "chunks_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+            INSERT INTO chunks_fts(rowid, id, content)
+            VALUES (new.rowid, new.id, {chunk_text_sql("new")});
+        END
+    """,
+    "chunks_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+            INSERT INTO chunks_fts(chunks_fts, rowid, id, content)
+            VALUES ('delete', old.rowid, old.id, {chunk_text_sql("old")});
+        END
+    """,
+    "chunks_au": f"""
+        CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+            INSERT INTO chunks_fts(chunks_fts, rowid, id, content)
+            VALUES ('delete', old.rowid, old.id, {chunk_text_sql("old")});
+            INSERT INTO chunks_fts(rowid, id, content)
+            VALUES (new.rowid, new.id, {chunk_text_sql("new")});
+        END
+    """,
+}
+
+# A document's body is replaced with INSERT OR REPLACE, never updated in
+# place, so the FTS triggers always know which copy carries the text
+BODY_TRIGGERS = {
+    "documents_body_guard": """
+        CREATE TRIGGER IF NOT EXISTS documents_body_guard
+        BEFORE UPDATE OF body_hash ON documents
+        WHEN old.body_hash IS NOT new.body_hash BEGIN
+            SELECT RAISE(ABORT, 'documents.body_hash cannot be updated; replace the document');
+        END
+    """,
+}
+
+# Tag index triggers: one document_tags row per (document rowid, lowercased tag).
+# The insert trigger clears old rows first because INSERT OR REPLACE does
+# not fire delete triggers on connections without recursive_triggers.
+TAG_TRIGGERS = {
+    "document_tags_ai": """
+        CREATE TRIGGER IF NOT EXISTS document_tags_ai AFTER INSERT ON documents BEGIN
+            DELETE FROM document_tags WHERE document_id = new.rowid;
+            INSERT OR IGNORE INTO document_tags(document_id, tag)
+            SELECT new.rowid, lower(trim(value)) FROM json_each(new.tags)
+            WHERE json_valid(new.tags) AND trim(value) != '';
+        END
+    """,
+    "document_tags_ad": """
+        CREATE TRIGGER IF NOT EXISTS document_tags_ad AFTER DELETE ON documents BEGIN
+            DELETE FROM document_tags WHERE document_id = old.rowid;
+        END
+    """,
+    "document_tags_au": """
+        CREATE TRIGGER IF NOT EXISTS document_tags_au AFTER UPDATE OF tags ON documents BEGIN
+            DELETE FROM document_tags WHERE document_id = old.rowid;
+            INSERT OR IGNORE INTO document_tags(document_id, tag)
+            SELECT new.rowid, lower(trim(value)) FROM json_each(new.tags)
+            WHERE json_valid(new.tags) AND trim(value) != '';
+        END
+    """,
+}
+
+# Counter triggers keeping doc_counters in step with documents and chunks.
+# Each counter is a (dimension, key) pair; a NULL content_type counts under ''.
+_COUNTER_ADD = """
+    INSERT INTO doc_counters(dimension, key, count) VALUES ({dimension}, {key}, {delta})
+    ON CONFLICT(dimension, key) DO UPDATE SET count = count + ({delta});
+"""
+
+
+def _document_counter_sql(row: str, delta: int) -> str:
+    """Counter statements for one documents row (`new` or `old`)."""
+    return "".join(
+        _COUNTER_ADD.format(dimension=f"'{dimension}'", key=key, delta=delta)
+        for dimension, key in (
+            ("total", "''"),
+            ("source", f"{row}.source_type"),
+            ("type", f"COALESCE({row}.content_type, '')"),
+            ("chunked", f"CASE WHEN {row}.is_chunked THEN 'chunked' ELSE 'complete' END"),
+        )
+    )
+
+
+COUNTER_TRIGGERS = {
+    "doc_counters_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS doc_counters_ai AFTER INSERT ON documents BEGIN
+            {_document_counter_sql("new", 1)}
+        END
+    """,
+    "doc_counters_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS doc_counters_ad AFTER DELETE ON documents BEGIN
+            {_document_counter_sql("old", -1)}
+        END
+    """,
+    "doc_counters_au": f"""
+        CREATE TRIGGER IF NOT EXISTS doc_counters_au
+        AFTER UPDATE OF source_type, content_type, is_chunked ON documents BEGIN
+            {_document_counter_sql("old", -1)}
+            {_document_counter_sql("new", 1)}
+        END
+    """,
+    "chunk_counters_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS chunk_counters_ai AFTER INSERT ON chunks BEGIN
+            {_COUNTER_ADD.format(dimension="'chunks'", key="''", delta=1)}
+        END
+    """,
+    "chunk_counters_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS chunk_counters_ad AFTER DELETE ON chunks BEGIN
+            {_COUNTER_ADD.format(dimension="'chunks'", key="''", delta=-1)}
+        END
+    """,
+}
+
+# Recomputes every counter from the base tables (used by recount)
+COUNTER_RECOUNT_SQL = """
+    SELECT 'total' AS dimension, '' AS key, COUNT(*) AS count FROM documents
+    UNION ALL
+    SELECT 'source', source_type, COUNT(*) FROM documents GROUP BY source_type
+    UNION ALL
+    SELECT 'type', COALESCE(content_type, ''), COUNT(*) FROM documents
+    GROUP BY COALESCE(content_type, '')
+    UNION ALL
+    SELECT 'chunked', CASE WHEN is_chunked THEN 'chunked' ELSE 'complete' END, COUNT(*)
+    FROM documents GROUP BY 2
+    UNION ALL
+    SELECT 'chunks', '', COUNT(*) FROM chunks
+"""
+
+# Thread index: each tweet's thread root, its depth below the root and its
+# chronological position in the thread, so a thread is one range scan of
+# idx_tweet_threads_root. Reply chains longer than this are cut off.
+MAX_THREAD_DEPTH = 1000
+
+# Topmost indexed tweet above each tweet in the JSON array parameter. A
+# reply whose parent is not indexed (yet) roots its own thread.
+THREAD_ROOTS_SQL = f"""
+    WITH RECURSIVE up(tweet_id, parent, hops) AS (
+        SELECT tweet_id, reply_to_tweet_id, 0 FROM documents
+        WHERE tweet_id IN (SELECT value FROM json_each(?))
+        UNION
+        SELECT p.tweet_id, p.reply_to_tweet_id, up.hops + 1
+        FROM up JOIN documents p ON p.tweet_id = up.parent
+        WHERE up.hops < {MAX_THREAD_DEPTH}
+    )
+    SELECT DISTINCT tweet_id FROM up
+    WHERE parent IS NULL
+        OR NOT EXISTS (SELECT 1 FROM documents p WHERE p.tweet_id = up.parent)
+"""
+
+# (Re)index whole threads from their roots down; {roots} selects the roots
+THREAD_INDEX_SQL = f"""
+    INSERT OR REPLACE INTO tweet_threads (tweet_id, thread_root_id, depth, position)
+    WITH RECURSIVE thread(tweet_id, root, depth, created_at) AS (
+        SELECT tweet_id, tweet_id, 0, created_at FROM documents
+        WHERE tweet_id IN ({{roots}})
+        UNION
+        SELECT d.tweet_id, thread.root, thread.depth + 1, d.created_at
+        FROM thread JOIN documents d ON d.reply_to_tweet_id = thread.tweet_id
+        WHERE thread.depth < {MAX_THREAD_DEPTH}
+    )
+    SELECT tweet_id, root, depth,
+           ROW_NUMBER() OVER (PARTITION BY root ORDER BY created_at, tweet_id) - 1
+    FROM thread
+"""
+
+THREAD_TRIGGERS = {
+    # Re-imports delete and re-insert documents; the indexer then re-threads them
+    "tweet_threads_ad": """
+        CREATE TRIGGER IF NOT EXISTS tweet_threads_ad AFTER DELETE ON documents
+        WHEN old.tweet_id IS NOT NULL BEGIN
+            DELETE FROM tweet_threads WHERE tweet_id = old.tweet_id;
+        END
+    """,
+}
+
+# Chunks reference their document's rowid, and span chunks the body it
+# references, both looked up from the document key
+CHUNK_INSERT_SQL = """
+    INSERT OR REPLACE INTO chunks (
+        id, document_id, chunk_index, body_hash, start_offset, end_offset,
+        content, content_z, metadata
+    ) VALUES (
+        ?, (SELECT rowid FROM documents WHERE id = ?), ?,
+        (SELECT body_hash FROM documents WHERE id = ?), ?, ?, ?, ?, ?
+    )
+"""
+
+
+# Position of the content column in documents_fts (id, title, author, content, tags)
+FTS_CONTENT_COLUMN = 3
+
+# Groups of documents sharing a body, with the copy whose FTS row carries it
+BODY_GROUPS_SQL = """
+    SELECT d.body_hash, COUNT(*) AS copies, MIN(d.rowid) AS first_rowid, b.size
+    FROM documents d
+    JOIN bodies b ON b.hash = d.body_hash
+    GROUP BY d.body_hash
+"""
+
+
+def _fts_column_sizes(blob: bytes) -> List[int]:
+    """Decode an FTS5 %_docsize blob: one varint token count per column."""
+    sizes = []
+    value = 0
+    for byte in blob:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            sizes.append(value)
+            value = 0
+    return sizes
+
+
+def iter_cursor(
+    cursor: sqlite3.Cursor, batch_size: int = DEFAULT_FETCH_SIZE
+) -> Iterator[sqlite3.Row]:
+    """Yield an executed cursor's rows, fetching `batch_size` at a time."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _tweet_ids(documents: Iterable[Dict[str, Any]]) -> List[str]:
+    """Tweet IDs of the tweets among insert_document keyword dicts."""
+    return [
+        str(document["metadata"]["tweet_id"])
+        for document in documents
+        if document.get("metadata") and document["metadata"].get("tweet_id")
+    ]
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield successive lists of at most `size` items."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
 
 class Database:
     """SQLite database manager for Proof-of-Self."""
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        wal_mode: Optional[bool] = None,
+        busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+        read_pool_size: int = 0,
+        compression: Optional[str] = None,
+        compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD,
+        read_only: bool = False,
+        profile: Union[str, Dict[str, Any], None] = None,
+    ):
         """
         Initialize database connection.
 
         Args:
             db_path: Path to SQLite database file
+            wal_mode: Switch the file to write-ahead logging so readers
+                never block on (or block) a long indexing transaction;
+                False keeps it out of WAL even if the profile asks for it,
+                None leaves the journal mode to the profile
+            busy_timeout_ms: How long to wait on a locked database
+            read_pool_size: Number of read-only connections handed out by
+                reader(); 0 means reads share the writer connection
+            compression: Codec ("zlib" or "lzma") for large bodies; None
+                stores every body as plain text
+            compress_threshold: Minimum body size in bytes to compress
+            read_only: Open an existing, up-to-date database without ever
+                taking a write lock (writes will fail)
+            profile: Performance profile name ("ingest", "serve",
+                "low-memory") or settings dict; None keeps SQLite defaults
         """
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.read_only = read_only
+        if not read_only:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.wal_mode = wal_mode
+        self.busy_timeout_ms = busy_timeout_ms
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        self.read_pool_size = read_pool_size
+        self.profile = resolve_profile(profile)
         self.conn: Optional[sqlite3.Connection] = None
+        self._read_pool: Optional[ReadConnectionPool] = None
         self._connect()
         self._initialize_schema()
 
+        if read_pool_size > 0:
+            self._read_pool = ReadConnectionPool(
+                self.db_path, read_pool_size, busy_timeout_ms, self.profile
+            )
+
     def _connect(self) -> None:
-        """Establish database connection."""
-        self.conn = sqlite3.connect(str(self.db_path))
+        """Establish the writer connection (or a read-only one)."""
+        if self.read_only:
+            self.conn = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                timeout=self.busy_timeout_ms / 1000,
+                check_same_thread=False,
+            )
+        else:
+            self.conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=self.busy_timeout_ms / 1000,
+                check_same_thread=False,  # AsyncDatabase writes from its own worker
+            )
         self.conn.row_factory = sqlite3.Row  # Return rows as dicts
+        # pos_body()/pos_preview() are used by the FTS views and triggers
+        register_functions(self.conn)
+
+        if self.read_only:
+            apply_connection_pragmas(self.conn, self.profile)
+            logger.info(f"Connected to database (read-only): {self.db_path}")
+            return
+
+        # Page size only takes effect on a new file (or at the next VACUUM)
+        if "page_size" in self.profile:
+            self.conn.execute(f"PRAGMA page_size = {self.profile['page_size']}")
         # Enable foreign keys
         self.conn.execute("PRAGMA foreign_keys = ON")
-        logger.info(f"Connected to database: {self.db_path}")
+        # Fire delete triggers for rows removed by INSERT OR REPLACE, so the
+        # FTS, tag and counter triggers see replaced documents as deletes
+        self.conn.execute("PRAGMA recursive_triggers = ON")
+        # Let maintenance release free pages incrementally (only takes
+        # effect on a new file, before the first table or WAL switch)
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        journal_mode = self.profile.get("journal_mode")
+        if self.wal_mode:
+            journal_mode = "wal"
+        elif self.wal_mode is False and journal_mode == "wal":
+            journal_mode = "delete"  # An explicit wal_mode: false outranks the profile
+        if journal_mode:
+            mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+            if mode.lower() != journal_mode:
+                # Switching modes needs an exclusive lock, so only do it once
+                mode = self.conn.execute(f"PRAGMA journal_mode = {journal_mode}").fetchone()[0]
+            if mode.lower() != journal_mode:
+                logger.warning(f"Could not set journal_mode {journal_mode}, it is {mode}")
+            if mode.lower() == "wal":
+                # WAL is durable across crashes with NORMAL; only the last commit may roll back
+                self.conn.execute("PRAGMA synchronous = NORMAL")
+
+        if "synchronous" in self.profile:
+            self.conn.execute(f"PRAGMA synchronous = {self.profile['synchronous']}")
+        apply_connection_pragmas(self.conn, self.profile)
+
+        profile_name = self.profile.get("name", "default")
+        logger.info(f"Connected to database: {self.db_path} (profile: {profile_name})")
+
+    def storage_settings(self) -> Dict[str, Any]:
+        """
+        Get the active profile and the storage settings SQLite reports.
+
+        Returns:
+            Dictionary with "profile" plus journal_mode, synchronous,
+            page_size, cache_size, mmap_size and temp_store
+        """
+        return {"profile": self.profile.get("name", "default"), **read_settings(self.conn)}
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for read-only queries.
+
+        Uses the read pool when one is configured, otherwise the writer
+        connection.
+
+        Yields:
+            sqlite3.Connection with sqlite3.Row rows
+        """
+        if self._read_pool is None:
+            yield self.conn
+        else:
+            with self._read_pool.connection() as conn:
+                yield conn
+
+    def schema_version(self) -> int:
+        """Get the schema version recorded in the database file."""
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def data_version(self) -> Optional[Tuple[int, int]]:
+        """
+        Get a value that changes whenever committed data may have changed.
+
+        PRAGMA data_version on the writer connection moves when another
+        connection (e.g. `index-inbox` in another process) commits; the
+        writer's own commits show up in its total_changes count.
+
+        Returns:
+            (data_version, total_changes), or None while the writer has a
+            transaction open and its changes are not yet settled
+        """
+        if self.conn.in_transaction:
+            return None
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return version, self.conn.total_changes
+
+    def set_progress_handler(self, handler: Callable[[], int], n: int) -> None:
+        """
+        Install a SQLite progress handler on the writer and pooled connections.
+
+        Args:
+            handler: Called every `n` VM instructions; a nonzero return
+                interrupts the running statement
+            n: Instructions between calls
+        """
+        self.conn.set_progress_handler(handler, n)
+        if self._read_pool:
+            self._read_pool.set_progress_handler(handler, n)
+
+    @contextmanager
+    def shard_readers(
+        self,
+        source_type: Optional[str] = None,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+    ) -> Iterator[List[Tuple[sqlite3.Connection, str]]]:
+        """
+        Yield (connection, schema) pairs to run a query against.
+
+        A single file is one shard in the "main" schema; the filters only
+        matter to ShardedDatabase, which skips shards that cannot match.
+
+        Yields:
+            List with one (connection, "main") pair
+        """
+        with self.reader() as conn:
+            yield [(conn, "main")]
 
     def _initialize_schema(self) -> None:
-        """Create database schema if it doesn't exist."""
+        """
+        Bring the schema up to SCHEMA_VERSION.
+
+        An up-to-date file costs one PRAGMA read and no DDL or locks.
+
+        Raises:
+            RuntimeError: If the file was written by a newer version, or is
+                out of date and the database was opened read-only
+        """
+        version = self.schema_version()
+        if version == SCHEMA_VERSION:
+            logger.debug(f"Database schema is current (version {version})")
+            return
+
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Database schema version {version} is newer than this release "
+                f"supports ({SCHEMA_VERSION}); upgrade proof-of-self"
+            )
+        if self.read_only:
+            raise RuntimeError(
+                f"Database schema version {version} is out of date (expected "
+                f"{SCHEMA_VERSION}); open it once read-write to migrate"
+            )
+
+        self._migrate()
+
+    def _migrations(self) -> List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]]:
+        """
+        Ordered forward migrations as (version, description, function).
+
+        Files created before versioning (user_version 0) start from
+        migration 1, which detects and upgrades every earlier layout.
+        """
+        return [
+            (1, "documents, chunks, FTS, tag index and counters", self._migration_base_schema),
+            (2, "indexed_at indexes for recent-document listings", self._migration_indexed_at),
+            (3, "content-addressed bodies, indexed once each", self._migration_bodies),
+            (4, "chunks stored as spans of their document's body", self._migration_chunk_spans),
+            (5, "integer document keys with 16-byte external ids", self._migration_document_keys),
+            (6, "thread index over tweets", self._migration_thread_index),
+            (7, "engagement index ordered by date", self._migration_engagement_index),
+        ]
+
+    def _migrate(self) -> None:
+        """Apply every pending migration in a single write transaction."""
         cursor = self.conn.cursor()
+        # Migrations may rebuild tables, which SQLite only allows with
+        # foreign keys off; they are checked before the commit instead
+        cursor.execute("PRAGMA foreign_keys = OFF")
+        # Take the write lock up front, then re-read the version in case
+        # another process migrated the file while we waited for it
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            version = self.schema_version()
+            for number, description, migration in self._migrations():
+                if number > version:
+                    migration(cursor)
+                    logger.info(f"Applied schema migration {number}: {description}")
+            violations = cursor.execute("PRAGMA foreign_key_check").fetchall()
+            if violations:
+                raise RuntimeError(
+                    f"Schema migration left {len(violations)} foreign key violations"
+                )
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.execute("PRAGMA foreign_keys = ON")
 
+        logger.info(f"Database schema migrated from version {version} to {SCHEMA_VERSION}")
+
+    def _migration_base_schema(self, cursor: sqlite3.Cursor) -> None:
+        """Migration 1: create (or upgrade in place) the universal schema."""
         # UNIVERSAL TABLES ONLY - No Twitter-specific tables!
 
         # Documents table (universal storage for all content)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS documents (
-                id TEXT PRIMARY KEY,
-                source_type TEXT NOT NULL,
-                content_type TEXT,
-                title TEXT,
-                author TEXT,
-                content TEXT,
-                source_path TEXT,
-                is_chunked BOOLEAN DEFAULT 0,
-                metadata TEXT,
-                tags TEXT,
-                created_at TIMESTAMP,
-                indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        cursor.execute(_documents_table_sql("documents"))
+
+        # Generated columns for hot metadata keys (added in place on older files)
+        self._add_metadata_columns(cursor)
+
+        # Content-addressed bodies (older files have theirs moved in place)
+        self._create_bodies(cursor)
 
         # Chunks table (for large documents like books, long PDFs)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS chunks (
-                id TEXT PRIMARY KEY,
-                document_id TEXT NOT NULL,
-                chunk_index INTEGER NOT NULL,
-                content TEXT NOT NULL,
-                metadata TEXT,
-                FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE,
-                UNIQUE(document_id, chunk_index)
+        cursor.execute(_chunks_table_sql("chunks"))
+
+        # Chunk spans over bodies (added in place on older files)
+        self._add_chunk_span_columns(cursor)
+
+        # FTS for documents and chunks, reading text through the body views
+        self._create_fts(cursor)
+
+        # Normalized tag index (replaces LIKE scans over documents.tags)
+        self._create_tag_index(cursor)
+
+        # Maintained counters so get_stats never scans
+        self._create_counters(cursor)
+
+        # Indexes for common queries (documents and chunks only)
+        self._add_indexes(cursor, [
+            "CREATE INDEX IF NOT EXISTS idx_documents_created ON documents(created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_documents_source_type ON documents(source_type)",
+            "CREATE INDEX IF NOT EXISTS idx_documents_content_type ON documents(content_type)",
+            "CREATE INDEX IF NOT EXISTS idx_documents_is_chunked ON documents(is_chunked)",
+            "CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks(document_id)",
+            "CREATE INDEX IF NOT EXISTS idx_chunks_chunk_index ON chunks(document_id, chunk_index)",
+            *METADATA_INDEXES,
+        ])
+
+    def _migration_indexed_at(self, cursor: sqlite3.Cursor) -> None:
+        """Migration 2: index indexed_at for list_recent_documents."""
+        self._add_indexes(cursor, [
+            "CREATE INDEX IF NOT EXISTS idx_documents_indexed ON documents(indexed_at)",
+            "CREATE INDEX IF NOT EXISTS idx_documents_type_indexed "
+            "ON documents(content_type, indexed_at)",
+        ])
+
+    def _migration_bodies(self, cursor: sqlite3.Cursor) -> None:
+        """Migration 3: move bodies into `bodies` and re-index each one once."""
+        self._create_bodies(cursor)
+
+        cursor.execute("DROP VIEW IF EXISTS documents_body")
+        cursor.execute(FTS_CONTENT_VIEWS["documents_body"])
+        self._create_fts_triggers(cursor)
+        cursor.execute("INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')")
+
+    def _migration_chunk_spans(self, cursor: sqlite3.Cursor) -> None:
+        """Migration 4: turn stored chunk text into spans of the parent body."""
+        for name in CHUNK_FTS_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        self._add_chunk_span_columns(cursor)
+        self._convert_chunks_to_spans(cursor)
+
+        cursor.execute("DROP VIEW IF EXISTS chunks_body")
+        cursor.execute(FTS_CONTENT_VIEWS["chunks_body"])
+        self._create_fts_triggers(cursor)
+        cursor.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('rebuild')")
+
+    def _migration_document_keys(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Migration 5: rebuild documents and chunks around integer rowids.
+
+        Files keyed by the 64-character id text get the same rows under
+        their existing rowids, so both FTS indexes stay valid; chunks and
+        tags switch to referencing the document rowid.
+        """
+        cursor.execute("PRAGMA table_info(documents)")
+        if "doc_rowid" in {row["name"] for row in cursor.fetchall()}:
+            return  # Created with integer keys by migration 1
+
+        cursor.connection.create_function(
+            "pos_document_key", 1, document_key, deterministic=True
+        )
+        indexes = [
+            row["sql"]
+            for row in cursor.execute(
+                """
+                SELECT sql FROM sqlite_master
+                WHERE type = 'index' AND tbl_name IN ('documents', 'chunks')
+                    AND sql IS NOT NULL
+                """
+            ).fetchall()
+        ]
+
+        # Views and triggers name the tables being replaced
+        for name in FTS_CONTENT_VIEWS:
+            cursor.execute(f"DROP VIEW IF EXISTS {name}")
+        for triggers in (FTS_TRIGGERS, TAG_TRIGGERS, COUNTER_TRIGGERS, BODY_TRIGGERS):
+            for name in triggers:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+        copied_columns = (
+            "source_type, content_type, title, author, content, content_z, body_hash, "
+            "source_path, is_chunked, metadata, tags, created_at, indexed_at"
+        )
+        cursor.execute(_documents_table_sql("documents_keyed"))
+        cursor.execute(
+            f"""
+            INSERT INTO documents_keyed (doc_rowid, id, {copied_columns})
+            SELECT rowid, pos_document_key(id), {copied_columns} FROM documents
+            """
+        )
+        cursor.execute(_chunks_table_sql("chunks_keyed"))
+        cursor.execute(
+            """
+            INSERT INTO chunks_keyed (
+                chunk_rowid, id, document_id, chunk_index, content, content_z,
+                body_hash, start_offset, end_offset, metadata
             )
-        """)
+            SELECT c.rowid, c.id, d.rowid, c.chunk_index, c.content, c.content_z,
+                   c.body_hash, c.start_offset, c.end_offset, c.metadata
+            FROM chunks c JOIN documents d ON d.id = c.document_id
+            """
+        )
+        cursor.execute("DROP TABLE chunks")
+        cursor.execute("DROP TABLE documents")
+        cursor.execute("DROP TABLE IF EXISTS document_tags")
+        cursor.execute("ALTER TABLE documents_keyed RENAME TO documents")
+        cursor.execute("ALTER TABLE chunks_keyed RENAME TO chunks")
+
+        self._add_indexes(cursor, indexes)
+        for view_sql in FTS_CONTENT_VIEWS.values():
+            cursor.execute(view_sql)
+        self._create_fts_triggers(cursor)
+        for trigger_sql in BODY_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+        for trigger_sql in COUNTER_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+        self._create_tag_index(cursor)
 
-        # FTS for documents
+    def _migration_thread_index(self, cursor: sqlite3.Cursor) -> None:
+        """Migration 6: create tweet_threads and index every existing thread."""
         cursor.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
-                id UNINDEXED,
-                title,
-                author,
-                content,
-                tags,
-                content=documents,
-                content_rowid=rowid,
-                tokenize='porter unicode61'
-            )
+            CREATE TABLE IF NOT EXISTS tweet_threads (
+                tweet_id TEXT PRIMARY KEY,
+                thread_root_id TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                position INTEGER NOT NULL
+            ) WITHOUT ROWID
         """)
+        self._add_indexes(cursor, [
+            "CREATE INDEX IF NOT EXISTS idx_tweet_threads_root "
+            "ON tweet_threads(thread_root_id, position)",
+        ])
+        for trigger_sql in THREAD_TRIGGERS.values():
+            cursor.execute(trigger_sql)
 
-        # FTS for chunks
-        cursor.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
-                id UNINDEXED,
-                content,
-                content=chunks,
-                content_rowid=rowid,
-                tokenize='porter unicode61'
+        cursor.execute(THREAD_INDEX_SQL.format(roots="""
+            SELECT tweet_id FROM documents d
+            WHERE tweet_id IS NOT NULL AND (
+                reply_to_tweet_id IS NULL
+                OR NOT EXISTS (SELECT 1 FROM documents p WHERE p.tweet_id = d.reply_to_tweet_id)
             )
-        """)
+        """))
+        if cursor.rowcount > 0:
+            logger.info(f"Indexed {cursor.rowcount} tweets into threads")
 
-        # Triggers for documents FTS
-        cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
-                INSERT INTO documents_fts(rowid, id, title, author, content, tags)
-                VALUES (new.rowid, new.id, new.title, new.author, new.content, new.tags);
-            END
-        """)
+    def _migration_engagement_index(self, cursor: sqlite3.Cursor) -> None:
+        """Migration 7: add created_at to idx_documents_engagement."""
+        cursor.execute("DROP INDEX IF EXISTS idx_documents_engagement")
+        self._add_indexes(cursor, [ENGAGEMENT_INDEX_SQL])
+
+    @staticmethod
+    def _add_chunk_span_columns(cursor: sqlite3.Cursor) -> None:
+        """Add the span columns (and content_z) to chunks where missing."""
+        cursor.execute("PRAGMA table_info(chunks)")
+        existing = {row["name"] for row in cursor.fetchall()}
+        for name, sql_type in (
+            ("content_z", "BLOB"),
+            ("body_hash", "BLOB"),
+            ("start_offset", "INTEGER"),
+            ("end_offset", "INTEGER"),
+        ):
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE chunks ADD COLUMN {name} {sql_type}")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chunks_body_hash ON chunks(body_hash)"
+        )
+
+    @staticmethod
+    def _convert_chunks_to_spans(cursor: sqlite3.Cursor) -> None:
+        """
+        Replace stored chunk text with offsets into the document's body.
+
+        Chunks whose text does not appear verbatim in the body (older
+        chunkers re-joined paragraphs) keep their stored text.
+        """
+        document_ids = [
+            row[0]
+            for row in cursor.execute(
+                "SELECT DISTINCT document_id FROM chunks WHERE start_offset IS NULL"
+            ).fetchall()
+        ]
+
+        converted = kept = 0
+        for document_id in document_ids:
+            body = cursor.execute(
+                """
+                SELECT b.hash, pos_body(b.content, b.content_z) AS text
+                FROM documents d JOIN bodies b ON b.hash = d.body_hash
+                WHERE d.id = ?
+                """,
+                (document_id,),
+            ).fetchone()
+            chunks = cursor.execute(
+                """
+                SELECT rowid, pos_body(content, content_z) AS text FROM chunks
+                WHERE document_id = ? AND start_offset IS NULL
+                ORDER BY chunk_index
+                """,
+                (document_id,),
+            ).fetchall()
+
+            spans = []
+            position = 0
+            for chunk in chunks:
+                start = body["text"].find(chunk["text"], position) if body else -1
+                if start < 0 and body:
+                    start = body["text"].find(chunk["text"])
+                if start < 0:
+                    kept += 1
+                    continue
+                spans.append((body["hash"], start, start + len(chunk["text"]), chunk["rowid"]))
+                position = start + 1
 
+            cursor.executemany(
+                """
+                UPDATE chunks
+                SET body_hash = ?, start_offset = ?, end_offset = ?, content = '', content_z = NULL
+                WHERE rowid = ?
+                """,
+                spans,
+            )
+            converted += len(spans)
+
+        if converted or kept:
+            logger.info(
+                f"Converted {converted} chunks to spans ({kept} kept their stored text)"
+            )
+
+    @staticmethod
+    def _add_indexes(cursor: sqlite3.Cursor, statements: List[str]) -> None:
+        """
+        Add indexes as part of a migration.
+
+        CREATE INDEX builds the new B-tree from one scan of the table; rows
+        are neither copied nor rewritten, and in WAL mode readers keep
+        running while it builds.
+        """
+        for index_sql in statements:
+            cursor.execute(index_sql)
+
+    def _add_metadata_columns(self, cursor: sqlite3.Cursor) -> None:
+        """Add any missing generated metadata columns to documents."""
+        cursor.execute("PRAGMA table_xinfo(documents)")
+        existing = {row["name"] for row in cursor.fetchall()}
+
+        for name, sql_type in METADATA_COLUMNS.items():
+            if name not in existing:
+                # Virtual columns are computed on read, so this is a schema-only change
+                cursor.execute(
+                    f"ALTER TABLE documents ADD COLUMN {_metadata_column_sql(name, sql_type)}"
+                )
+                logger.info(f"Added generated column documents.{name}")
+
+    def _create_bodies(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Create the bodies table and move any inline document bodies into it.
+
+        Drops the document FTS triggers while bodies move, so the caller
+        must recreate them and rebuild documents_fts.
+        """
         cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
-                DELETE FROM documents_fts WHERE rowid = old.rowid;
-            END
+            CREATE TABLE IF NOT EXISTS bodies (
+                hash BLOB PRIMARY KEY,
+                content TEXT,
+                content_z BLOB,
+                size INTEGER NOT NULL
+            )
         """)
 
+        cursor.execute("PRAGMA table_info(documents)")
+        existing = {row["name"] for row in cursor.fetchall()}
+        for name in ("content_z", "body_hash"):
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE documents ADD COLUMN {name} BLOB")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_body_hash ON documents(body_hash)"
+        )
+
+        for name in DOCUMENT_FTS_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+        # The first copy of each body is kept as stored (compressed or not)
         cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
-                UPDATE documents_fts
-                SET title = new.title, author = new.author, content = new.content, tags = new.tags
-                WHERE rowid = old.rowid;
-            END
+            INSERT OR IGNORE INTO bodies (hash, content, content_z, size)
+            SELECT pos_hash(content, content_z), content, content_z,
+                   length(CAST(pos_body(content, content_z) AS BLOB))
+            FROM documents
+            WHERE content IS NOT NULL OR content_z IS NOT NULL
+            ORDER BY rowid
         """)
-
-        # Triggers for chunks FTS
         cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
-                INSERT INTO chunks_fts(rowid, id, content)
-                VALUES (new.rowid, new.id, new.content);
-            END
+            UPDATE documents
+            SET body_hash = pos_hash(content, content_z), content = NULL, content_z = NULL
+            WHERE content IS NOT NULL OR content_z IS NOT NULL
         """)
+        if cursor.rowcount > 0:
+            logger.info(f"Moved {cursor.rowcount} document bodies into the bodies table")
+
+        for trigger_sql in BODY_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+
+    def _create_tag_index(self, cursor: sqlite3.Cursor) -> None:
+        """Create document_tags and its triggers, backfilling on first creation."""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'document_tags'"
+        )
+        is_new = cursor.fetchone() is None
 
         cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
-                DELETE FROM chunks_fts WHERE rowid = old.rowid;
-            END
+            CREATE TABLE IF NOT EXISTS document_tags (
+                document_id INTEGER NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (document_id, tag)
+            ) WITHOUT ROWID
         """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_document_tags_tag ON document_tags(tag, document_id)"
+        )
+        for trigger_sql in TAG_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+
+        if is_new:
+            cursor.execute("""
+                INSERT OR IGNORE INTO document_tags(document_id, tag)
+                SELECT d.rowid, lower(trim(j.value))
+                FROM documents d, json_each(d.tags) j
+                WHERE d.tags IS NOT NULL AND json_valid(d.tags) AND trim(j.value) != ''
+            """)
+            if cursor.rowcount > 0:
+                logger.info(f"Backfilled {cursor.rowcount} document tags")
+
+    def _create_counters(self, cursor: sqlite3.Cursor) -> None:
+        """Create doc_counters and its triggers, populating on first creation."""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'doc_counters'"
+        )
+        is_new = cursor.fetchone() is None
 
         cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
-                UPDATE chunks_fts SET content = new.content WHERE rowid = old.rowid;
-            END
+            CREATE TABLE IF NOT EXISTS doc_counters (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dimension, key)
+            ) WITHOUT ROWID
         """)
+        for trigger_sql in COUNTER_TRIGGERS.values():
+            cursor.execute(trigger_sql)
 
-        # Indexes for common queries (documents and chunks only)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_created ON documents(created_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_source_type ON documents(source_type)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_content_type ON documents(content_type)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_is_chunked ON documents(is_chunked)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks(document_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chunks_chunk_index ON chunks(document_id, chunk_index)")
+        if is_new:
+            cursor.execute(f"INSERT INTO doc_counters(dimension, key, count) {COUNTER_RECOUNT_SQL}")
+
+    def _create_fts(self, cursor: sqlite3.Cursor) -> None:
+        """Create the FTS tables, body views and sync triggers."""
+        # Compressed body columns (added in place on older files)
+        for table in ("documents", "chunks"):
+            cursor.execute(f"PRAGMA table_info({table})")
+            if "content_z" not in {row["name"] for row in cursor.fetchall()}:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN content_z BLOB")
+
+        for view_sql in FTS_CONTENT_VIEWS.values():
+            cursor.execute(view_sql)
 
+        # Older files index the base tables directly, which cannot see
+        # compressed bodies; re-point them at the views and rebuild once
+        cursor.execute(
+            """
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name IN ('documents_fts', 'chunks_fts')
+                AND instr(sql, '_body') = 0
+            """
+        )
+        legacy_tables = [row["name"] for row in cursor.fetchall()]
+
+        # Older triggers either index `content` directly or use plain
+        # DELETE/UPDATE on the FTS tables, which leaves stale postings
+        cursor.execute(
+            f"""
+            SELECT name FROM sqlite_master
+            WHERE type = 'trigger' AND name IN ({", ".join("?" for _ in FTS_TRIGGERS)})
+                AND instr(sql, 'pos_body') = 0
+            """,
+            list(FTS_TRIGGERS),
+        )
+        legacy_triggers = [row["name"] for row in cursor.fetchall()]
+
+        for name in legacy_triggers:
+            cursor.execute(f"DROP TRIGGER {name}")
+        for name in legacy_tables:
+            cursor.execute(f"DROP TABLE {name}")
+
+        for table_sql in FTS_TABLE_SQL.values():
+            cursor.execute(table_sql)
+        self._create_fts_triggers(cursor)
+
+        if legacy_tables or legacy_triggers:
+            for table in FTS_TABLES:
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+            logger.info("Upgraded FTS tables and triggers, search indexes rebuilt")
+
+    def _create_fts_triggers(self, cursor: sqlite3.Cursor) -> None:
+        """Create the FTS sync triggers (no-op for triggers that exist)."""
+        for trigger_sql in FTS_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+
+    @contextmanager
+    def bulk_load(self) -> Iterator[Dict[str, float]]:
+        """
+        Load base tables with FTS maintenance deferred.
+
+        Drops the FTS sync triggers for the duration of the block, then
+        rebuilds and optimizes both FTS indexes in one pass. The triggers
+        are restored even if the load raises. Rows committed before a
+        failure are still indexed by the rebuild.
+
+        Usage:
+            with db.bulk_load() as timings:
+                db.insert_documents_many(records)
+            print(timings)
+
+        Yields:
+            Dict filled with load/rebuild/optimize timings (seconds) on exit
+        """
+        timings: Dict[str, float] = {}
+
+        self.conn.commit()
+        for name in FTS_TRIGGERS:
+            self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        self.conn.commit()
+        logger.info("FTS triggers suspended for bulk load")
+
+        start = time.perf_counter()
+        try:
+            yield timings
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self.conn.commit()
+            timings["load_seconds"] = time.perf_counter() - start
+            self._finish_bulk_load(timings)
+
+    def _finish_bulk_load(self, timings: Dict[str, float]) -> None:
+        """
+        Rebuild the FTS indexes from the base tables and restore triggers.
+
+        Args:
+            timings: Dict to record rebuild/optimize timings in
+        """
+        start = time.perf_counter()
+        try:
+            # Rebuild and restore triggers in one write transaction so no
+            # other writer can slip a row in between the two
+            self.conn.execute("BEGIN IMMEDIATE")
+            for table in FTS_TABLES:
+                self.conn.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+            timings["rebuild_seconds"] = time.perf_counter() - start
+        finally:
+            self._create_fts_triggers(self.conn.cursor())
+            self.conn.commit()
+            logger.info("FTS triggers restored")
+
+        start = time.perf_counter()
+        for table in FTS_TABLES:
+            self.conn.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
         self.conn.commit()
-        logger.info("Database schema initialized")
+        timings["optimize_seconds"] = time.perf_counter() - start
+
+        logger.info(
+            "Bulk load finished: "
+            + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+        )
 
     def insert_document(
         self,
@@ -168,111 +1290,659 @@ class Database:
         created_at: Optional[datetime] = None,
     ) -> None:
         """Insert a document into the database."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT OR REPLACE INTO documents (
-                id, source_type, content_type, title, author, content,
-                source_path, is_chunked, metadata, tags, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                doc_id,
-                source_type,
-                content_type,
-                title,
-                author,
-                content,
-                source_path,
-                is_chunked,
-                json.dumps(metadata) if metadata else None,
-                json.dumps(tags) if tags else None,
-                created_at or datetime.now(),
-            ),
+        document, body = self._document_params(
+            doc_id=doc_id,
+            source_type=source_type,
+            content=content,
+            content_type=content_type,
+            title=title,
+            author=author,
+            is_chunked=is_chunked,
+            metadata=metadata,
+            tags=tags,
+            source_path=source_path,
+            created_at=created_at,
         )
+        cursor = self.conn.cursor()
+        if body:
+            cursor.execute(BODY_INSERT_SQL, body)
+        cursor.execute(DOCUMENT_INSERT_SQL, document)
+        self._index_threads(_tweet_ids([{"metadata": metadata}]))
         self.conn.commit()
 
+    def insert_documents_many(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[int]:
+        """
+        Insert many documents, committing once per batch.
+
+        Each distinct body is stored once; documents repeating a body that
+        is already stored only reference it. Tweets (documents with a
+        metadata tweet_id) are added to the thread index in the same
+        transaction.
+
+        Args:
+            documents: Iterable of dicts using the keyword names of insert_document
+            batch_size: Number of rows written per transaction
+
+        Returns:
+            Number of rows written by each batch, in order
+        """
+        batch_counts = []
+        for batch in _batched(documents, batch_size):
+            params = [self._document_params(**document) for document in batch]
+            with self.conn:
+                self.conn.executemany(BODY_INSERT_SQL, [body for _, body in params if body])
+                cursor = self.conn.executemany(
+                    DOCUMENT_INSERT_SQL, [document for document, _ in params]
+                )
+                written = cursor.rowcount
+                self._index_threads(_tweet_ids(batch))
+            batch_counts.append(written)
+            logger.debug(f"Wrote batch of {written} documents")
+        return batch_counts
+
+    def _document_params(
+        self,
+        doc_id: str,
+        source_type: str,
+        content: Optional[str],
+        content_type: Optional[str] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        is_chunked: bool = False,
+        metadata: Optional[Dict[str, Any]] = None,
+        tags: Optional[List[str]] = None,
+        source_path: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+    ) -> Tuple[Tuple[Any, ...], Optional[Tuple[Any, ...]]]:
+        """
+        Build the parameter tuples for DOCUMENT_INSERT_SQL and BODY_INSERT_SQL.
+
+        Returns:
+            (document parameters, body parameters or None without a body)
+        """
+        body = self._body_params(content)
+        document = (
+            document_key(doc_id),
+            source_type,
+            content_type,
+            title,
+            author,
+            body[0] if body else None,
+            source_path,
+            is_chunked,
+            json.dumps(metadata) if metadata else None,
+            json.dumps(tags) if tags else None,
+            created_at or datetime.now(),
+        )
+        return document, body
+
+    def _body_params(self, content: Optional[str]) -> Optional[Tuple[Any, ...]]:
+        """Build the parameter tuple for BODY_INSERT_SQL (None without a body)."""
+        if content is None:
+            return None
+        text, content_z = self._pack_body(content)
+        return (body_hash(content), text, content_z, len(content.encode("utf-8")))
+
     def insert_chunk(
         self,
         chunk_id: str,
         document_id: str,
         chunk_index: int,
-        content: str,
+        content: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        start_offset: Optional[int] = None,
+        end_offset: Optional[int] = None,
     ) -> None:
-        """Insert a chunk for a large document."""
+        """
+        Insert a chunk for a large document.
+
+        A chunk is normally a span of its document's body: pass start_offset
+        and end_offset (character offsets, as produced by DocumentChunker)
+        and no text is stored. Chunks given only `content` store it inline.
+
+        Raises:
+            ValueError: If neither content nor both offsets are given
+        """
         cursor = self.conn.cursor()
         cursor.execute(
-            """
-            INSERT OR REPLACE INTO chunks (
-                id, document_id, chunk_index, content, metadata
-            ) VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                chunk_id,
-                document_id,
-                chunk_index,
-                content,
-                json.dumps(metadata) if metadata else None,
+            CHUNK_INSERT_SQL,
+            self._chunk_params(
+                chunk_id=chunk_id,
+                document_id=document_id,
+                chunk_index=chunk_index,
+                content=content,
+                metadata=metadata,
+                start_offset=start_offset,
+                end_offset=end_offset,
             ),
         )
         self.conn.commit()
 
+    def insert_chunks_many(
+        self,
+        chunks: Iterable[Dict[str, Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[int]:
+        """
+        Insert many chunks, committing once per batch.
+
+        Args:
+            chunks: Iterable of dicts using the keyword names of insert_chunk
+            batch_size: Number of rows written per transaction
+
+        Returns:
+            Number of rows written by each batch, in order
+        """
+        batch_counts = []
+        for batch in _batched(chunks, batch_size):
+            params = [self._chunk_params(**chunk) for chunk in batch]
+            with self.conn:
+                cursor = self.conn.executemany(CHUNK_INSERT_SQL, params)
+            batch_counts.append(cursor.rowcount)
+            logger.debug(f"Wrote batch of {cursor.rowcount} chunks")
+        return batch_counts
+
+    def _chunk_params(
+        self,
+        chunk_id: str,
+        document_id: str,
+        chunk_index: int,
+        content: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        start_offset: Optional[int] = None,
+        end_offset: Optional[int] = None,
+    ) -> Tuple[Any, ...]:
+        """Build the parameter tuple for CHUNK_INSERT_SQL."""
+        if start_offset is not None and end_offset is not None:
+            content, content_z = "", None  # The text lives in the document's body
+        elif content is not None:
+            content, content_z = self._pack_body(content)
+        else:
+            raise ValueError(f"Chunk {chunk_id} needs content or start_offset/end_offset")
+
+        key = document_key(document_id)
+        return (
+            chunk_id,
+            key,
+            chunk_index,
+            key,
+            start_offset,
+            end_offset,
+            content if content_z is None else "",  # chunks.content is NOT NULL
+            content_z,
+            json.dumps(metadata) if metadata else None,
+        )
+
+    def _pack_body(self, content: Optional[str]) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        Split a body into (content, content_z) for storage.
+
+        Returns:
+            (text, None) for bodies stored as-is, (None, blob) when compressed
+        """
+        if (
+            self.compression
+            and content
+            and len(content) >= self.compress_threshold // 4  # Cheap pre-check
+            and len(content.encode("utf-8")) >= self.compress_threshold
+        ):
+            return None, compress(content, self.compression)
+        return content, None
+
     def get_chunks(self, document_id: str) -> List[Dict[str, Any]]:
-        """Get all chunks for a document in order."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT id, document_id, chunk_index, content, metadata
-            FROM chunks
-            WHERE document_id = ?
-            ORDER BY chunk_index
+        """
+        Get all chunks for a document in order.
+
+        Returns:
+            Chunk dictionaries with id, document_id, chunk_index, content,
+            start_offset, end_offset (None for inline chunks) and metadata
+        """
+        return [dict(row) for row in self.iter_chunks(document_id)]
+
+    def iter_chunks(
+        self, document_id: str, batch_size: int = DEFAULT_FETCH_SIZE
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Stream a document's chunks in order.
+
+        Span chunks are sliced from the document's body, which is read and
+        decompressed once per connection rather than once per chunk.
+
+        Args:
+            document_id: External document ID
+            batch_size: Rows fetched per round trip
+
+        Yields:
+            sqlite3.Row with the keys get_chunks returns
+        """
+        yield from self.iter_rows(
+            f"""
+            SELECT c.id, lower(hex(d.id)) AS document_id, c.chunk_index,
+                   c.start_offset, c.end_offset, c.metadata,
+                   {chunk_text_sql("c")} AS content
+            FROM documents d
+            JOIN chunks c ON c.document_id = d.rowid
+            WHERE d.id = ?
+            ORDER BY c.chunk_index
             """,
-            (document_id,),
+            (document_key(document_id),),
+            batch_size,
+        )
+
+    def iter_documents(
+        self,
+        source_type: Optional[str] = None,
+        content_type: Optional[str] = None,
+        batch_size: int = DEFAULT_FETCH_SIZE,
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Stream every document with its full body, in insertion order.
+
+        Memory use is bounded by `batch_size` however large the corpus is,
+        so exporters and migrations can walk all of it.
+
+        Args:
+            source_type: Only documents from this source
+            content_type: Only documents of this content type
+            batch_size: Rows fetched per round trip
+
+        Yields:
+            sqlite3.Row with id, source_type, content_type, title, author,
+            content, source_path, is_chunked, metadata (JSON), tags (JSON),
+            created_at and indexed_at
+        """
+        where_clauses = []
+        params: List[Any] = []
+        if source_type:
+            where_clauses.append("d.source_type = ?")
+            params.append(source_type)
+        if content_type:
+            where_clauses.append("d.content_type = ?")
+            params.append(content_type)
+
+        yield from self.iter_rows(
+            f"""
+            SELECT lower(hex(d.id)) AS id, d.source_type, d.content_type, d.title, d.author,
+                   pos_body(b.content, b.content_z) AS content, d.source_path,
+                   d.is_chunked, d.metadata, d.tags, d.created_at, d.indexed_at
+            FROM documents d
+            LEFT JOIN bodies b ON b.hash = d.body_hash
+            WHERE {" AND ".join(where_clauses) or "1=1"}
+            ORDER BY d.rowid
+            """,
+            params,
+            batch_size,
+        )
+
+    def iter_rows(
+        self,
+        sql: str,
+        params: Iterable[Any] = (),
+        batch_size: int = DEFAULT_FETCH_SIZE,
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Stream the rows of a read query.
+
+        The connection from reader() is held until the generator is
+        exhausted or closed, so close it (or use contextlib.closing) when
+        stopping early.
+
+        Args:
+            sql: SELECT statement
+            params: Query parameters
+            batch_size: Rows fetched per round trip
+
+        Yields:
+            sqlite3.Row objects (index by position or column name)
+        """
+        with self.reader() as conn:
+            yield from iter_cursor(conn.execute(sql, list(params)), batch_size)
+
+    def has_document(self, doc_id: str) -> bool:
+        """Check whether a document with this external ID is stored."""
+        row = self.conn.execute(
+            "SELECT 1 FROM documents WHERE id = ?", (document_key(doc_id),)
+        ).fetchone()
+        return row is not None
+
+    def insert_thought(
+        self,
+        content: str,
+        tags: Optional[List[str]] = None,
+        category: Optional[str] = None,
+    ) -> str:
+        """
+        Save a thought/note as a user document.
+
+        Args:
+            content: Thought content
+            tags: Optional tags
+            category: Optional category (stored in metadata)
+
+        Returns:
+            Document ID of the saved thought
+        """
+        created_at = datetime.now()
+        source_path = f"thought://{uuid.uuid4().hex}"
+        doc_id = generate_document_id(
+            content=content,
+            source_path=source_path,
+            created_at=created_at.isoformat(),
+        )
+
+        self.insert_document(
+            doc_id=doc_id,
+            source_type="user",
+            content_type="note",
+            content=content,
+            metadata={"category": category} if category else None,
+            tags=tags,
+            source_path=source_path,
+            created_at=created_at,
+        )
+        return doc_id
+
+    @staticmethod
+    def tag_filter(
+        tags: List[str],
+        match_all: bool = False,
+        id_column: str = "d.rowid",
+        schema: str = "main",
+    ) -> Tuple[str, List[str]]:
+        """
+        Build a WHERE fragment restricting documents by tag.
+
+        Args:
+            tags: Tags to filter on (case-insensitive)
+            match_all: Require every tag (AND) instead of any tag (OR)
+            id_column: Document rowid column the fragment constrains
+            schema: Schema holding the documents' tag index
+
+        Returns:
+            Tuple of (SQL fragment, parameters)
+        """
+        normalized = sorted({tag.strip().lower() for tag in tags if tag.strip()})
+        if not normalized:
+            return "1=1", []
+
+        placeholders = ", ".join("?" for _ in normalized)
+        if match_all and len(normalized) > 1:
+            sql = f"""{id_column} IN (
+                SELECT document_id FROM {schema}.document_tags
+                WHERE tag IN ({placeholders})
+                GROUP BY document_id
+                HAVING COUNT(*) = {len(normalized)}
+            )"""
+        else:
+            sql = f"""{id_column} IN (
+                SELECT document_id FROM {schema}.document_tags WHERE tag IN ({placeholders})
+            )"""
+        return sql, normalized
+
+    def tag_counts(
+        self,
+        source_type: Optional[str] = None,
+        content_type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Count documents per tag, most used first.
+
+        Args:
+            source_type: Only count documents from this source
+            content_type: Only count documents of this content type
+            limit: Maximum number of tags to return
+
+        Returns:
+            Mapping of tag to document count
+        """
+        sql, params = self.tag_counts_sql(source_type, content_type)
+        sql += " ORDER BY count DESC, tag"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.reader() as conn:
+            return {row["tag"]: row["count"] for row in conn.execute(sql, params)}
+
+    @staticmethod
+    def tag_counts_sql(
+        source_type: Optional[str] = None,
+        content_type: Optional[str] = None,
+        schema: str = "main",
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the query counting documents per tag (unordered, unlimited).
+
+        Args:
+            source_type: Only count documents from this source
+            content_type: Only count documents of this content type
+            schema: Schema holding the documents and their tag index
+
+        Returns:
+            Tuple of (SQL selecting tag and count, parameters)
+        """
+        where_clauses = []
+        params: List[Any] = []
+
+        if source_type:
+            where_clauses.append("d.source_type = ?")
+            params.append(source_type)
+        if content_type:
+            where_clauses.append("d.content_type = ?")
+            params.append(content_type)
+
+        if where_clauses:
+            sql = f"""
+                SELECT t.tag, COUNT(*) AS count
+                FROM {schema}.document_tags t
+                JOIN {schema}.documents d ON d.rowid = t.document_id
+                WHERE {" AND ".join(where_clauses)}
+                GROUP BY t.tag
+            """
+        else:
+            # Covered by idx_document_tags_tag, no documents lookup needed
+            sql = f"SELECT tag, COUNT(*) AS count FROM {schema}.document_tags GROUP BY tag"
+        return sql, params
+
+    def duplication_report(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Measure how much of the corpus repeats a body stored elsewhere.
+
+        Args:
+            top: Number of most costly duplicated bodies to list
+
+        Returns:
+            Dictionary with document/body counts, body bytes with and without
+            sharing, FTS body postings indexed and saved, and `top` entries
+            (title, source_path, copies, bytes_saved)
+        """
+        with self.reader() as conn:
+            totals = conn.execute(
+                f"""
+                SELECT
+                    COUNT(*) AS unique_bodies,
+                    COALESCE(SUM(copies), 0) AS documents,
+                    COALESCE(SUM(copies > 1), 0) AS duplicated_bodies,
+                    COALESCE(SUM(size), 0) AS stored_bytes,
+                    COALESCE(SUM(size * copies), 0) AS logical_bytes
+                FROM ({BODY_GROUPS_SQL})
+                """
+            ).fetchone()
+
+            # Token counts per FTS row: each body's postings are written once,
+            # where inline bodies would have written them once per copy
+            postings = postings_saved = 0
+            for row in conn.execute(
+                f"""
+                SELECT g.copies, s.sz
+                FROM ({BODY_GROUPS_SQL}) g
+                JOIN documents_fts_docsize s ON s.id = g.first_rowid
+                """
+            ):
+                tokens = _fts_column_sizes(row["sz"])[FTS_CONTENT_COLUMN]
+                postings += tokens
+                postings_saved += tokens * (row["copies"] - 1)
+
+            top_rows = conn.execute(
+                f"""
+                SELECT d.title, d.source_path, g.copies, g.size * (g.copies - 1) AS bytes_saved
+                FROM ({BODY_GROUPS_SQL}) g
+                JOIN documents d ON d.rowid = g.first_rowid
+                WHERE g.copies > 1
+                ORDER BY bytes_saved DESC
+                LIMIT ?
+                """,
+                (top,),
+            ).fetchall()
+
+        report = dict(totals)
+        report["duplicate_documents"] = report["documents"] - report["unique_bodies"]
+        report["duplicate_ratio"] = (
+            report["duplicate_documents"] / report["documents"] if report["documents"] else 0.0
+        )
+        report["saved_bytes"] = report["logical_bytes"] - report["stored_bytes"]
+        report["fts_body_postings"] = postings
+        report["fts_postings_saved"] = postings_saved
+        report["top"] = [dict(row) for row in top_rows]
+        return report
+
+    def update_thread_index(self, tweet_ids: Iterable[str]) -> int:
+        """
+        Re-thread tweets, and every thread they touch.
+
+        The insert methods call this for the tweets they write. A new reply
+        joins its parent's thread; a new parent pulls in the replies that
+        were imported before it. Each affected thread is re-indexed from
+        its root, so depths and positions stay exact.
+
+        Args:
+            tweet_ids: Tweet IDs of documents inserted or replaced
+
+        Returns:
+            Number of tweet_threads rows written
+        """
+        with self.conn:
+            return self._index_threads(list(tweet_ids))
+
+    def _index_threads(self, tweet_ids: List[str]) -> int:
+        """Run update_thread_index inside the caller's transaction."""
+        if not tweet_ids:
+            return 0
+        roots = [
+            row[0] for row in self.conn.execute(THREAD_ROOTS_SQL, (json.dumps(tweet_ids),))
+        ]
+        if not roots:
+            return 0
+        cursor = self.conn.execute(
+            THREAD_INDEX_SQL.format(roots="SELECT value FROM json_each(?)"),
+            (json.dumps(roots),),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        logger.debug(f"Re-threaded {cursor.rowcount} tweets under {len(roots)} roots")
+        return cursor.rowcount
+
+    def prune_bodies(self) -> int:
+        """
+        Delete bodies no document references any more.
+
+        Bodies outlive their last document until pruned, so replacing a
+        document with the same text never drops the body it shares.
+
+        Returns:
+            Number of bodies deleted
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                """
+                DELETE FROM bodies
+                WHERE NOT EXISTS (SELECT 1 FROM documents d WHERE d.body_hash = bodies.hash)
+                    AND NOT EXISTS (SELECT 1 FROM chunks c WHERE c.body_hash = bodies.hash)
+                """
+            )
+        if cursor.rowcount:
+            logger.info(f"Pruned {cursor.rowcount} unreferenced bodies")
+        return cursor.rowcount
 
     def get_stats(self) -> Dict[str, int]:
-        """Get statistics about indexed data."""
-        cursor = self.conn.cursor()
+        """Get statistics about indexed data (reads maintained counters)."""
+        with self.reader() as conn:
+            rows = conn.execute(
+                "SELECT dimension, key, count FROM doc_counters WHERE count != 0"
+            ).fetchall()
+        return self.stats_from_counters(
+            {(row["dimension"], row["key"]): row["count"] for row in rows}
+        )
 
-        stats = {}
+    @staticmethod
+    def stats_from_counters(counters: Dict[Tuple[str, str], int]) -> Dict[str, int]:
+        """
+        Shape doc_counters rows into the get_stats dictionary.
+
+        Args:
+            counters: Mapping of (dimension, key) to count
 
+        Returns:
+            Statistics dictionary
+        """
         # Universal tables
-        cursor.execute("SELECT COUNT(*) FROM documents")
-        stats["total_documents"] = cursor.fetchone()[0]
+        stats = {
+            "total_documents": counters.get(("total", ""), 0),
+            "complete_documents": counters.get(("chunked", "complete"), 0),
+            "chunked_documents": counters.get(("chunked", "chunked"), 0),
+            "total_chunks": counters.get(("chunks", ""), 0),
+        }
 
-        cursor.execute("SELECT COUNT(*) FROM documents WHERE is_chunked = 0")
-        stats["complete_documents"] = cursor.fetchone()[0]
+        # Breakdown by source type and content type
+        for (dimension, key), count in sorted(counters.items()):
+            if dimension == "source":
+                stats[f"source_{key}"] = count
+            elif dimension == "type":
+                stats[f"type_{key or None}"] = count
 
-        cursor.execute("SELECT COUNT(*) FROM documents WHERE is_chunked = 1")
-        stats["chunked_documents"] = cursor.fetchone()[0]
+        return stats
 
-        cursor.execute("SELECT COUNT(*) FROM chunks")
-        stats["total_chunks"] = cursor.fetchone()[0]
+    def recount(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Rebuild doc_counters from the base tables.
 
-        # Breakdown by source type
-        cursor.execute("""
-            SELECT source_type, COUNT(*) as count
-            FROM documents
-            GROUP BY source_type
-        """)
-        for row in cursor.fetchall():
-            stats[f"source_{row['source_type']}"] = row['count']
+        Returns:
+            Drifted counters as {"dimension:key": (stored, actual)}
+        """
+        with self.conn:
+            stored = {
+                (row["dimension"], row["key"]): row["count"]
+                for row in self.conn.execute("SELECT dimension, key, count FROM doc_counters")
+            }
+            actual = {
+                (row["dimension"], row["key"]): row["count"]
+                for row in self.conn.execute(COUNTER_RECOUNT_SQL)
+            }
 
-        # Breakdown by content type
-        cursor.execute("""
-            SELECT content_type, COUNT(*) as count
-            FROM documents
-            GROUP BY content_type
-        """)
-        for row in cursor.fetchall():
-            stats[f"type_{row['content_type']}"] = row['count']
+            self.conn.execute("DELETE FROM doc_counters")
+            self.conn.executemany(
+                "INSERT INTO doc_counters(dimension, key, count) VALUES (?, ?, ?)",
+                [(dimension, key, count) for (dimension, key), count in actual.items()],
+            )
 
-        return stats
+        drift = {}
+        for counter in stored.keys() | actual.keys():
+            before, after = stored.get(counter, 0), actual.get(counter, 0)
+            if before != after:
+                drift[f"{counter[0]}:{counter[1]}"] = (before, after)
+
+        if drift:
+            logger.warning(f"Counter drift repaired: {drift}")
+        return drift
 
     def close(self) -> None:
         """Close database connection."""
+        if self._read_pool:
+            self._read_pool.close()
+            self._read_pool = None
         if self.conn:
             self.conn.close()
             logger.info("Database connection closed")
@@ -0,0 +1,186 @@
+"""
+Text embedders for Proof-of-Self
+
+An embedder turns texts into L2-normalized float32 vectors, so the dot
+product of two vectors is their cosine similarity. HashingEmbedder works
+offline with NumPy alone; SentenceTransformerEmbedder loads a
+sentence-transformers model. Both need the `embeddings` extra:
+
+    pip install 'proof-of-self[embeddings]'
+"""
+
+import hashlib
+import logging
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only semantic search needs it
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Default vector size for HashingEmbedder
+DEFAULT_HASHING_DIM = 384
+
+# Embedder used when the config names none (works offline)
+DEFAULT_EMBEDDER = "hashing"
+
+_WORD = re.compile(r"\w+")
+
+
+def require_numpy() -> None:
+    """
+    Check that NumPy is installed.
+
+    Raises:
+        ImportError: If it is not, naming the extra to install
+    """
+    if np is None:
+        raise ImportError(
+            "Semantic search needs NumPy: pip install 'proof-of-self[embeddings]'"
+        )
+
+
+def normalize_rows(vectors: "np.ndarray") -> "np.ndarray":
+    """Scale each row to unit length in place (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+class Embedder(ABC):
+    """Abstract base class for text embedders."""
+
+    # Recorded with a vector index; vectors from different embedders
+    # cannot be compared
+    name: str
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """
+        Embed a batch of texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), dim) with unit-length rows
+            (all zeros for a text with nothing to embed)
+        """
+        pass
+
+
+class HashingEmbedder(Embedder):
+    """
+    Feature-hashing vectorizer: words and word pairs hashed into `dim` buckets.
+
+    Needs no model download, so indexes can be built offline and tests run
+    anywhere. It only matches shared vocabulary (it knows no synonyms), and
+    its cosine scores run lower than a trained model's.
+    """
+
+    def __init__(self, dim: int = DEFAULT_HASHING_DIM):
+        """
+        Initialize the embedder.
+
+        Args:
+            dim: Number of hash buckets (vector size)
+        """
+        require_numpy()
+        if dim < 1:
+            raise ValueError(f"Embedding dim must be at least 1, got {dim}")
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self._bucket = lru_cache(maxsize=1 << 16)(self._hash_feature)
+
+    def _hash_feature(self, feature: str) -> Tuple[int, float]:
+        """Bucket and sign of a feature (stable across processes, unlike hash())."""
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        digest = int.from_bytes(digest, "little")
+        return digest % self.dim, 1.0 if digest >> 63 else -1.0
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """Embed a batch of texts (see Embedder.embed)."""
+        rows: List[int] = []
+        buckets: List[int] = []
+        signs: List[float] = []
+        for row, text in enumerate(texts):
+            words = _WORD.findall(text.lower())
+            # Word pairs keep a little word order ("proof of work")
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            for feature in features:
+                bucket, sign = self._bucket(feature)
+                rows.append(row)
+                buckets.append(bucket)
+                signs.append(sign)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (rows, buckets), signs)
+        # Dampen repeated words so one term cannot dominate a long text
+        np.copyto(vectors, np.sign(vectors) * np.log1p(np.abs(vectors)))
+        return normalize_rows(vectors)
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Embeds with a sentence-transformers model (downloaded on first use)."""
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        """
+        Load the model.
+
+        Args:
+            model_name: sentence-transformers model name or local path
+            batch_size: Texts per forward pass
+
+        Raises:
+            ImportError: If sentence-transformers is not installed
+        """
+        require_numpy()
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                f"Embedding model '{model_name}' needs sentence-transformers: "
+                "pip install 'proof-of-self[embeddings]'"
+            ) from e
+
+        logger.info(f"Loading embedding model {model_name}")
+        self.model = SentenceTransformer(model_name)
+        self.name = model_name
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.batch_size = batch_size
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """Embed a batch of texts (see Embedder.embed)."""
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def load_embedder(name: Optional[str] = None) -> Embedder:
+    """
+    Create the embedder a config names.
+
+    Args:
+        name: "hashing" or "hashing-<dim>" for HashingEmbedder, anything
+            else is a sentence-transformers model; None uses DEFAULT_EMBEDDER
+
+    Returns:
+        Embedder instance
+    """
+    name = name or DEFAULT_EMBEDDER
+    if name == "hashing":
+        return HashingEmbedder()
+    if name.startswith("hashing-") and name[len("hashing-"):].isdigit():
+        return HashingEmbedder(int(name[len("hashing-"):]))
+    return SentenceTransformerEmbedder(name)
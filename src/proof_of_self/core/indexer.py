@@ -4,12 +4,13 @@ Indexer module for Proof-of-Self
 Coordinates data flow from adapters to database.
 """
 
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional
 import logging
 
-from proof_of_self.core.database import Database
+from proof_of_self.core.database import DEFAULT_BATCH_SIZE, Database
 from proof_of_self.adapters.base import BaseAdapter
 from proof_of_self.core.chunker import generate_document_id
+from proof_of_self.core.vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +18,24 @@ logger = logging.getLogger(__name__)
 class Indexer:
     """Indexes data from adapters into the database."""
 
-    def __init__(self, database: Database):
+    def __init__(
+        self,
+        database: Database,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        vectors: Optional[VectorIndex] = None,
+    ):
         """
         Initialize indexer.
 
         Args:
             database: Database instance to write to
+            batch_size: Number of documents written per transaction
+            vectors: Vector index to add each written batch to (None to
+                leave them to `proof-of-self embed`)
         """
         self.db = database
+        self.batch_size = batch_size
+        self.vectors = vectors
 
     def index_from_adapter(self, adapter: BaseAdapter) -> Dict[str, int]:
         """
@@ -46,6 +57,7 @@ class Indexer:
             "documents": 0,
             "errors": 0,
         }
+        pending: List[Dict[str, Any]] = []
 
         # Process all records from adapter (all should be "document" type now)
         for record in adapter.parse():
@@ -53,30 +65,78 @@ class Indexer:
                 record_type = record.get("type")
 
                 if record_type == "document":
-                    self._index_document(record)
-                    counts["documents"] += 1
+                    pending.append(self._build_document(record))
                 else:
                     logger.warning(f"Unknown record type: {record_type}")
                     counts["errors"] += 1
 
-                # Log progress every 1000 items
-                if counts["documents"] % 1000 == 0:
-                    logger.info(f"Indexed {counts['documents']} documents so far...")
-
             except Exception as e:
                 logger.error(f"Error indexing record: {e}")
                 counts["errors"] += 1
                 continue
 
+            if len(pending) >= self.batch_size:
+                self._flush(pending, counts)
+
+        self._flush(pending, counts)
+
         logger.info(f"Indexing complete: {counts}")
         return counts
 
-    def _index_document(self, record: Dict[str, Any]) -> None:
+    def _flush(self, pending: List[Dict[str, Any]], counts: Dict[str, int]) -> None:
         """
-        Index a document record.
+        Write pending documents in a single transaction and clear the buffer.
+
+        A failed batch is rolled back and written again one document at a
+        time, so only the documents that fail on their own count as errors.
+        The documents written are then embedded if there is a vector index.
+
+        Args:
+            pending: Documents waiting to be written (emptied in place)
+            counts: Running counts to update
+        """
+        if not pending:
+            return
+
+        doc_ids = [document["doc_id"] for document in pending]
+        try:
+            written = self.db.insert_documents_many(pending, batch_size=len(pending))
+            counts["documents"] += len(pending)
+            logger.info(
+                f"Indexed {counts['documents']} documents so far "
+                f"(batch of {sum(written)} rows)..."
+            )
+        except Exception as e:
+            logger.warning(f"Batch of {len(pending)} documents failed ({e}), retrying one by one")
+            doc_ids = []
+            for document in pending:
+                try:
+                    self.db.insert_documents_many([document])
+                    counts["documents"] += 1
+                    doc_ids.append(document["doc_id"])
+                except Exception as e:
+                    logger.error(f"Error indexing document {document['doc_id']}: {e}")
+                    counts["errors"] += 1
+        finally:
+            pending.clear()
+
+        if self.vectors is not None and doc_ids:
+            try:
+                self.vectors.add(self.db, doc_ids)
+            except Exception as e:
+                logger.warning(
+                    f"Could not embed {len(doc_ids)} documents ({e}); run `proof-of-self embed`"
+                )
+
+    def _build_document(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a document row from an adapter record.
 
         Args:
             record: Document data dictionary
+
+        Returns:
+            Keyword arguments for Database.insert_document
         """
         # Generate document ID using chunker's method
         content = record["content"]
@@ -92,16 +152,16 @@ class Indexer:
             created_at=created_at_str,
         )
 
-        self.db.insert_document(
-            doc_id=doc_id,
-            source_type=record.get("source_type", "unknown"),
-            content_type=record.get("content_type"),
-            title=record.get("title"),
-            author=record.get("author"),
-            content=content,
-            source_path=source_path,
-            is_chunked=False,  # TODO: Handle chunking in Phase 1 Week 2
-            metadata=record.get("metadata"),
-            tags=record.get("tags"),
-            created_at=created_at,
-        )
+        return {
+            "doc_id": doc_id,
+            "source_type": record.get("source_type", "unknown"),
+            "content_type": record.get("content_type"),
+            "title": record.get("title"),
+            "author": record.get("author"),
+            "content": content,
+            "source_path": source_path,
+            "is_chunked": False,  # TODO: Handle chunking in Phase 1 Week 2
+            "metadata": record.get("metadata"),
+            "tags": record.get("tags"),
+            "created_at": created_at,
+        }
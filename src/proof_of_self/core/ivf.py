@@ -0,0 +1,124 @@
+"""
+Inverted-file (IVF) partitioning for the Proof-of-Self vector index
+
+Spherical k-means splits unit vectors into `nlist` lists around centroids.
+A search scores only the vectors in the `nprobe` lists whose centroids are
+closest to the query, so more probes buy recall with latency. Everything is
+plain NumPy, working a block of rows at a time so memory-mapped matrices
+are never loaded whole.
+"""
+
+import logging
+import math
+from typing import Any
+
+from proof_of_self.core.embeddings import normalize_rows, np
+
+logger = logging.getLogger(__name__)
+
+# Lists probed per query by default
+DEFAULT_NPROBE = 16
+
+# Below this many vectors a search scans all of them (exact and fast enough)
+DEFAULT_ANN_MIN_VECTORS = 50000
+
+# k-means training: passes over the sample, and sample vectors per list
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 256
+
+# Centroids are retrained once the index grows (or shrinks) by this factor
+# since training; until then new vectors join their nearest existing list
+RETRAIN_GROWTH = 2.0
+
+# Rows assigned to lists per matrix product
+ASSIGN_BLOCK_ROWS = 16384
+
+
+def default_nlist(count: int) -> int:
+    """Number of lists for an index of `count` vectors (about its square root)."""
+    return max(1, int(round(math.sqrt(count))))
+
+
+def needs_training(count: int, trained_count: int) -> bool:
+    """Whether centroids trained on `trained_count` vectors no longer fit `count`."""
+    return not trained_count or not (
+        trained_count / RETRAIN_GROWTH <= count <= trained_count * RETRAIN_GROWTH
+    )
+
+
+def assign_lists(vectors: Any, centroids: "np.ndarray") -> "np.ndarray":
+    """
+    Find each vector's nearest centroid.
+
+    Args:
+        vectors: (n, dim) array or memory map of unit vectors
+        centroids: (nlist, dim) unit centroids
+
+    Returns:
+        int32 array of list numbers
+    """
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        lists[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return lists
+
+
+def train_centroids(
+    sample: "np.ndarray", nlist: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0
+) -> "np.ndarray":
+    """
+    Spherical k-means: centroids maximizing cosine similarity to their members.
+
+    Args:
+        sample: (n, dim) unit vectors to train on
+        nlist: Number of centroids (capped at the sample size)
+        iterations: Assignment/update passes
+        seed: Seed for the initial centroids and empty-list restarts
+
+    Returns:
+        (nlist, dim) float32 unit centroids
+    """
+    sample = np.asarray(sample, dtype=np.float32)
+    nlist = min(nlist, len(sample))
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        lists = assign_lists(sample, centroids)
+        counts = np.bincount(lists, minlength=nlist)
+        nonempty = counts > 0
+
+        # Sum each list's members: sort by list, then add up each run
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        sums = np.zeros_like(centroids)
+        sums[nonempty] = np.add.reduceat(
+            sample[np.argsort(lists, kind="stable")], starts[nonempty], axis=0
+        )
+        # An empty list restarts at a random sample vector
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+
+    logger.info(f"Trained {nlist} centroids on {len(sample)} vectors")
+    return centroids
+
+
+def probe_lists(query: "np.ndarray", centroids: "np.ndarray", nprobe: int) -> "np.ndarray":
+    """
+    Lists to search for a query, nearest centroid first.
+
+    Args:
+        query: (dim,) unit query vector
+        centroids: (nlist, dim) unit centroids
+        nprobe: Number of lists
+
+    Returns:
+        Array of up to nprobe list numbers
+    """
+    scores = centroids @ query
+    if nprobe >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, nprobe)[:nprobe]
+    return top[np.argsort(-scores[top])]
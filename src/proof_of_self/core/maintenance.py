@@ -0,0 +1,257 @@
+"""
+Index maintenance for Proof-of-Self
+
+Keeps the FTS5 indexes compact as small writes (dump_thought, inbox runs)
+accumulate segments, prunes unreferenced bodies, and reclaims free pages in
+the database file.
+"""
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict
+
+from proof_of_self.core.database import FTS_TABLES, Database
+
+if TYPE_CHECKING:
+    from proof_of_self.core.async_database import AsyncDatabase
+
+logger = logging.getLogger(__name__)
+
+# FTS5 packs the segment id into the top bits of each %_data rowid
+FTS5_SEGMENT_ID_SHIFT = 37
+
+# Merge tuning written to each FTS table's config
+DEFAULT_AUTOMERGE = 8
+DEFAULT_CRISISMERGE = 16
+DEFAULT_USERMERGE = 2
+
+# Pages of merge work per 'merge' command, and per maintenance run
+DEFAULT_PAGES_PER_STEP = 200
+DEFAULT_MERGE_BUDGET = 5000
+
+# Free pages returned to the filesystem per incremental vacuum
+DEFAULT_VACUUM_PAGES = 1000
+
+
+class IndexMaintenance:
+    """Incremental FTS5 merging, PRAGMA optimize and incremental vacuum."""
+
+    def __init__(self, database: Database):
+        """
+        Initialize maintenance.
+
+        Args:
+            database: Database instance to maintain (uses its writer connection)
+        """
+        self.db = database
+
+    def fts_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get segment counts and on-disk size of each FTS index.
+
+        Returns:
+            Mapping of FTS table name to {"segments": ..., "bytes": ...}
+        """
+        stats = {}
+        for table in FTS_TABLES:
+            row = self.db.conn.execute(
+                f"""
+                SELECT
+                    COUNT(DISTINCT id >> {FTS5_SEGMENT_ID_SHIFT}) AS segments,
+                    (SELECT COALESCE(SUM(length(block)), 0) FROM {table}_data) AS bytes
+                FROM {table}_data
+                WHERE id >> {FTS5_SEGMENT_ID_SHIFT} > 0
+                """
+            ).fetchone()
+            stats[table] = {"segments": row["segments"], "bytes": row["bytes"]}
+        return stats
+
+    def database_size(self) -> int:
+        """Get the size of the database file in bytes (excluding free pages)."""
+        page_size = self.db.conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self.db.conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = self.db.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return page_size * (page_count - freelist)
+
+    def configure_merging(
+        self,
+        automerge: int = DEFAULT_AUTOMERGE,
+        crisismerge: int = DEFAULT_CRISISMERGE,
+        usermerge: int = DEFAULT_USERMERGE,
+    ) -> None:
+        """
+        Tune FTS5 merge behaviour (persisted in each index's config).
+
+        Args:
+            automerge: Segments per level before a write triggers a merge
+            crisismerge: Segments per level that force a blocking merge
+            usermerge: Minimum segments an explicit 'merge' will combine
+        """
+        for table in FTS_TABLES:
+            for option, value in (
+                ("automerge", automerge),
+                ("crisismerge", crisismerge),
+                ("usermerge", usermerge),
+            ):
+                self.db.conn.execute(
+                    f"INSERT INTO {table}({table}, rank) VALUES (?, ?)", (option, value)
+                )
+        self.db.conn.commit()
+
+    def merge_step(self, pages: int = DEFAULT_PAGES_PER_STEP) -> bool:
+        """
+        Run one bounded incremental merge on every FTS index.
+
+        Args:
+            pages: Approximate pages of merge work per index
+
+        Returns:
+            True if any index did work (more merging may be possible)
+        """
+        did_work = False
+        for table in FTS_TABLES:
+            before = self.db.conn.total_changes
+            self.db.conn.execute(
+                f"INSERT INTO {table}({table}, rank) VALUES ('merge', ?)", (pages,)
+            )
+            # FTS5 reports fewer than two changes when there was nothing to merge
+            if self.db.conn.total_changes - before >= 2:
+                did_work = True
+        self.db.conn.commit()
+        return did_work
+
+    def merge(
+        self,
+        budget: int = DEFAULT_MERGE_BUDGET,
+        pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+    ) -> int:
+        """
+        Merge segments until the indexes are compact or the budget is spent.
+
+        Args:
+            budget: Total pages of merge work allowed
+            pages_per_step: Pages of work per merge step (one transaction each)
+
+        Returns:
+            Number of merge steps that did work
+        """
+        steps = 0
+        spent = 0
+        while spent < budget:
+            if not self.merge_step(pages_per_step):
+                break
+            steps += 1
+            spent += pages_per_step
+        return steps
+
+    def incremental_vacuum(self, pages: int = DEFAULT_VACUUM_PAGES) -> int:
+        """
+        Return up to `pages` free pages to the filesystem.
+
+        Only has an effect when the database uses auto_vacuum=INCREMENTAL
+        (new databases do; run vacuum() once to convert an older file).
+
+        Args:
+            pages: Maximum free pages to release
+
+        Returns:
+            Number of pages released
+        """
+        auto_vacuum = self.db.conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum != 2:  # 2 = INCREMENTAL
+            logger.info("Incremental vacuum unavailable (auto_vacuum is not INCREMENTAL)")
+            return 0
+
+        before = self.db.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        self.db.conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        after = self.db.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after
+
+    def vacuum(self) -> None:
+        """
+        Rewrite the whole file and switch it to incremental auto-vacuum.
+
+        Blocks all writers for the duration; use from the CLI only.
+        """
+        self.db.conn.commit()
+        self.db.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.db.conn.execute("VACUUM")
+
+    def run(
+        self,
+        budget: int = DEFAULT_MERGE_BUDGET,
+        pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+        vacuum_pages: int = DEFAULT_VACUUM_PAGES,
+    ) -> Dict[str, Any]:
+        """
+        Run a full maintenance pass and report before/after index state.
+
+        Args:
+            budget: Total pages of merge work allowed
+            pages_per_step: Pages of work per merge step
+            vacuum_pages: Maximum free pages to release afterwards
+
+        Returns:
+            Dictionary with before/after FTS stats, sizes and work done
+        """
+        start = time.perf_counter()
+        report: Dict[str, Any] = {
+            "before": self.fts_stats(),
+            "database_bytes_before": self.database_size(),
+        }
+
+        self.configure_merging()
+        report["merge_steps"] = self.merge(budget, pages_per_step)
+        report["bodies_pruned"] = self.db.prune_bodies()
+        self.db.conn.execute("PRAGMA optimize")
+        report["pages_vacuumed"] = self.incremental_vacuum(vacuum_pages)
+
+        report["after"] = self.fts_stats()
+        report["database_bytes_after"] = self.database_size()
+        report["seconds"] = time.perf_counter() - start
+
+        logger.info(
+            f"Maintenance finished in {report['seconds']:.2f}s: "
+            f"{report['merge_steps']} merge steps, {report['pages_vacuumed']} pages vacuumed"
+        )
+        return report
+
+
+async def run_maintenance_loop(
+    maintenance: IndexMaintenance,
+    async_db: "AsyncDatabase",
+    interval_seconds: float,
+    pages_per_step: int = DEFAULT_PAGES_PER_STEP,
+    budget: int = DEFAULT_MERGE_BUDGET,
+) -> None:
+    """
+    Background task for the MCP server: merge FTS segments in small steps.
+
+    Each step is a short transaction run on the writer worker, so steps
+    queue behind tool writes instead of sharing the writer connection with
+    them, and tool calls are served in the gaps.
+
+    Args:
+        maintenance: IndexMaintenance bound to the server's database
+        async_db: AsyncDatabase over the same database
+        interval_seconds: Idle time between maintenance passes
+        pages_per_step: Pages of merge work per step
+        budget: Maximum pages of merge work per pass
+    """
+    await async_db.write(maintenance.configure_merging)
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+
+        try:
+            spent = 0
+            while spent < budget and await async_db.write(maintenance.merge_step, pages_per_step):
+                spent += pages_per_step
+            await async_db.write(maintenance.db.prune_bodies)
+            await async_db.write(maintenance.db.conn.execute, "PRAGMA optimize")
+            await async_db.write(maintenance.incremental_vacuum)
+            if spent:
+                logger.info(f"Background maintenance merged ~{spent} pages")
+        except Exception as e:
+            logger.error(f"Background maintenance failed: {e}")
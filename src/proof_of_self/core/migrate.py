@@ -6,10 +6,10 @@ Migrates data from legacy Twitter-specific tables to universal documents table.
 
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Set
 from datetime import datetime
 
-from proof_of_self.core.database import Database
+from proof_of_self.core.database import DEFAULT_BATCH_SIZE, Database
 from proof_of_self.core.chunker import generate_document_id
 
 logger = logging.getLogger(__name__)
@@ -18,14 +18,39 @@ logger = logging.getLogger(__name__)
 class DataMigration:
     """Handles migration from legacy schema to universal schema."""
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, batch_size: int = DEFAULT_BATCH_SIZE):
         """
         Initialize migration.
 
         Args:
             db: Database instance
+            batch_size: Number of documents written per transaction
         """
         self.db = db
+        self.batch_size = batch_size
+
+    def _flush(
+        self, pending: List[Dict[str, Any]], pending_ids: Set[str], dry_run: bool
+    ) -> None:
+        """
+        Write pending documents in one transaction and clear the buffer.
+
+        Written IDs are forgotten, since has_document() finds them from now
+        on; a dry run writes nothing, so it keeps them to count duplicates.
+
+        Args:
+            pending: Documents waiting to be written (emptied in place)
+            pending_ids: IDs of documents queued since the last write
+            dry_run: If True, discard instead of writing
+        """
+        if pending and not dry_run:
+            self.db.insert_documents_many(pending, batch_size=len(pending))
+            pending_ids.clear()
+        pending.clear()
+
+    def _count(self, table: str) -> int:
+        """Number of rows in a legacy table."""
+        return self.db.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
 
     def migrate_tweets_to_documents(self, dry_run: bool = False) -> Dict[str, int]:
         """
@@ -37,25 +62,27 @@ class DataMigration:
         Returns:
             Dictionary with migration stats
         """
-        cursor = self.db.conn.cursor()
+        total = self._count("tweets")
+        migrated = 0
+        skipped = 0
+        errors = 0
+        pending: List[Dict[str, Any]] = []
+        pending_ids: Set[str] = set()
 
-        # Get all tweets
-        cursor.execute("""
+        logger.info(f"Found {total} tweets to migrate")
+
+        # Stream the legacy rows so memory stays flat however large the archive
+        tweets = self.db.iter_rows(
+            """
             SELECT
                 tweet_id, user_id, created_at, full_text,
                 reply_to_tweet_id, reply_to_user,
                 retweet_count, favorite_count,
                 is_retweet, is_reply, entities
             FROM tweets
-        """)
-
-        tweets = cursor.fetchall()
-        total = len(tweets)
-        migrated = 0
-        skipped = 0
-        errors = 0
-
-        logger.info(f"Found {total} tweets to migrate")
+            """,
+            batch_size=self.batch_size,
+        )
 
         for row in tweets:
             try:
@@ -82,11 +109,7 @@ class DataMigration:
                 )
 
                 # Check if already migrated
-                cursor.execute(
-                    "SELECT id FROM documents WHERE id = ?",
-                    (doc_id,),
-                )
-                if cursor.fetchone():
+                if doc_id in pending_ids or self.db.has_document(doc_id):
                     skipped += 1
                     continue
 
@@ -126,31 +149,34 @@ class DataMigration:
                 else:
                     created_at_dt = created_at
 
-                # Insert into documents table
-                if not dry_run:
-                    self.db.insert_document(
-                        doc_id=doc_id,
-                        source_type="twitter",
-                        content_type=content_type,
-                        title=None,  # Tweets don't have titles
-                        author=user_id,
-                        content=full_text,
-                        source_path=f"twitter://{user_id}/{tweet_id}",
-                        is_chunked=False,
-                        metadata=metadata,
-                        tags=tags,
-                        created_at=created_at_dt,
-                    )
+                # Queue for the documents table
+                pending.append({
+                    "doc_id": doc_id,
+                    "source_type": "twitter",
+                    "content_type": content_type,
+                    "title": None,  # Tweets don't have titles
+                    "author": user_id,
+                    "content": full_text,
+                    "source_path": f"twitter://{user_id}/{tweet_id}",
+                    "is_chunked": False,
+                    "metadata": metadata,
+                    "tags": tags,
+                    "created_at": created_at_dt,
+                })
+                pending_ids.add(doc_id)
 
                 migrated += 1
 
-                if migrated % 1000 == 0:
+                if len(pending) >= self.batch_size:
+                    self._flush(pending, pending_ids, dry_run)
                     logger.info(f"Migrated {migrated}/{total} tweets")
 
             except Exception as e:
                 logger.error(f"Error migrating tweet {tweet_id}: {e}")
                 errors += 1
 
+        self._flush(pending, pending_ids, dry_run)
+
         stats = {
             "total": total,
             "migrated": migrated,
@@ -171,22 +197,20 @@ class DataMigration:
         Returns:
             Dictionary with migration stats
         """
-        cursor = self.db.conn.cursor()
-
-        # Get all thoughts
-        cursor.execute("""
-            SELECT id, content, tags, category, created_at, updated_at
-            FROM thoughts
-        """)
-
-        thoughts = cursor.fetchall()
-        total = len(thoughts)
+        total = self._count("thoughts")
         migrated = 0
         skipped = 0
         errors = 0
+        pending: List[Dict[str, Any]] = []
+        pending_ids: Set[str] = set()
 
         logger.info(f"Found {total} thoughts to migrate")
 
+        thoughts = self.db.iter_rows(
+            "SELECT id, content, tags, category, created_at, updated_at FROM thoughts",
+            batch_size=self.batch_size,
+        )
+
         for row in thoughts:
             try:
                 thought_id = row["id"]
@@ -207,11 +231,7 @@ class DataMigration:
                 )
 
                 # Check if already migrated
-                cursor.execute(
-                    "SELECT id FROM documents WHERE id = ?",
-                    (doc_id,),
-                )
-                if cursor.fetchone():
+                if doc_id in pending_ids or self.db.has_document(doc_id):
                     skipped += 1
                     continue
 
@@ -228,28 +248,33 @@ class DataMigration:
                 else:
                     created_at_dt = created_at
 
-                # Insert into documents table
-                if not dry_run:
-                    self.db.insert_document(
-                        doc_id=doc_id,
-                        source_type="user",
-                        content_type="note",
-                        title=None,
-                        author=None,
-                        content=content,
-                        source_path=f"thought://{thought_id}",
-                        is_chunked=False,
-                        metadata=metadata,
-                        tags=tags,
-                        created_at=created_at_dt,
-                    )
+                # Queue for the documents table
+                pending.append({
+                    "doc_id": doc_id,
+                    "source_type": "user",
+                    "content_type": "note",
+                    "title": None,
+                    "author": None,
+                    "content": content,
+                    "source_path": f"thought://{thought_id}",
+                    "is_chunked": False,
+                    "metadata": metadata,
+                    "tags": tags,
+                    "created_at": created_at_dt,
+                })
+                pending_ids.add(doc_id)
 
                 migrated += 1
 
+                if len(pending) >= self.batch_size:
+                    self._flush(pending, pending_ids, dry_run)
+
             except Exception as e:
                 logger.error(f"Error migrating thought {thought_id}: {e}")
                 errors += 1
 
+        self._flush(pending, pending_ids, dry_run)
+
         stats = {
             "total": total,
             "migrated": migrated,
@@ -298,19 +323,24 @@ class DataMigration:
         return results
 
 
-def run_migration(db_path: str, dry_run: bool = False) -> Dict[str, Any]:
+def run_migration(
+    db_path: str,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
     """
     Convenience function to run migration.
 
     Args:
         db_path: Path to database
         dry_run: If True, don't actually migrate
+        batch_size: Number of documents written per transaction
 
     Returns:
         Migration results
     """
     db = Database(db_path)
-    migration = DataMigration(db)
+    migration = DataMigration(db, batch_size=batch_size)
     results = migration.run_full_migration(dry_run=dry_run)
     db.close()
     return results
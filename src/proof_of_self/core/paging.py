@@ -0,0 +1,109 @@
+"""
+Keyset pagination for Proof-of-Self
+
+Search and listing results page with opaque cursors rather than OFFSET. A
+cursor holds the sort values of the last row a page returned; the next
+page's query seeks past them along the index that orders the results, so a
+deep page costs what the first one does, and documents indexed in between
+do not shift the pages still to come.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """
+    A total order of documents that results page through.
+
+    Rows sort by `columns`, then by rowid, which no two rows of one database
+    share, then by id, which breaks ties between shards (their rowids
+    overlap, and a shard's attached name changes as shards are added).
+    Columns are SQL templates with `{row}` for the documents alias; they
+    must never be NULL, which row-value comparisons cannot order.
+    """
+
+    # Stored in cursors, so a cursor from another order is rejected
+    name: str
+    columns: Tuple[str, ...]
+    descending: bool = True
+
+    def keys(self, row: str = "d") -> Tuple[str, ...]:
+        """SQL of every sort key, tie-breaks included, for documents alias `row`."""
+        columns = tuple(column.format(row=row) for column in self.columns)
+        return (*columns, f"{row}.rowid", f"{row}.id")
+
+    @property
+    def page_columns(self) -> Tuple[str, ...]:
+        """Names of the columns select_sql() adds."""
+        return tuple(f"page_{i}" for i in range(len(self.columns) + 2))
+
+    def select_sql(self, row: str = "d") -> str:
+        """Select-list entries returning the sort keys as page_0, page_1, ..."""
+        return ", ".join(
+            f"{key} AS {name}" for key, name in zip(self.keys(row), self.page_columns)
+        )
+
+    def order_sql(self, row: str = "d") -> str:
+        """ORDER BY terms for this order."""
+        direction = " DESC" if self.descending else ""
+        return ", ".join(key + direction for key in self.keys(row))
+
+    def after_sql(self, row: str = "d") -> str:
+        """
+        Condition for the rows after a cursor (parameters from after_params()).
+
+        The first column is bounded on its own as well, so SQLite can seek
+        an expression index (row values only seek plain column indexes);
+        the id only decides between shards' rows with equal values and rowid.
+        """
+        keys = self.keys(row)
+        op = "<" if self.descending else ">"
+        head = ", ".join(keys[:-1])
+        marks = ", ".join("?" * (len(keys) - 1))
+        return (
+            f"{keys[0]} {op}= ? AND ({head}) {op}= ({marks}) "
+            f"AND (({head}) {op} ({marks}) OR {keys[-1]} {op} ?)"
+        )
+
+    def after_params(self, values: Sequence[Any]) -> List[Any]:
+        """Parameters of after_sql() for a decoded cursor."""
+        return [values[0], *values[:-1], *values[:-1], values[-1]]
+
+    def sort_key(self, row: Any) -> Tuple[Any, ...]:
+        """Python equivalent of order_sql() for rows selecting select_sql()."""
+        return tuple(row[name] for name in self.page_columns)
+
+    def encode(self, values: Sequence[Any]) -> str:
+        """Opaque cursor for the position after a row with these sort keys."""
+        data = [self.name, *values[:-1], bytes(values[-1]).hex()]
+        text = json.dumps(data, separators=(",", ":"))
+        return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        """
+        Read the sort keys back out of a cursor made by encode().
+
+        Raises:
+            ValueError: If the cursor is malformed or from another order
+        """
+        try:
+            text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            data = json.loads(text)
+            if not isinstance(data, list) or len(data) != len(self.columns) + 3:
+                raise ValueError("wrong length")
+            name, *values, doc_id = data
+            if name != self.name:
+                raise ValueError(f"cursor of the '{name}' order")
+            return [*values, bytes.fromhex(doc_id)]
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor for the '{self.name}' order: {e}") from e
+
+    def take_cursor(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace a result row's page_* columns with its `cursor`."""
+        row["cursor"] = self.encode([row.pop(name) for name in self.page_columns])
+        return row
@@ -0,0 +1,134 @@
+"""
+Storage performance profiles for Proof-of-Self
+
+A profile is a named set of SQLite PRAGMAs tuned for one role: bulk
+indexing, serving queries, or running on a small machine. Database applies
+the profile when it connects; config.yaml can override any value.
+"""
+
+import sqlite3
+from typing import Any, Dict, Optional, Union
+
+# Built-in profiles. cache_size is negative KiB (SQLite convention).
+PROFILES: Dict[str, Dict[str, Any]] = {
+    # Large cache and in-memory temp B-trees for index/index-inbox runs
+    "ingest": {
+        "page_size": 8192,
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "cache_size": -262144,  # 256 MiB
+        "mmap_size": 268435456,  # 256 MiB
+        "temp_store": "memory",
+    },
+    # Memory-mapped reads so concurrent tool calls share the OS page cache
+    "serve": {
+        "page_size": 4096,
+        "journal_mode": "wal",
+        "synchronous": "normal",
+        "cache_size": -65536,  # 64 MiB per connection
+        "mmap_size": 1073741824,  # 1 GiB
+        "temp_store": "memory",
+    },
+    # SQLite's small defaults, for Raspberry Pi style hosts
+    "low-memory": {
+        "page_size": 4096,
+        "journal_mode": "delete",
+        "synchronous": "full",
+        "cache_size": -2000,  # ~2 MiB
+        "mmap_size": 0,
+        "temp_store": "file",
+    },
+}
+
+# Allowed values for the textual PRAGMAs (they are interpolated into SQL)
+CHOICES = {
+    "journal_mode": {"delete", "truncate", "persist", "memory", "wal", "off"},
+    "synchronous": {"off", "normal", "full", "extra"},
+    "temp_store": {"default", "file", "memory"},
+}
+
+# Settings that only apply to the connection that sets them; read-only
+# and pooled connections apply just these
+CONNECTION_PRAGMAS = ("cache_size", "mmap_size", "temp_store")
+
+# PRAGMA value codes SQLite reports back, for display
+_SYNCHRONOUS_NAMES = {0: "off", 1: "normal", 2: "full", 3: "extra"}
+_TEMP_STORE_NAMES = {0: "default", 1: "file", 2: "memory"}
+
+
+def resolve_profile(
+    profile: Union[str, Dict[str, Any], None],
+    overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Turn a profile name (or settings dict) into validated settings.
+
+    Args:
+        profile: Built-in or overridden profile name, a dict of settings,
+            or None for SQLite's defaults
+        overrides: Per-profile settings from config, merged over (or
+            defining) profiles of the same name
+
+    Returns:
+        Settings dict including a "name" key ({} for None)
+
+    Raises:
+        ValueError: For unknown profiles, settings or values
+    """
+    if profile is None:
+        return {}
+
+    if isinstance(profile, dict):
+        settings = {"name": "custom", **profile}
+    else:
+        overrides = overrides or {}
+        if profile not in PROFILES and profile not in overrides:
+            raise ValueError(
+                f"Unknown performance profile '{profile}', expected one of "
+                f"{sorted(set(PROFILES) | set(overrides))}"
+            )
+        settings = {"name": profile, **PROFILES.get(profile, {}), **(overrides.get(profile) or {})}
+
+    for key, value in settings.items():
+        if key == "name":
+            continue
+        if key in CHOICES:
+            value = str(value).lower()
+            if value not in CHOICES[key]:
+                raise ValueError(f"Invalid {key} '{value}', expected one of {sorted(CHOICES[key])}")
+            settings[key] = value
+        elif key in ("page_size", "cache_size", "mmap_size"):
+            settings[key] = int(value)
+        else:
+            raise ValueError(f"Unknown profile setting '{key}'")
+
+    return settings
+
+
+def apply_connection_pragmas(conn: sqlite3.Connection, settings: Dict[str, Any]) -> None:
+    """Apply the per-connection settings of a profile (cache, mmap, temp store)."""
+    for key in CONNECTION_PRAGMAS:
+        if key in settings:
+            conn.execute(f"PRAGMA {key} = {settings[key]}")
+
+
+def read_settings(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Read the storage settings a connection is actually using.
+
+    Returns:
+        Mapping of setting name to its current value
+    """
+
+    def pragma(name: str) -> Any:
+        row = conn.execute(f"PRAGMA {name}").fetchone()
+        return row[0] if row else None
+
+    return {
+        "journal_mode": pragma("journal_mode"),
+        "synchronous": _SYNCHRONOUS_NAMES.get(pragma("synchronous"), "?"),
+        "page_size": pragma("page_size"),
+        "cache_size": pragma("cache_size"),
+        "mmap_size": pragma("mmap_size"),
+        "temp_store": _TEMP_STORE_NAMES.get(pragma("temp_store"), "?"),
+    }
@@ -0,0 +1,160 @@
+"""
+Query-result cache for Proof-of-Self
+
+AI clients tend to repeat the same searches within a session. This cache
+keeps recent results in memory, bounded by an estimate of their size in
+bytes, and drops every entry as soon as the database's data version moves.
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default bound on the estimated size of cached results
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def normalize_query(query: str) -> str:
+    """
+    Collapse whitespace so trivially different spellings share an entry.
+
+    Case is kept: FTS5 operators (AND, OR, NOT, NEAR) are case-sensitive.
+    """
+    return " ".join(query.split())
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate bytes held by a cached result.
+
+    Counts containers and their items (strings, bytes, numbers, nested
+    lists/tuples/dicts); shared objects are counted once per reference.
+
+    Args:
+        value: Result to measure
+
+    Returns:
+        Estimated size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class QueryCache:
+    """Thread-safe LRU of query results, invalidated by data version."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes: Bound on the estimated size of all cached results;
+                a single result larger than this is never cached
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._version: Any = None
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "bypassed": 0, "evictions": 0, "invalidations": 0}
+
+    def get_or_compute(
+        self, key: Hashable, version: Optional[Hashable], compute: Callable[[], Any]
+    ) -> Any:
+        """
+        Return the cached result for a key, computing and storing it on a miss.
+
+        Args:
+            key: Hashable description of the query and its filters
+            version: Current data version of the database; None means the
+                data may be changing (e.g. a write transaction is open), so
+                the cache is bypassed
+            compute: Runs the query; called without the lock held
+
+        Returns:
+            The cached or freshly computed result
+        """
+        if version is None:
+            with self._lock:
+                self._counts["bypassed"] += 1
+            return compute()
+
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counts["hits"] += 1
+                return entry[0]
+            self._counts["misses"] += 1
+
+        value = compute()
+        self.put(key, version, value)
+        return value
+
+    def put(self, key: Hashable, version: Hashable, value: Any) -> None:
+        """
+        Store a result computed at a data version, evicting the least recently used.
+
+        Results computed at any version other than the cache's current one
+        (the last version a lookup saw) are dropped.
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if version != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._counts["evictions"] += 1
+
+    def _check_version(self, version: Hashable) -> None:
+        """Drop every entry when the data version moves on (lock held)."""
+        if version == self._version:
+            return
+        if self._entries:
+            self._counts["invalidations"] += 1
+            logger.debug(f"Data version changed, dropping {len(self._entries)} cached results")
+        self._entries.clear()
+        self._bytes = 0
+        self._version = version
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters and memory use.
+
+        Returns:
+            Dictionary with hits, misses, bypassed, evictions,
+            invalidations, entries, bytes, max_bytes and hit_rate
+        """
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                **self._counts,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": self._counts["hits"] / lookups if lookups else 0.0,
+            }
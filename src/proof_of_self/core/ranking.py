@@ -0,0 +1,146 @@
+"""
+Relevance ranking for Proof-of-Self
+
+Builds the SQL score Search orders full-text matches by: FTS5's bm25() with
+a weight per documents_fts column, optionally boosted for recent and
+well-received documents using the indexed created_at and engagement columns.
+Hybrid searches merge the full-text and semantic result lists with
+reciprocal rank fusion.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Rank offset of reciprocal rank fusion (the value of the original RRF paper)
+DEFAULT_RRF_K = 60.0
+
+
+@dataclass(frozen=True)
+class Ranking:
+    """
+    Weights for ordering full-text matches.
+
+    bm25() scores are negative (more negative is better), so the boost
+    multiplies them: a document with twice the boost ranks as if it
+    matched twice as well.
+    """
+
+    # bm25 weight of each documents_fts column (the id column is not indexed)
+    title: float = 4.0
+    author: float = 1.0
+    content: float = 1.0
+    tags: float = 2.0
+    # Extra boost for a document created today; half of it at half_life_days old
+    recency_weight: float = 0.0
+    half_life_days: float = 365.0
+    # Extra boost approached as likes + retweets grow; half of it at engagement_midpoint
+    engagement_weight: float = 0.0
+    engagement_midpoint: float = 10.0
+    # Score only this many of the most recently indexed matches, so broad
+    # queries stop reading the index early. Older matches are then never
+    # ranked, and new matches move the window between pages of a cursor;
+    # None (the default) scores every match
+    candidates: Optional[int] = None
+    # Hybrid search: weight of the full-text and semantic result lists, and
+    # the rank offset k (larger k flattens the gap between top ranks)
+    keyword_weight: float = 1.0
+    semantic_weight: float = 1.0
+    rrf_k: float = DEFAULT_RRF_K
+
+    def __post_init__(self) -> None:
+        for name in (
+            "title", "author", "content", "tags", "recency_weight", "engagement_weight",
+            "keyword_weight", "semantic_weight", "rrf_k",
+        ):
+            if getattr(self, name) < 0:
+                raise ValueError(f"Ranking {name} must not be negative, got {getattr(self, name)}")
+        if self.half_life_days <= 0 or self.engagement_midpoint <= 0:
+            raise ValueError("Ranking half_life_days and engagement_midpoint must be positive")
+        if self.candidates is not None and self.candidates < 1:
+            raise ValueError(f"Ranking candidates must be at least 1, got {self.candidates}")
+
+    @classmethod
+    def from_config(cls, section: Optional[Dict[str, Any]]) -> "Ranking":
+        """
+        Build a Ranking from the `search: ranking:` config section.
+
+        Raises:
+            ValueError: If the section names an unknown setting
+        """
+        section = dict(section or {})
+        unknown = set(section) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown ranking settings: {sorted(unknown)}")
+        return cls(**section)
+
+    def bm25_sql(self, table: str = "documents_fts") -> str:
+        """bm25() call with this ranking's column weights."""
+        weights = (0.0, self.title, self.author, self.content, self.tags)
+        return f"bm25({table}, {', '.join(repr(float(w)) for w in weights)})"
+
+    def chunk_bm25_sql(self, table: str = "chunks_fts") -> str:
+        """bm25() call for chunks_fts, whose text weighs like a document's content."""
+        return f"bm25({table}, 0.0, {float(self.content)!r})"
+
+    def score_sql(self, bm25: str, row: str = "d") -> str:
+        """
+        Score expression for a match (lower is better, like bm25()).
+
+        Both boosts are plain arithmetic, so they do not depend on SQLite's
+        optional math functions.
+
+        Args:
+            bm25: SQL for the match's bm25() value
+            row: Alias of the documents row the match belongs to
+
+        Returns:
+            SQL expression
+        """
+        boosts = []
+        if self.recency_weight:
+            age = f"max(julianday('now') - julianday({row}.created_at), 0)"
+            boosts.append(
+                f"{float(self.recency_weight)!r} "
+                f"/ (1.0 + COALESCE({age}, 1e9) / {float(self.half_life_days)!r})"
+            )
+        if self.engagement_weight:
+            engagement = (
+                f"(COALESCE({row}.favorite_count, 0) + COALESCE({row}.retweet_count, 0))"
+            )
+            boosts.append(
+                f"{float(self.engagement_weight)!r} * {engagement} "
+                f"/ ({engagement} + {float(self.engagement_midpoint)!r})"
+            )
+        if not boosts:
+            return bm25
+        return f"{bm25} * (1.0 + {' + '.join(boosts)})"
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Tuple[float, Sequence[Hashable]]], k: float = DEFAULT_RRF_K
+) -> List[Tuple[Hashable, float]]:
+    """
+    Merge ranked lists with reciprocal rank fusion.
+
+    A key scores weight / (k + rank) in every list it appears in (ranks
+    start at 1), summed over the lists. Only ranks count, so lists scored
+    on different scales (bm25, cosine similarity) merge without tuning.
+
+    Args:
+        rankings: (weight, keys best first) per list; keys are distinct
+            within a list
+        k: Rank offset
+
+    Returns:
+        (key, fused score) pairs, best first; keys scoring 0 are left out
+    """
+    scores: Dict[Hashable, float] = {}
+    for weight, keys in rankings:
+        for rank, key in enumerate(keys, 1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    # sorted() is stable, so ties keep the order keys were first seen
+    return sorted(
+        ((key, score) for key, score in scores.items() if score > 0),
+        key=lambda item: item[1],
+        reverse=True,
+    )
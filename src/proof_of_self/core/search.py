@@ -4,24 +4,394 @@ Search module for Proof-of-Self
 Provides search functionality over indexed data.
 """
 
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
+from itertools import islice
+import heapq
+import json
 import logging
+import math
+import sqlite3
+import threading
+
+from proof_of_self.core.chunker import document_key
+from proof_of_self.core.database import (
+    DEFAULT_FETCH_SIZE,
+    Database,
+    chunk_text_sql,
+    iter_cursor,
+)
+from proof_of_self.core.paging import Keyset
+from proof_of_self.core.query_cache import QueryCache, normalize_query
+from proof_of_self.core.ranking import Ranking, reciprocal_rank_fusion
+from proof_of_self.core.vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
+# Documents columns returned under the field names the tweet tools use.
+# Tweet fields are the indexed generated columns declared by Database;
+# the text comes from the bodies row joined as `b`.
+TWEET_COLUMNS = """
+    lower(hex(d.id)) AS id,
+    d.tweet_id,
+    d.author AS user_id,
+    d.created_at,
+    pos_body(b.content, b.content_z) AS full_text,
+    d.is_reply,
+    d.is_retweet,
+    d.reply_to_tweet_id,
+    d.retweet_count,
+    d.favorite_count,
+    d.metadata
+"""
+
+# Every shard threads its own tweets: a reply whose parent is filed in
+# another shard (the thread crossed into a new year) roots a thread there.
+# find_thread follows these roots back and joins the pieces.
+
+# A tweet's thread root within one shard, and the tweet that root replies to
+THREAD_ROOT_SQL = """
+    SELECT t.thread_root_id, r.reply_to_tweet_id
+    FROM {schema}.tweet_threads t
+    JOIN {schema}.documents r ON r.tweet_id = t.thread_root_id
+    WHERE t.tweet_id = ?
+"""
+
+# One shard's tweets under the thread roots in the JSON array parameter
+THREAD_TWEETS_SQL = f"""
+    SELECT {TWEET_COLUMNS}, t.depth, t.thread_root_id
+    FROM {{schema}}.tweet_threads t
+    JOIN {{schema}}.documents d ON d.tweet_id = t.tweet_id
+    LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+    WHERE t.thread_root_id IN (SELECT value FROM json_each(?))
+"""
+
+# Thread roots of one shard replying to the tweets in the JSON array
+# parameter: where a thread continues in that shard
+THREAD_CONTINUATIONS_SQL = """
+    SELECT d.tweet_id, d.reply_to_tweet_id
+    FROM {schema}.documents d
+    JOIN {schema}.tweet_threads t ON t.tweet_id = d.tweet_id
+    WHERE d.reply_to_tweet_id IN (SELECT value FROM json_each(?))
+        AND t.thread_root_id = d.tweet_id
+"""
+
+# Sort orders accepted by search_tweets ("relevance" uses Search.ranking),
+# which also page with cursors
+TWEET_SORTS = {
+    "date": Keyset("date", ("{row}.created_at",)),
+    "engagement": Keyset(
+        "engagement", ("{row}.favorite_count + {row}.retweet_count", "{row}.created_at")
+    ),
+    "relevance": Keyset("relevance", ("rank",), descending=False),
+}
+
+# Aggregate choosing the copy of a body that stands for it in each order:
+# the one an index walk in that order reaches first (the rowid breaks ties,
+# as in TWEET_SORTS, so a page never ends between two equal copies)
+TWEET_SORT_REPRESENTATIVES = {
+    "date": "MAX(printf('%s %020d', d.created_at, d.rowid))",
+    "engagement": (
+        "MAX(printf('%020d %s %020d', "
+        "d.favorite_count + d.retweet_count, d.created_at, d.rowid))"
+    ),
+}
+
+# Every source path holding a document's body, as a JSON array
+SOURCE_PATHS_COLUMN = """
+    CASE WHEN d.body_hash IS NULL THEN json_array(d.source_path) ELSE (
+        SELECT json_group_array(o.source_path) FROM {schema}.documents o
+        WHERE o.body_hash = d.body_hash
+    ) END AS source_paths
+"""
+
+# Top full-text matches, one per distinct body, as `ranked`
+# (doc_rowid, hit_rowid, chunk_rowid, rank). Matches are widened to every
+# document sharing a matched body, because documents_fts only indexes the
+# text of a body's first copy; hit_rowid is the documents_fts row that
+# matched, or the document whose chunk chunk_rowid matched (see
+# CHUNK_HITS_SQL). Only rowids and scores are grouped and sorted, and the
+# LIMIT bounds the sorter, so callers build their expensive columns for
+# the top rows alone.
+RANKED_MATCHES_SQL = """
+    WITH {chunk_hits}hits AS MATERIALIZED (
+        SELECT * FROM (
+            SELECT rowid AS hit_rowid, NULL AS chunk_rowid, {bm25} AS bm25
+            FROM {schema}.documents_fts
+            WHERE documents_fts MATCH ?
+            {candidates}
+        )
+        {chunk_union}
+    ),
+    matched AS (
+        SELECT hit_rowid AS doc_rowid, hit_rowid, chunk_rowid, bm25 FROM hits
+        UNION ALL
+        SELECT o.rowid, hits.hit_rowid, hits.chunk_rowid, hits.bm25 FROM hits
+        JOIN {schema}.documents m ON m.rowid = hits.hit_rowid
+        JOIN {schema}.documents o ON o.body_hash = m.body_hash AND o.rowid != m.rowid
+    ),
+    ranked AS (
+        SELECT matched.doc_rowid, matched.hit_rowid, matched.chunk_rowid, {aggregate}
+        FROM matched
+        JOIN {schema}.documents d ON d.rowid = matched.doc_rowid
+        WHERE {where}
+        GROUP BY COALESCE(d.body_hash, d.rowid)
+        {having}
+        ORDER BY {order}
+        LIMIT ?
+    )
+"""
+
+# The best chunks_fts match of each chunked document, which then stands for
+# the document in the `hits` of RANKED_MATCHES_SQL (CHUNK_UNION_SQL): a long
+# document scores by its best chunk, not by its whole text, and returns that
+# chunk as its passage. Matches are scored in a CTE of their own: bm25()
+# only works while the FTS5 cursor is on the row, not in the grouping.
+CHUNK_HITS_SQL = """
+    chunk_matches AS MATERIALIZED (
+        SELECT rowid AS chunk_rowid, {bm25} AS bm25
+        FROM {schema}.chunks_fts
+        WHERE chunks_fts MATCH ?
+        {candidates}
+    ),
+    chunk_hits AS MATERIALIZED (
+        SELECT c.document_id AS hit_rowid, m.chunk_rowid, MIN(m.bm25) AS bm25
+        FROM chunk_matches m
+        JOIN {schema}.chunks c ON c.rowid = m.chunk_rowid
+        GROUP BY c.document_id
+    ),
+"""
+CHUNK_UNION_SQL = """
+        WHERE hit_rowid NOT IN (SELECT hit_rowid FROM chunk_hits)
+        UNION ALL
+        SELECT hit_rowid, chunk_rowid, bm25 FROM chunk_hits
+"""
+
+# documents_fts rows that can match for document `d`: its own (title,
+# author, tags) and its body's first copy (the indexed text)
+MATCH_ROWIDS_SQL = """
+    (d.rowid, COALESCE(
+        (SELECT MIN(o.rowid) FROM {schema}.documents o WHERE o.body_hash = d.body_hash),
+        d.rowid
+    ))
+"""
+
+# Tweets walked in sort order along the created_at or engagement index, each
+# probed against the full-text query; reading stops once enough rows are
+# found. Copies of one body all appear, so callers skip repeated body_key
+# values (and a later page leaves out copies with EARLIER_COPY_SQL).
+TWEET_WALK_SQL = """
+    SELECT {columns}, {source_paths}, NULL AS rank, COALESCE(d.body_hash, d.id) AS body_key
+    FROM {schema}.documents d
+    LEFT JOIN {schema}.bodies b ON b.hash = d.body_hash
+    WHERE {where} AND EXISTS (
+        SELECT 1 FROM {schema}.documents_fts h
+        WHERE documents_fts MATCH ? AND h.rowid IN {match_rowids}
+    )
+    ORDER BY {order}
+"""
+
+# A copy of the walked tweet's body that passes the filters (on `o`) and comes
+# first in the walk order; the body was returned with that copy, perhaps on
+# an earlier page
+EARLIER_COPY_SQL = """
+    NOT EXISTS (
+        SELECT 1 FROM {schema}.documents o
+        WHERE o.body_hash = d.body_hash AND {where} AND ({copy_keys}) {op} ({keys})
+    )
+"""
+
+# A walked row costs about this many matches read by the FTS-driven plan
+WALK_PROBE_COST = 4
+
+# Source type the Twitter adapter writes (lets sharded searches skip other shards)
+TWEET_SOURCE_TYPE = "twitter"
+
+# Vector matches fetched per wanted semantic result at first; filters and
+# several chunks of one document can use up the rest
+SEMANTIC_OVERFETCH = 4
+
+# Times a semantic search refetches SEMANTIC_OVERFETCH times as many matches
+# when too few pass its filters, before settling for fewer results
+SEMANTIC_ROUNDS = 3
+
+# Matched ids bound per lookup query (SQLite caps bound parameters)
+SEMANTIC_ID_BATCH = 500
+
+# Orders of keyword search_documents, list_recent_documents and list_documents
+DOCUMENT_KEYSET = Keyset("relevance", ("rank",), descending=False)
+RECENT_KEYSET = Keyset("indexed", ("{row}.indexed_at",))
+CREATED_KEYSET = Keyset("created", ("{row}.created_at",))
+
+# Characters of a matched chunk returned as its passage
+PASSAGE_CHARS = 300
+
+# How search_documents matches: full-text, by embedding similarity, or both
+# merged with reciprocal rank fusion
+SEARCH_MODES = ("keyword", "semantic", "hybrid")
+
+# Results each leg of a hybrid search contributes per wanted result
+HYBRID_DEPTH = 4
+
+# Threads running the vector leg of hybrid searches (NumPy releases the GIL,
+# so it overlaps the full-text query running on the calling thread)
+VECTOR_WORKERS = 4
+
+# Document fields of a hybrid search result, taken from whichever leg found it
+HYBRID_FIELDS = (
+    "id", "title", "content_type", "tags", "source_path", "created_at", "preview", "source_paths",
+)
+
+# Documents a semantic search matched (ids bound by the caller), with
+# COALESCE(body_hash, id) so copies of one body collapse into one result
+SEMANTIC_DOCUMENTS_SQL = f"""
+    SELECT
+        d.id AS doc_key, COALESCE(d.body_hash, d.id) AS body_key,
+        lower(hex(d.id)) AS id, d.title, d.content_type, d.source_type,
+        d.tags, d.source_path, d.created_at,
+        pos_preview(b.content, b.content_z, 200) AS preview,
+        {SOURCE_PATHS_COLUMN}
+    FROM {{schema}}.documents d
+    LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+    WHERE d.id IN ({{ids}}) AND {{where}}
+"""
+
+# Text of the chunks a semantic search matched, as (doc_key, chunk_index) pairs
+SEMANTIC_PASSAGES_SQL = f"""
+    SELECT d.id AS doc_key, c.chunk_index,
+           substr({chunk_text_sql("c", "{schema}.bodies")}, 1, {PASSAGE_CHARS}) AS passage
+    FROM {{schema}}.chunks c
+    JOIN {{schema}}.documents d ON d.rowid = c.document_id
+    WHERE (d.id, c.chunk_index) IN (VALUES {{pairs}})
+"""
+
+# Consecutive chunks of a document, from a chunk index on. The chunks of a
+# body belong to one of its copies, so any copy's id finds them.
+PASSAGES_SQL = f"""
+    WITH source AS (
+        SELECT MIN(c.document_id) AS doc_rowid
+        FROM {{schema}}.documents d
+        JOIN {{schema}}.documents o ON o.rowid = d.rowid OR o.body_hash = d.body_hash
+        JOIN {{schema}}.chunks c ON c.document_id = o.rowid
+        WHERE d.id = ?
+    )
+    SELECT c.chunk_index, {chunk_text_sql("c", "{schema}.bodies")} AS content,
+           (SELECT COUNT(*) FROM {{schema}}.chunks n WHERE n.document_id = source.doc_rowid)
+               AS chunk_count
+    FROM source
+    JOIN {{schema}}.chunks c ON c.document_id = source.doc_rowid
+    WHERE c.chunk_index >= ?
+    ORDER BY c.chunk_index
+    LIMIT ?
+"""
+
+
+def _skip_repeats(rows: Iterable[sqlite3.Row], column: str) -> Iterator[sqlite3.Row]:
+    """Yield rows whose `column` value has not been seen before."""
+    seen = set()
+    for row in rows:
+        if row[column] not in seen:
+            seen.add(row[column])
+            yield row
+
+
+def _tweet_date(row: sqlite3.Row) -> str:
+    """Python equivalent of ORDER BY d.created_at, for merging shards' tweets."""
+    return row["created_at"] or ""
+
+
+def _tweet_where(
+    row: str,
+    min_date: Optional[str],
+    max_date: Optional[str],
+    include_replies: bool,
+    include_retweets: bool,
+    min_engagement: int,
+) -> Tuple[str, List[Any]]:
+    """
+    Build search_tweets' filters for documents alias `row`.
+
+    Returns:
+        (SQL condition, parameters)
+    """
+    where_clauses = [f"{row}.tweet_id IS NOT NULL"]
+    where_params: List[Any] = []
+
+    if not include_replies:
+        where_clauses.append(f"{row}.is_reply = 0")
+
+    if not include_retweets:
+        where_clauses.append(f"{row}.is_retweet = 0")
+
+    if min_engagement:
+        where_clauses.append(f"({row}.favorite_count + {row}.retweet_count) >= ?")
+        where_params.append(min_engagement)
+
+    if min_date:
+        where_clauses.append(f"{row}.created_at >= ?")
+        where_params.append(min_date)
+
+    if max_date:
+        where_clauses.append(f"{row}.created_at <= ?")
+        where_params.append(max_date)
+
+    return " AND ".join(where_clauses), where_params
+
 
 class Search:
     """Search engine for querying indexed data."""
 
-    def __init__(self, database):
+    def __init__(
+        self,
+        database,
+        cache: Optional[QueryCache] = None,
+        ranking: Optional[Ranking] = None,
+        vectors: Optional[VectorIndex] = None,
+    ):
         """
         Initialize search engine.
 
         Args:
             database: Database instance
+            cache: Result cache for repeated searches; None runs every query
+            ranking: Weights for relevance-ordered searches (default Ranking())
+            vectors: Embeddings for semantic_search; None disables it
         """
         self.db = database
+        self.cache = cache
+        self.ranking = ranking or Ranking()
+        self.vectors = vectors
+        self._vector_pool: Optional[ThreadPoolExecutor] = None
+        self._vector_pool_lock = threading.Lock()
+
+    def _cached(
+        self, key: Tuple[Any, ...], compute: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a query through the result cache, if there is one.
+
+        Args:
+            key: Method name, normalized query and every filter
+            compute: Runs the query and returns its rows
+
+        Returns:
+            Copies of the rows, so callers cannot alter cached results
+        """
+        if self.cache is None:
+            return compute()
+        rows = self.cache.get_or_compute(key, self.db.data_version(), compute)
+        return [dict(row) for row in rows]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get result cache hit rates and memory use.
+
+        Returns:
+            QueryCache.stats(), or an empty dictionary without a cache
+        """
+        return self.cache.stats() if self.cache else {}
 
     def search_tweets(
         self,
@@ -32,6 +402,9 @@ class Search:
         max_date: Optional[str] = None,
         include_replies: bool = True,
         include_retweets: bool = True,
+        min_engagement: int = 0,
+        sort_by: str = "date",
+        after: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         Search tweets using full-text search.
@@ -39,135 +412,385 @@ class Search:
         Args:
             query: Search query (full-text search syntax)
             limit: Maximum results to return
-            offset: Number of results to skip
+            offset: Number of results to skip (prefer `after`, which does
+                not read the skipped rows)
             min_date: Minimum date (YYYY-MM-DD)
             max_date: Maximum date (YYYY-MM-DD)
             include_replies: Include replies in results
             include_retweets: Include retweets in results
+            min_engagement: Minimum combined likes + retweets
+            sort_by: "date" (newest first), "engagement" (most liked first)
+                or "relevance" (best match first, weighted by Search.ranking)
+            after: `cursor` of the last result of the previous page, from
+                the same query and sort_by
 
         Returns:
-            List of tweet dictionaries
-        """
-        cursor = self.db.conn.cursor()
+            List of tweet dictionaries, one per distinct text, with every
+            copy's path in `source_paths`, the `cursor` continuing after the
+            tweet and, sorted by relevance, the best match `rank` (None for
+            the other orders)
 
-        # Build WHERE clause
-        where_clauses = []
-        params = [query]
-
-        if not include_replies:
-            where_clauses.append("t.is_reply = 0")
-
-        if not include_retweets:
-            where_clauses.append("t.is_retweet = 0")
-
-        if min_date:
-            where_clauses.append("t.created_at >= ?")
-            params.append(min_date)
+        Raises:
+            ValueError: If sort_by is unknown or the cursor is invalid
+        """
+        if sort_by not in TWEET_SORTS:
+            raise ValueError(f"Unknown sort_by '{sort_by}', expected one of {list(TWEET_SORTS)}")
+        keyset = TWEET_SORTS[sort_by]
+        page = keyset.decode(after) if after else None
 
-        if max_date:
-            where_clauses.append("t.created_at <= ?")
-            params.append(max_date)
+        filters = (min_date, max_date, include_replies, include_retweets, min_engagement)
+        where_sql, where_params = _tweet_where("d", *filters)
 
-        where_sql = " AND " + " AND ".join(where_clauses) if where_clauses else ""
+        # Query once per shard when the archive is sharded; retweets and
+        # re-imports of the same text collapse into one result
+        relevance = sort_by == "relevance"
+        walk = not relevance and self._walk_is_cheaper(
+            query, limit + offset, min_date, max_date
+        )
+        if walk:
+            if page:
+                copy_sql, copy_params = _tweet_where("o", *filters)
+                where_sql += f" AND {keyset.after_sql()} AND " + EARLIER_COPY_SQL.format(
+                    schema="{schema}",
+                    where=copy_sql,
+                    copy_keys=", ".join(keyset.keys("o")[:-1]),
+                    op=">" if keyset.descending else "<",
+                    keys=", ".join(keyset.keys()[:-1]),
+                )
+                where_params += keyset.after_params(page) + copy_params
+            sql = TWEET_WALK_SQL.format(
+                columns=f"{TWEET_COLUMNS}, {keyset.select_sql()}",
+                source_paths=SOURCE_PATHS_COLUMN,
+                schema="{schema}",
+                match_rowids=MATCH_ROWIDS_SQL.format(schema="{schema}"),
+                where=where_sql,
+                order=keyset.order_sql(),
+            )
+            params = [*where_params, query]
+        else:
+            ranked_sql = self._ranked_matches_sql(
+                where_sql,
+                keyset.order_sql(),
+                scored=relevance,
+                pooled=relevance,
+                representative=TWEET_SORT_REPRESENTATIVES.get(sort_by),
+                having=keyset.after_sql() if page else "",
+            )
+            sql = f"""
+                {ranked_sql}
+                SELECT {TWEET_COLUMNS}, {SOURCE_PATHS_COLUMN}, ranked.rank, {keyset.select_sql()}
+                FROM ranked
+                JOIN {{schema}}.documents d ON d.rowid = ranked.doc_rowid
+                LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+                ORDER BY {keyset.order_sql()}
+            """
+            having_params = keyset.after_params(page) if page else []
+            params = [query, *where_params, *having_params, limit + offset]
 
-        # Query using FTS5
-        sql = f"""
-            SELECT
-                t.tweet_id,
-                t.user_id,
-                t.created_at,
-                t.full_text,
-                t.is_reply,
-                t.is_retweet,
-                t.reply_to_tweet_id,
-                t.reply_to_user,
-                t.retweet_count,
-                t.favorite_count,
-                t.entities
-            FROM tweets_fts fts
-            JOIN tweets t ON t.rowid = fts.rowid
-            WHERE fts.full_text MATCH ?
-            {where_sql}
-            ORDER BY t.created_at DESC
-            LIMIT ? OFFSET ?
-        """
-
-        params.extend([limit, offset])
-
-        cursor.execute(sql, params)
-        results = [dict(row) for row in cursor.fetchall()]
+        key = (
+            "search_tweets", normalize_query(query), limit, offset, min_date, max_date,
+            include_replies, include_retweets, min_engagement, sort_by, after,
+        )
+        results = self._cached(
+            key,
+            lambda: self._fan_out(
+                sql,
+                params,
+                keyset=keyset,
+                limit=limit,
+                offset=offset,
+                source_type=TWEET_SOURCE_TYPE,
+                min_date=min_date,
+                max_date=max_date,
+                distinct="body_key" if walk else None,
+            ),
+        )
 
         logger.info(f"Search for '{query}' returned {len(results)} results")
         return results
 
-    def find_thread(self, tweet_id: str) -> List[Dict[str, Any]]:
+    def _ranked_matches_sql(
+        self,
+        where_sql: str,
+        order_sql: str,
+        scored: bool = True,
+        pooled: bool = False,
+        representative: Optional[str] = None,
+        chunks: bool = False,
+        having: str = "",
+    ) -> str:
         """
-        Find a complete thread starting from a tweet.
+        Fill in RANKED_MATCHES_SQL for a query.
 
         Args:
-            tweet_id: Starting tweet ID
+            where_sql: Filter on the matched document `d`
+            order_sql: ORDER BY for the groups (may use `rank`)
+            scored: Compute `rank` with Search.ranking (the best scoring
+                copy then stands for the group); otherwise it is NULL and
+                bm25() is never called
+            representative: MIN()/MAX() aggregate choosing the copy that
+                stands for an unscored group (SQLite takes the group's other
+                columns from that row only when it is the sole aggregate)
+            pooled: Score only Ranking.candidates matches per shard (for
+                orders by rank, where a broad query need not score them all)
+            chunks: Also match chunks_fts (see CHUNK_HITS_SQL); needs `scored`
+            having: Filter on the groups, such as Keyset.after_sql() (the
+            `d` columns come from the copy standing for the group)
 
         Returns:
-            List of tweets in the thread, ordered chronologically
+            SQL with `{schema}` placeholders, taking the query (twice with
+            `chunks`), the filter parameters, the `having` parameters and a
+            LIMIT
         """
-        cursor = self.db.conn.cursor()
+        candidates = ""
+        if pooled and self.ranking.candidates:
+            # FTS5 walks its doclists newest rowid first and stops here
+            candidates = f"ORDER BY rowid DESC LIMIT {int(self.ranking.candidates)}"
+        chunk_hits = chunk_union = ""
+        if chunks:
+            chunk_hits = CHUNK_HITS_SQL.format(
+                schema="{schema}",
+                bm25=self.ranking.chunk_bm25_sql(),
+                candidates=candidates,
+            )
+            chunk_union = CHUNK_UNION_SQL
+        if scored:
+            aggregate = f"MIN({self.ranking.score_sql('matched.bm25', 'd')}) AS rank"
+        else:
+            aggregate = f"{representative or 'MIN(d.rowid)'} AS representative, NULL AS rank"
+        return RANKED_MATCHES_SQL.format(
+            schema="{schema}",
+            bm25=self.ranking.bm25_sql() if scored else "NULL",
+            candidates=candidates,
+            chunk_hits=chunk_hits,
+            chunk_union=chunk_union,
+            aggregate=aggregate,
+            where=where_sql,
+            having=f"HAVING {having}" if having else "",
+            order=order_sql,
+        )
 
-        # Get the root tweet (walk up reply chain)
-        root_id = self._find_thread_root(tweet_id)
+    def _walk_is_cheaper(
+        self,
+        query: str,
+        rows_wanted: int,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+    ) -> bool:
+        """
+        Decide whether walking tweets in sort order beats reading every match.
 
-        # Get all tweets in thread
-        cursor.execute(
-            """
-            WITH RECURSIVE thread AS (
-                -- Start with root tweet
-                SELECT * FROM tweets WHERE tweet_id = ?
+        A broad query finds its newest matches after walking a few rows; a
+        narrow one would walk the whole archive, and is cheaper to answer
+        from its (few) matches. Both plans return the same rows.
 
-                UNION ALL
+        Args:
+            query: FTS5 search query
+            rows_wanted: Distinct matches needed (offset + limit)
+            min_date: Lets a sharded database skip older shards
+            max_date: Lets a sharded database skip newer shards
 
-                -- Get all replies recursively
-                SELECT t.*
-                FROM tweets t
-                JOIN thread th ON t.reply_to_tweet_id = th.tweet_id
+        Returns:
+            True if the expected walk is cheaper than reading the matches
+        """
+        with self.db.shard_readers(TWEET_SOURCE_TYPE, min_date, max_date) as shards:
+            tweets = sum(
+                conn.execute(
+                    f"""
+                    SELECT COALESCE(SUM(count), 0) FROM {schema}.doc_counters
+                    WHERE dimension = 'source' AND key = ?
+                    """,
+                    (TWEET_SOURCE_TYPE,),
+                ).fetchone()[0]
+                for conn, schema in shards
             )
-            SELECT * FROM thread
-            ORDER BY created_at ASC
-            """,
-            (root_id,),
-        )
+            # Matches are assumed spread evenly, so finding rows_wanted of
+            # them walks rows_wanted * tweets / matches rows: the walk wins
+            # once matches exceed this, and counting stops there
+            threshold = math.isqrt(rows_wanted * tweets * WALK_PROBE_COST)
+            matches = 0
+            for conn, schema in shards:
+                matches += conn.execute(
+                    f"""
+                    SELECT COUNT(*) FROM (
+                        SELECT 1 FROM {schema}.documents_fts WHERE documents_fts MATCH ? LIMIT ?
+                    )
+                    """,
+                    (query, threshold + 1 - matches),
+                ).fetchone()[0]
+                if matches > threshold:
+                    return True
+        return False
 
-        results = [dict(row) for row in cursor.fetchall()]
-        logger.info(f"Found thread with {len(results)} tweets")
+    def _fan_out(
+        self,
+        sql: str,
+        params: List[Any],
+        limit: int,
+        sort_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        offset: int = 0,
+        reverse: bool = False,
+        source_type: Optional[str] = None,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+        distinct: Optional[str] = None,
+        keyset: Optional[Keyset] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a query on every shard that can match and merge the rows.
+
+        Args:
+            sql: Query with `{schema}` before each table name, already
+                ordered and limited to `limit + offset` rows per shard
+            params: Query parameters
+            limit: Maximum merged rows to return
+            sort_key: Python equivalent of the query's ORDER BY (not needed
+                with `keyset`)
+            offset: Merged rows to skip
+            reverse: Whether the ORDER BY is descending
+            source_type: Lets a sharded database skip other sources
+            min_date: Lets a sharded database skip older shards
+            max_date: Lets a sharded database skip newer shards
+            distinct: Column whose repeated values are skipped (it is
+                left out of the returned rows); for unlimited queries,
+                which are then read only as far as needed
+            keyset: Order of a query selecting Keyset.select_sql() and
+                ordered by Keyset.order_sql(); its page columns become each
+                row's `cursor`
+
+        Returns:
+            List of row dictionaries
+        """
+        if keyset:
+            sort_key, reverse = keyset.sort_key, keyset.descending
+        # An unlimited query is fetched in batches the size of the page
+        batch_size = offset + limit if distinct else DEFAULT_FETCH_SIZE
+        rows = self._iter_fan_out(
+            sql, params, sort_key, reverse, source_type, min_date, max_date, batch_size
+        )
+        with closing(rows):
+            if distinct:
+                rows = _skip_repeats(rows, distinct)
+            results = [dict(row) for row in islice(rows, offset, offset + limit)]
+        if distinct:
+            for row in results:
+                del row[distinct]
+        if keyset:
+            results = [keyset.take_cursor(row) for row in results]
         return results
 
-    def _find_thread_root(self, tweet_id: str) -> str:
+    def _iter_fan_out(
+        self,
+        sql: str,
+        params: List[Any],
+        sort_key: Callable[[Dict[str, Any]], Any],
+        reverse: bool = False,
+        source_type: Optional[str] = None,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+        batch_size: int = DEFAULT_FETCH_SIZE,
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Stream a query's rows from every shard that can match, in order.
+
+        Each shard's rows arrive already sorted by the query, so they are
+        merged lazily and only `batch_size` rows per shard are held at once.
+
+        Args:
+            sql: Ordered query with `{schema}` before each table name
+            params: Query parameters
+            sort_key: Python equivalent of the query's ORDER BY
+            reverse: Whether the ORDER BY is descending
+            source_type: Lets a sharded database skip other sources
+            min_date: Lets a sharded database skip older shards
+            max_date: Lets a sharded database skip newer shards
+            batch_size: Rows fetched per round trip from each shard
+
+        Yields:
+            sqlite3.Row objects
         """
-        Walk up the reply chain to find the root tweet.
+        with self.db.shard_readers(source_type, min_date, max_date) as shards:
+            streams = [
+                iter_cursor(conn.execute(sql.format(schema=schema), params), batch_size)
+                for conn, schema in shards
+            ]
+            if len(streams) == 1:
+                yield from streams[0]
+            else:
+                yield from heapq.merge(*streams, key=sort_key, reverse=reverse)
+
+    def find_thread(self, tweet_id: str) -> List[Dict[str, Any]]:
+        """
+        Find the complete thread a tweet belongs to.
+
+        Reads the thread index maintained by the indexer: one lookup for
+        the tweet's root, then one range scan of idx_tweet_threads_root,
+        per shard the thread reaches.
 
         Args:
-            tweet_id: Starting tweet ID
+            tweet_id: Any tweet in the thread
 
         Returns:
-            Root tweet ID
+            List of tweets in the thread, ordered chronologically, each
+            with its `depth` below the root tweet
         """
-        cursor = self.db.conn.cursor()
-        current_id = tweet_id
-        visited = set()
+        with self.db.shard_readers(TWEET_SOURCE_TYPE) as shards:
+            root = self._thread_root(shards, tweet_id)
+            results = self._thread_tweets(shards, root) if root else []
 
-        while current_id and current_id not in visited:
-            visited.add(current_id)
+        logger.info(f"Found thread with {len(results)} tweets")
+        return results
 
-            cursor.execute(
-                "SELECT reply_to_tweet_id FROM tweets WHERE tweet_id = ?",
-                (current_id,),
-            )
+    @staticmethod
+    def _thread_root(
+        shards: List[Tuple[sqlite3.Connection, str]], tweet_id: str
+    ) -> Optional[str]:
+        """Root of a tweet's thread, followed back through earlier shards."""
+        root = None
+        parent: Optional[str] = tweet_id
+        seen = set()
+        while parent is not None and parent not in seen:
+            seen.add(parent)
+            for conn, schema in shards:
+                row = conn.execute(THREAD_ROOT_SQL.format(schema=schema), (parent,)).fetchone()
+                if row:
+                    break
+            else:
+                break  # Not indexed: the thread starts below it
+            root, parent = row
+        return root
 
-            row = cursor.fetchone()
-            if not row or not row["reply_to_tweet_id"]:
-                return current_id
+    @staticmethod
+    def _thread_tweets(
+        shards: List[Tuple[sqlite3.Connection, str]], root: str
+    ) -> List[Dict[str, Any]]:
+        """Every tweet of the thread under `root`, from every shard it reaches."""
+        tweets: Dict[str, Dict[str, Any]] = {}
+        # Thread roots of single shards, with their depth in the whole thread
+        roots = {root: 0}
+        while roots:
+            added = []
+            for conn, schema in shards:
+                sql = THREAD_TWEETS_SQL.format(schema=schema)
+                for row in conn.execute(sql, (json.dumps(list(roots)),)):
+                    tweet = dict(row)
+                    tweet["depth"] += roots[tweet.pop("thread_root_id")]
+                    if tweet["tweet_id"] not in tweets:
+                        tweets[tweet["tweet_id"]] = tweet
+                        added.append(tweet["tweet_id"])
 
-            current_id = row["reply_to_tweet_id"]
+            roots = {}
+            for conn, schema in shards:
+                sql = THREAD_CONTINUATIONS_SQL.format(schema=schema)
+                for row in conn.execute(sql, (json.dumps(added),)):
+                    if row["tweet_id"] not in tweets:
+                        roots[row["tweet_id"]] = tweets[row["reply_to_tweet_id"]]["depth"] + 1
 
-        return current_id
+        # Positions as the thread index numbers them within a shard
+        thread = sorted(tweets.values(), key=lambda t: (t["created_at"] or "", t["tweet_id"]))
+        for position, tweet in enumerate(thread):
+            tweet["position"] = position
+        return thread
 
     def get_tweet_context(self, tweet_id: str, context_size: int = 3) -> Dict[str, Any]:
         """
@@ -180,42 +803,58 @@ class Search:
         Returns:
             Dictionary with tweet, before_tweets, after_tweets
         """
-        cursor = self.db.conn.cursor()
-
         # Get the tweet
-        cursor.execute("SELECT * FROM tweets WHERE tweet_id = ?", (tweet_id,))
-        tweet = cursor.fetchone()
+        found = self._fan_out(
+            f"""
+            SELECT {TWEET_COLUMNS} FROM {{schema}}.documents d
+            LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+            WHERE d.tweet_id = ?
+            """,
+            [tweet_id],
+            limit=1,
+            sort_key=_tweet_date,
+            source_type=TWEET_SOURCE_TYPE,
+        )
 
-        if not tweet:
+        if not found:
             return {"tweet": None, "before": [], "after": []}
 
-        tweet = dict(tweet)
+        tweet = found[0]
         created_at = tweet["created_at"]
 
         # Get tweets before
-        cursor.execute(
-            """
-            SELECT * FROM tweets
-            WHERE created_at < ?
-            ORDER BY created_at DESC
+        before_tweets = self._fan_out(
+            f"""
+            SELECT {TWEET_COLUMNS} FROM {{schema}}.documents d
+            LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+            WHERE d.tweet_id IS NOT NULL AND d.created_at < ?
+            ORDER BY d.created_at DESC
             LIMIT ?
             """,
-            (created_at, context_size),
+            [created_at, context_size],
+            limit=context_size,
+            sort_key=_tweet_date,
+            reverse=True,
+            source_type=TWEET_SOURCE_TYPE,
+            max_date=created_at,
         )
-        before_tweets = [dict(row) for row in cursor.fetchall()]
         before_tweets.reverse()  # Chronological order
 
         # Get tweets after
-        cursor.execute(
-            """
-            SELECT * FROM tweets
-            WHERE created_at > ?
-            ORDER BY created_at ASC
+        after_tweets = self._fan_out(
+            f"""
+            SELECT {TWEET_COLUMNS} FROM {{schema}}.documents d
+            LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+            WHERE d.tweet_id IS NOT NULL AND d.created_at > ?
+            ORDER BY d.created_at ASC
             LIMIT ?
             """,
-            (created_at, context_size),
+            [created_at, context_size],
+            limit=context_size,
+            sort_key=_tweet_date,
+            source_type=TWEET_SOURCE_TYPE,
+            min_date=created_at,
         )
-        after_tweets = [dict(row) for row in cursor.fetchall()]
 
         return {
             "tweet": tweet,
@@ -234,26 +873,27 @@ class Search:
         Returns:
             List of bookmark dictionaries
         """
-        cursor = self.db.conn.cursor()
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(
-            """
-            SELECT
-                b.tweet_id,
-                b.expanded_url,
-                b.full_text,
-                b.bookmarked_at
-            FROM bookmarks_fts fts
-            JOIN bookmarks b ON b.rowid = fts.rowid
-            WHERE fts.full_text MATCH ?
-            LIMIT ?
-            """,
-            (query, limit),
-        )
+            cursor.execute(
+                """
+                SELECT
+                    b.tweet_id,
+                    b.expanded_url,
+                    b.full_text,
+                    b.bookmarked_at
+                FROM bookmarks_fts fts
+                JOIN bookmarks b ON b.rowid = fts.rowid
+                WHERE fts.full_text MATCH ?
+                LIMIT ?
+                """,
+                (query, limit),
+            )
 
-        results = [dict(row) for row in cursor.fetchall()]
-        logger.info(f"Bookmark search for '{query}' returned {len(results)} results")
-        return results
+            results = [dict(row) for row in cursor.fetchall()]
+            logger.info(f"Bookmark search for '{query}' returned {len(results)} results")
+            return results
 
     def find_hot_takes(
         self, topic: str, min_engagement: int = 10, limit: int = 20
@@ -269,30 +909,16 @@ class Search:
         Returns:
             List of high-engagement tweets about the topic
         """
-        cursor = self.db.conn.cursor()
-
-        cursor.execute(
-            """
-            SELECT
-                t.tweet_id,
-                t.user_id,
-                t.created_at,
-                t.full_text,
-                t.retweet_count,
-                t.favorite_count,
-                (t.retweet_count + t.favorite_count) as total_engagement
-            FROM tweets_fts fts
-            JOIN tweets t ON t.rowid = fts.rowid
-            WHERE fts.full_text MATCH ?
-                AND (t.retweet_count + t.favorite_count) >= ?
-                AND t.is_retweet = 0
-            ORDER BY total_engagement DESC
-            LIMIT ?
-            """,
-            (topic, min_engagement, limit),
+        results = self.search_tweets(
+            topic,
+            limit=limit,
+            include_retweets=False,
+            min_engagement=min_engagement,
+            sort_by="engagement",
         )
+        for tweet in results:
+            tweet["total_engagement"] = (tweet["favorite_count"] or 0) + (tweet["retweet_count"] or 0)
 
-        results = [dict(row) for row in cursor.fetchall()]
         logger.info(f"Found {len(results)} hot takes about '{topic}'")
         return results
 
@@ -307,18 +933,682 @@ class Search:
         Returns:
             List of recent tweets
         """
-        cursor = self.db.conn.cursor()
+        where = "d.tweet_id IS NOT NULL"
+        if not include_replies:
+            where += " AND d.is_reply = 0"
+
+        return self._fan_out(
+            f"""
+            SELECT {TWEET_COLUMNS} FROM {{schema}}.documents d
+            LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+            WHERE {where}
+            ORDER BY d.created_at DESC
+            LIMIT ?
+            """,
+            [limit],
+            sort_key=_tweet_date,
+            reverse=True,
+            limit=limit,
+            source_type=TWEET_SOURCE_TYPE,
+        )
+
+    def iter_tweets(
+        self,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+        include_replies: bool = True,
+        batch_size: int = DEFAULT_FETCH_SIZE,
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Stream every tweet oldest first, across shards.
+
+        Args:
+            min_date: Minimum date (YYYY-MM-DD)
+            max_date: Maximum date (YYYY-MM-DD)
+            include_replies: Include replies
+            batch_size: Rows fetched per round trip from each shard
+
+        Yields:
+            sqlite3.Row with the tweet fields search_tweets returns
+        """
+        where_clauses = ["d.tweet_id IS NOT NULL"]
+        params: List[Any] = []
+        if not include_replies:
+            where_clauses.append("d.is_reply = 0")
+        if min_date:
+            where_clauses.append("d.created_at >= ?")
+            params.append(min_date)
+        if max_date:
+            where_clauses.append("d.created_at <= ?")
+            params.append(max_date)
+
+        yield from self._iter_fan_out(
+            f"""
+            SELECT {TWEET_COLUMNS} FROM {{schema}}.documents d
+            LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+            WHERE {" AND ".join(where_clauses)}
+            ORDER BY d.created_at ASC
+            """,
+            params,
+            sort_key=_tweet_date,
+            source_type=TWEET_SOURCE_TYPE,
+            min_date=min_date,
+            max_date=max_date,
+            batch_size=batch_size,
+        )
+
+    def list_documents(
+        self,
+        tags: Optional[List[str]] = None,
+        match_all: bool = False,
+        source_type: Optional[str] = None,
+        content_type: Optional[str] = None,
+        category: Optional[str] = None,
+        limit: int = 20,
+        after: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        List documents newest first, optionally filtered by tags.
+
+        Args:
+            tags: Tags to filter on (uses the document_tags index)
+            match_all: Require every tag (AND) instead of any tag (OR)
+            source_type: Filter by source type (e.g., 'user', 'file')
+            content_type: Filter by content type (e.g., 'note')
+            category: Filter by metadata category
+            limit: Maximum results
+            after: `cursor` of the last result of the previous page
+
+        Returns:
+            List of document dictionaries (category pulled out of metadata)
+            with the `cursor` continuing after the document
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        where_clauses = []
+        params: List[Any] = []
+
+        if tags:
+            tag_sql, tag_params = Database.tag_filter(tags, match_all=match_all, schema="{schema}")
+            where_clauses.append(tag_sql)
+            params.extend(tag_params)
+
+        if source_type:
+            where_clauses.append("d.source_type = ?")
+            params.append(source_type)
+
+        if content_type:
+            where_clauses.append("d.content_type = ?")
+            params.append(content_type)
+
+        if category:
+            where_clauses.append("json_extract(d.metadata, '$.category') = ?")
+            params.append(category)
 
-        where = "" if include_replies else "WHERE is_reply = 0"
+        if after:
+            where_clauses.append(CREATED_KEYSET.after_sql())
+            params.extend(CREATED_KEYSET.after_params(CREATED_KEYSET.decode(after)))
 
-        cursor.execute(
+        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+        params.append(limit)
+
+        return self._fan_out(
             f"""
-            SELECT * FROM tweets
-            {where}
-            ORDER BY created_at DESC
+            SELECT
+                lower(hex(d.id)) AS id, d.title, pos_body(b.content, b.content_z) AS content,
+                d.content_type, d.source_type,
+                d.tags, d.source_path, d.created_at,
+                json_extract(d.metadata, '$.category') AS category,
+                {CREATED_KEYSET.select_sql()}
+            FROM {{schema}}.documents d
+            LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+            WHERE {where_sql}
+            ORDER BY {CREATED_KEYSET.order_sql()}
             LIMIT ?
             """,
-            (limit,),
+            params,
+            limit=limit,
+            source_type=source_type,
+            keyset=CREATED_KEYSET,
+        )
+
+    def search_documents(
+        self,
+        query: str,
+        content_type: Optional[str] = None,
+        limit: int = 10,
+        mode: str = "keyword",
+        min_score: float = 0.0,
+        after: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search all documents, best matches first.
+
+        Keyword mode matches whole documents and their chunks alike; a
+        chunked document scores by its best match, usually a chunk, and
+        returns that passage rather than the start of the document.
+
+        Args:
+            query: FTS5 search query (plain language for "semantic")
+            content_type: Filter by content type (e.g., 'markdown', 'pdf')
+            limit: Maximum results
+            mode: "keyword" (full-text), "semantic" (see semantic_search) or
+                "hybrid" (see hybrid_search)
+            min_score: Minimum cosine similarity of semantic matches
+            after: `cursor` of the last result of the previous page, from
+                the same keyword query
+
+        Returns:
+            List of document dictionaries with `preview`, `snippet` and the
+            `cursor` continuing after the document, one per distinct body,
+            listing every copy's path in `source_paths`; when a chunk
+            matched best, its `chunk_index` and `passage` (otherwise None).
+            The other modes return their own methods' results
+
+        Raises:
+            ValueError: If the mode is unknown, or the cursor is invalid or
+                given to another mode (fused and vector results do not have
+                an order to seek in)
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', expected one of {list(SEARCH_MODES)}")
+        if after and mode != "keyword":
+            raise ValueError(f"Cursors page keyword searches only, not {mode} mode")
+        if mode == "semantic":
+            return self.semantic_search(
+                query, limit=limit, content_type=content_type, min_score=min_score
+            )
+        if mode == "hybrid":
+            return self.hybrid_search(
+                query, limit=limit, content_type=content_type, min_score=min_score
+            )
+
+        page = DOCUMENT_KEYSET.decode(after) if after else None
+        sql, params = self._search_documents_query(query, content_type, limit, page=page)
+        return self._cached(
+            ("search_documents", normalize_query(query), content_type, limit, after),
+            lambda: self._fan_out(sql, params, limit=limit, keyset=DOCUMENT_KEYSET),
         )
 
-        return [dict(row) for row in cursor.fetchall()]
+    def iter_search_documents(
+        self,
+        query: str,
+        content_type: Optional[str] = None,
+        batch_size: int = DEFAULT_FETCH_SIZE,
+    ) -> Iterator[sqlite3.Row]:
+        """
+        Stream every document matching a full-text query, best matches first.
+
+        Args:
+            query: FTS5 search query
+            content_type: Filter by content type
+            batch_size: Rows fetched per round trip from each shard
+
+        Yields:
+            sqlite3.Row with the keys search_documents returns, with the
+            sort keys as page_0, page_1, ... instead of a `cursor`
+        """
+        sql, params = self._search_documents_query(query, content_type, -1, every_match=True)
+        yield from self._iter_fan_out(
+            sql, params, sort_key=DOCUMENT_KEYSET.sort_key, batch_size=batch_size
+        )
+
+    def _search_documents_query(
+        self,
+        query: str,
+        content_type: Optional[str],
+        limit: int,
+        every_match: bool = False,
+        with_body_key: bool = False,
+        page: Optional[List[Any]] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the shard query behind search_documents.
+
+        Args:
+            query: FTS5 search query
+            content_type: Filter by content type
+            limit: Maximum rows per shard (-1 for all)
+            every_match: Score every match rather than Ranking.candidates
+            with_body_key: Also select `body_key`, which is equal for copies
+            page: Decoded cursor to continue after
+
+        Returns:
+            (SQL, parameters) of a query selecting DOCUMENT_KEYSET.select_sql()
+        """
+        where_clauses = ["1=1"]
+        where_params: List[Any] = []
+
+        if content_type:
+            where_clauses.append("d.content_type = ?")
+            where_params.append(content_type)
+
+        ranked_sql = self._ranked_matches_sql(
+            " AND ".join(where_clauses),
+            DOCUMENT_KEYSET.order_sql(),
+            pooled=not every_match,
+            chunks=True,
+            having=DOCUMENT_KEYSET.after_sql() if page else "",
+        )
+        having_params = DOCUMENT_KEYSET.after_params(page) if page else []
+
+        # bm25 ranks from different shards are merged as-is; each shard
+        # scores against its own term statistics. The snippet and passage
+        # are made for the top rows only, by looking up the matched chunk
+        # or document row again.
+        body_key = "COALESCE(d.body_hash, d.id) AS body_key," if with_body_key else ""
+        sql = f"""
+            {ranked_sql}
+            SELECT
+                {body_key}
+                lower(hex(d.id)) AS id, d.title, d.content_type,
+                d.tags, d.source_path, d.created_at,
+                pos_preview(b.content, b.content_z, 200) AS preview,
+                CASE WHEN ranked.chunk_rowid IS NULL THEN (
+                    SELECT snippet(documents_fts, 1, '<mark>', '</mark>', '...', 40)
+                    FROM {{schema}}.documents_fts
+                    WHERE documents_fts MATCH ? AND rowid = ranked.hit_rowid
+                ) ELSE (
+                    SELECT snippet(chunks_fts, 1, '<mark>', '</mark>', '...', 40)
+                    FROM {{schema}}.chunks_fts
+                    WHERE chunks_fts MATCH ? AND rowid = ranked.chunk_rowid
+                ) END AS snippet,
+                c.chunk_index,
+                substr({chunk_text_sql("c", "{schema}.bodies")}, 1, {PASSAGE_CHARS}) AS passage,
+                ranked.rank,
+                {SOURCE_PATHS_COLUMN},
+                {DOCUMENT_KEYSET.select_sql()}
+            FROM ranked
+            JOIN {{schema}}.documents d ON d.rowid = ranked.doc_rowid
+            LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+            LEFT JOIN {{schema}}.chunks c ON c.rowid = ranked.chunk_rowid
+            ORDER BY {DOCUMENT_KEYSET.order_sql()}
+        """
+        return sql, [query, query, *where_params, *having_params, limit, query, query]
+
+    def semantic_search(
+        self,
+        query: str,
+        limit: int = 10,
+        content_type: Optional[str] = None,
+        source_type: Optional[str] = None,
+        min_score: float = 0.0,
+        include_chunks: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find documents closest in meaning to a query, by embedding similarity.
+
+        Args:
+            query: Plain-language query (no FTS5 syntax)
+            limit: Maximum results
+            content_type: Filter by content type
+            source_type: Filter by source type (e.g., 'twitter', 'file')
+            min_score: Minimum cosine similarity (-1.0 to 1.0)
+            include_chunks: Also match individual chunks of long documents
+
+        Returns:
+            List of document dictionaries, best first, one per distinct body,
+            with `score`, `preview` and `source_paths`; when a chunk matched
+            best, its `chunk_index` and `passage` (otherwise None)
+
+        Raises:
+            RuntimeError: If the Search has no vector index
+        """
+        if self.vectors is None:
+            raise RuntimeError(
+                "Semantic search is not enabled: set search.semantic_search in "
+                "config.yaml and run `proof-of-self embed`"
+            )
+
+        # The vector index changes without the database changing, so its
+        # version is part of the key
+        key = (
+            "semantic_search", normalize_query(query), limit, content_type, source_type,
+            min_score, include_chunks, self.vectors.version(),
+        )
+
+        def compute() -> List[Dict[str, Any]]:
+            results = self._semantic_search(
+                query, limit, content_type, source_type, min_score, include_chunks
+            )
+            for row in results:
+                del row["body_key"]
+            return results
+
+        return self._cached(key, compute)
+
+    def _semantic_search(
+        self,
+        query: str,
+        limit: int,
+        content_type: Optional[str],
+        source_type: Optional[str],
+        min_score: float,
+        include_chunks: bool,
+        hits: Optional[List[Tuple[bytes, int, float]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run semantic_search, fetching more vector matches until enough pass the filters.
+
+        A filter matching few of the indexed documents stops the refetching
+        after SEMANTIC_ROUNDS, so the search never scores the whole index for
+        them and may return fewer than `limit` results. `hits` may hold the
+        first limit * SEMANTIC_OVERFETCH matches, already fetched; the rows
+        keep their `body_key`.
+        """
+        wanted = limit * SEMANTIC_OVERFETCH
+        for _ in range(SEMANTIC_ROUNDS + 1):
+            if hits is None:
+                hits = self.vectors.search_text(
+                    query, wanted, chunks=None if include_chunks else False
+                )
+            exhausted = len(hits) < wanted or hits[-1][2] < min_score
+            hits = [hit for hit in hits if hit[2] >= min_score]
+            results = self._semantic_rows(hits, content_type, source_type, limit)
+            if len(results) >= limit or exhausted:
+                break
+            wanted *= SEMANTIC_OVERFETCH
+            hits = None
+
+        logger.info(f"Semantic search for '{query}' returned {len(results)} results")
+        return results
+
+    def _semantic_rows(
+        self,
+        hits: List[Tuple[bytes, int, float]],
+        content_type: Optional[str],
+        source_type: Optional[str],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Look up the documents behind vector matches, keeping the best match of each.
+
+        Args:
+            hits: (document id, chunk index, score) tuples, best first
+            content_type: Filter by content type
+            source_type: Filter by source type
+            limit: Maximum results
+
+        Returns:
+            Result dictionaries in score order, with `body_key`
+        """
+        best: Dict[bytes, Tuple[int, float]] = {}
+        for doc_key, chunk_index, score in hits:
+            best.setdefault(doc_key, (chunk_index, score))
+        if not best:
+            return []
+
+        where_clauses = ["1=1"]
+        where_params: List[Any] = []
+        if content_type:
+            where_clauses.append("d.content_type = ?")
+            where_params.append(content_type)
+        if source_type:
+            where_clauses.append("d.source_type = ?")
+            where_params.append(source_type)
+
+        # Ids are looked up a batch at a time, best first, until enough
+        # documents pass the filters
+        matches = list(best.items())
+        results: List[Dict[str, Any]] = []
+        seen_bodies = set()
+        with self.db.shard_readers(source_type) as shards:
+            for start in range(0, len(matches), SEMANTIC_ID_BATCH):
+                batch = matches[start:start + SEMANTIC_ID_BATCH]
+                rows: Dict[bytes, Dict[str, Any]] = {}
+                for conn, schema in shards:
+                    sql = SEMANTIC_DOCUMENTS_SQL.format(
+                        schema=schema,
+                        ids=", ".join("?" * len(batch)),
+                        where=" AND ".join(where_clauses),
+                    )
+                    params = [doc_key for doc_key, _ in batch] + where_params
+                    for row in conn.execute(sql, params):
+                        rows[row["doc_key"]] = dict(row)
+
+                for doc_key, (chunk_index, score) in batch:
+                    row = rows.get(doc_key)
+                    if row is None or row["body_key"] in seen_bodies:
+                        continue  # Filtered out, deleted since embedding, or a copy
+                    seen_bodies.add(row["body_key"])
+                    row["score"] = score
+                    row["chunk_index"] = chunk_index if chunk_index >= 0 else None
+                    results.append(row)
+                    if len(results) == limit:
+                        break
+                if len(results) == limit:
+                    break
+
+            # Passages only for the chunks that made it into the results
+            pairs = [
+                (row["doc_key"], row["chunk_index"])
+                for row in results
+                if row["chunk_index"] is not None
+            ]
+            passages: Dict[Tuple[bytes, int], str] = {}
+            if pairs:
+                sql = SEMANTIC_PASSAGES_SQL.format(
+                    schema="{schema}", pairs=", ".join("(?, ?)" for _ in pairs)
+                )
+                for conn, schema in shards:
+                    params = [value for pair in pairs for value in pair]
+                    for row in conn.execute(sql.format(schema=schema), params):
+                        passages[(row["doc_key"], row["chunk_index"])] = row["passage"]
+
+        for row in results:
+            row["passage"] = passages.get((row.pop("doc_key"), row["chunk_index"]))
+        return results
+
+    def hybrid_search(
+        self,
+        query: str,
+        limit: int = 10,
+        content_type: Optional[str] = None,
+        min_score: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search by keywords and by meaning at once, merging the two result lists.
+
+        The full-text query finds exact names, hashtags and phrases; the
+        vector query finds paraphrases. Both run concurrently, then their
+        results are merged with reciprocal rank fusion weighted by
+        Ranking.keyword_weight and Ranking.semantic_weight (a leg weighted 0
+        is not run). A chunk match counts for its document.
+
+        Args:
+            query: Search query, used as FTS5 syntax and embedded as text
+            limit: Maximum results
+            content_type: Filter by content type
+            min_score: Minimum cosine similarity of semantic matches
+
+        Returns:
+            List of document dictionaries, best first, one per distinct body,
+            with the fused `score`, the full-text `snippet` and bm25 `rank`
+            and the semantic `similarity` (None when that leg did not find
+            the document), and the best matching chunk's `chunk_index` and
+            `passage` (None when no chunk matched)
+
+        Raises:
+            RuntimeError: If the Search has no vector index
+        """
+        if self.vectors is None:
+            raise RuntimeError(
+                "Hybrid search needs semantic search: set search.semantic_search in "
+                "config.yaml and run `proof-of-self embed`"
+            )
+
+        key = (
+            "hybrid_search", normalize_query(query), limit, content_type, min_score,
+            self.vectors.version(),
+        )
+        return self._cached(
+            key, lambda: self._hybrid_search(query, limit, content_type, min_score)
+        )
+
+    def _hybrid_search(
+        self, query: str, limit: int, content_type: Optional[str], min_score: float
+    ) -> List[Dict[str, Any]]:
+        """Run hybrid_search: the vector leg on a worker, the full-text leg here."""
+        depth = limit * HYBRID_DEPTH
+
+        vector_hits = None
+        if self.ranking.semantic_weight:
+            vector_hits = self._vector_executor().submit(
+                self.vectors.search_text, query, depth * SEMANTIC_OVERFETCH
+            )
+        keyword: List[Dict[str, Any]] = []
+        try:
+            if self.ranking.keyword_weight:
+                sql, params = self._search_documents_query(
+                    query, content_type, depth, with_body_key=True
+                )
+                keyword = self._fan_out(sql, params, limit=depth, keyset=DOCUMENT_KEYSET)
+        except Exception:
+            if vector_hits is not None:
+                vector_hits.cancel()
+            raise
+
+        semantic: List[Dict[str, Any]] = []
+        if vector_hits is not None:
+            semantic = self._semantic_search(
+                query, depth, content_type, None, min_score, True, hits=vector_hits.result()
+            )
+
+        keyword_rows = {row["body_key"]: row for row in keyword}
+        semantic_rows = {row["body_key"]: row for row in semantic}
+        fused = reciprocal_rank_fusion(
+            [
+                (self.ranking.keyword_weight, list(keyword_rows)),
+                (self.ranking.semantic_weight, list(semantic_rows)),
+            ],
+            k=self.ranking.rrf_k,
+        )
+
+        results = []
+        for body_key, score in fused[:limit]:
+            match = keyword_rows.get(body_key)
+            similar = semantic_rows.get(body_key)
+            row = {field: (match or similar)[field] for field in HYBRID_FIELDS}
+            row["score"] = score
+            row["snippet"] = match["snippet"] if match else None
+            row["rank"] = match["rank"] if match else None
+            row["similarity"] = similar["score"] if similar else None
+            # The chunk closest in meaning, else the best full-text chunk
+            best = similar if similar and similar["passage"] else match
+            row["chunk_index"] = best["chunk_index"] if best else None
+            row["passage"] = best["passage"] if best else None
+            results.append(row)
+
+        logger.info(
+            f"Hybrid search for '{query}' returned {len(results)} results "
+            f"({len(keyword)} keyword, {len(semantic)} semantic matches)"
+        )
+        return results
+
+    def get_passages(
+        self, document_id: str, start: int = 0, count: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Read consecutive chunks (passages) of a long document.
+
+        Pages through the text around a passage a search returned: pass the
+        last chunk_index read + 1 as `start` to read on.
+
+        Args:
+            document_id: Document ID a search returned
+            start: First chunk_index to read
+            count: Maximum chunks
+
+        Returns:
+            List of dictionaries with chunk_index, content and chunk_count
+            (the document's number of chunks); empty past the last chunk or
+            for a document without chunks
+        """
+        params = [document_key(document_id), max(start, 0), count]
+        with self.db.shard_readers() as shards:
+            for conn, schema in shards:
+                rows = conn.execute(PASSAGES_SQL.format(schema=schema), params).fetchall()
+                if rows:
+                    return [dict(row) for row in rows]
+        return []
+
+    def _vector_executor(self) -> ThreadPoolExecutor:
+        """Executor for the vector leg of hybrid searches, started on first use."""
+        with self._vector_pool_lock:
+            if self._vector_pool is None:
+                self._vector_pool = ThreadPoolExecutor(
+                    max_workers=VECTOR_WORKERS, thread_name_prefix="pos-vectors"
+                )
+            return self._vector_pool
+
+    def list_recent_documents(
+        self,
+        content_type: Optional[str] = None,
+        limit: int = 10,
+        after: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        List the most recently indexed documents.
+
+        Args:
+            content_type: Filter by content type
+            limit: Maximum results
+            after: `cursor` of the last result of the previous page
+
+        Returns:
+            List of document dictionaries with a short `preview` and the
+            `cursor` continuing after the document
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        where_clauses = ["1=1"]
+        params: List[Any] = []
+
+        if content_type:
+            where_clauses.append("d.content_type = ?")
+            params.append(content_type)
+
+        if after:
+            where_clauses.append(RECENT_KEYSET.after_sql())
+            params.extend(RECENT_KEYSET.after_params(RECENT_KEYSET.decode(after)))
+
+        params.append(limit)
+
+        sql = f"""
+            SELECT
+                lower(hex(d.id)) AS id, d.title, d.content_type, d.tags, d.source_path,
+                d.created_at, d.indexed_at, pos_preview(b.content, b.content_z, 150) AS preview,
+                {RECENT_KEYSET.select_sql()}
+            FROM {{schema}}.documents d
+            LEFT JOIN {{schema}}.bodies b ON b.hash = d.body_hash
+            WHERE {" AND ".join(where_clauses)}
+            ORDER BY {RECENT_KEYSET.order_sql()}
+            LIMIT ?
+        """
+        return self._cached(
+            ("list_recent_documents", content_type, limit, after),
+            lambda: self._fan_out(sql, params, limit=limit, keyset=RECENT_KEYSET),
+        )
+
+    def tag_counts(
+        self,
+        source_type: Optional[str] = None,
+        content_type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Count documents per tag, most used first.
+
+        Args:
+            source_type: Only count documents from this source
+            content_type: Only count documents of this content type
+            limit: Maximum number of tags to return
+
+        Returns:
+            Mapping of tag to document count
+        """
+        return self.db.tag_counts(
+            source_type=source_type, content_type=content_type, limit=limit
+        )
@@ -0,0 +1,512 @@
+"""
+Time-sharded storage for Proof-of-Self
+
+Splits the archive into one SQLite file per source type and year, so
+VACUUM, backups and FTS rebuilds only touch the shards that still change.
+A JSON manifest records each shard's date range; searches attach only the
+shards whose range can match and merge their results.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from proof_of_self.core.compression import register_functions
+from proof_of_self.core.database import DEFAULT_BATCH_SIZE, FTS_TABLES, Database
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# SQLite's default limit on databases attached to one connection
+DEFAULT_MAX_ATTACHED = 10
+
+
+def shard_name(source_type: str, year: int) -> str:
+    """Name (and file stem) of the shard holding a source type's year."""
+    return f"{re.sub(r'[^A-Za-z0-9_]+', '_', source_type)}-{year}"
+
+
+def _shard_year(created_at: Any) -> int:
+    """Year a document belongs to (undated documents go in the current year)."""
+    if isinstance(created_at, datetime):
+        return created_at.year
+    if isinstance(created_at, str) and created_at[:4].isdigit():
+        return int(created_at[:4])
+    return datetime.now().year
+
+
+class ShardManifest:
+    """JSON index of the shards in a shard directory."""
+
+    def __init__(self, path: Path):
+        """
+        Load the manifest (an absent file is an empty manifest).
+
+        Args:
+            path: Path to manifest.json
+        """
+        self.path = Path(path)
+        self.shards: Dict[str, Dict[str, Any]] = {}
+
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(
+                    f"Unsupported shard manifest version {data.get('version')} in {self.path}"
+                )
+            self.shards = data["shards"]
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        tmp_path = self.path.with_suffix(".tmp")
+        data = {"version": MANIFEST_VERSION, "shards": self.shards}
+        tmp_path.write_text(json.dumps(data, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
+
+    def matching(
+        self,
+        source_type: Optional[str] = None,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+    ) -> List[str]:
+        """
+        Names of shards that can hold documents matching the filters.
+
+        Args:
+            source_type: Only shards of this source type
+            min_date: Skip shards whose newest document is older (YYYY-MM-DD)
+            max_date: Skip shards whose oldest document is newer (YYYY-MM-DD)
+
+        Returns:
+            Shard names, newest year first
+        """
+        names = []
+        for name, entry in self.shards.items():
+            if not entry["documents"]:
+                continue
+            if source_type and entry["source_type"] != source_type:
+                continue
+            # Compare on the date prefix so "2024-01-01" matches "2024-01-01 09:30:00"
+            if min_date and entry["max_created_at"][: len(min_date)] < min_date:
+                continue
+            if max_date and entry["min_created_at"][: len(max_date)] > max_date:
+                continue
+            names.append(name)
+        return sorted(names, key=lambda name: (-self.shards[name]["year"], name))
+
+
+class ShardedDatabase:
+    """
+    One Database per (source type, year), tied together by a manifest.
+
+    Writes are routed to the shard for each document's source type and
+    created_at year. Search fans its queries out through shard_readers(),
+    the same interface a single Database provides, and AsyncDatabase drives
+    it like one. Chunked documents are written through shard() directly so
+    chunks land next to their document.
+    """
+
+    def __init__(self, shard_dir: str, **database_options: Any):
+        """
+        Open a shard directory (created if missing).
+
+        Args:
+            shard_dir: Directory holding the shard files and manifest.json
+            **database_options: Database keyword arguments used when opening
+                shards for writing (wal_mode, compression, ...). Each read
+                attaches the shards on a connection of its own, so
+                read_pool_size only sets how many reads AsyncDatabase runs
+                at once.
+        """
+        self.shard_dir = Path(shard_dir)
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = ShardManifest(self.shard_dir / MANIFEST_NAME)
+        self.read_pool_size = database_options.pop("read_pool_size", 0)
+        self.database_options = database_options
+        self.busy_timeout_ms = database_options.get("busy_timeout_ms", 5000)
+        self._writers: Dict[str, Database] = {}
+        self._progress_handler: Optional[Tuple[Callable[[], int], int]] = None
+
+    def shard(self, source_type: str, year: int) -> Database:
+        """
+        Get the writable Database for a source type's year, creating it.
+
+        Raises:
+            ValueError: If the shard has been frozen (call thaw() first)
+        """
+        name = shard_name(source_type, year)
+        if name in self._writers:
+            return self._writers[name]
+
+        entry = self.manifest.shards.get(name)
+        if entry and entry["cold"]:
+            raise ValueError(f"Shard {name} is cold (read-only); thaw it before writing")
+
+        if entry is None:
+            self.manifest.shards[name] = {
+                "file": f"{name}.db",
+                "source_type": source_type,
+                "year": year,
+                "min_created_at": "",
+                "max_created_at": "",
+                "documents": 0,
+                "cold": False,
+            }
+            self.manifest.save()
+            logger.info(f"Created shard {name}")
+
+        database = Database(str(self._path(name)), **self.database_options)
+        if self._progress_handler:
+            database.set_progress_handler(*self._progress_handler)
+        self._writers[name] = database
+        return database
+
+    def _path(self, name: str) -> Path:
+        return self.shard_dir / self.manifest.shards[name]["file"]
+
+    def shard_files(self) -> Dict[str, Path]:
+        """Path of every shard's file, by shard name."""
+        return {name: self._path(name) for name in sorted(self.manifest.shards)}
+
+    def warm_shards(self) -> Iterator[Tuple[str, Database]]:
+        """
+        Open every shard that is not cold for writing, e.g. for maintenance.
+
+        Yields:
+            (shard name, writable Database), in name order
+        """
+        for name, entry in sorted(self.manifest.shards.items()):
+            if not entry["cold"]:
+                yield name, self.shard(entry["source_type"], entry["year"])
+
+    def insert_documents_many(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[int]:
+        """
+        Insert documents, each into the shard for its source type and year.
+
+        Args:
+            documents: Iterable of dicts using the keyword names of insert_document
+            batch_size: Number of rows written per transaction and shard
+
+        Returns:
+            Number of rows written by each batch, shard by shard
+        """
+        grouped: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        for document in documents:
+            key = (document["source_type"], _shard_year(document.get("created_at")))
+            grouped.setdefault(key, []).append(document)
+
+        batch_counts: List[int] = []
+        for (source_type, year), batch in grouped.items():
+            database = self.shard(source_type, year)
+            batch_counts.extend(database.insert_documents_many(batch, batch_size))
+            self.refresh(shard_name(source_type, year))
+
+        self.manifest.save()
+        return batch_counts
+
+    def insert_document(self, **document: Any) -> None:
+        """Insert one document (same keywords as Database.insert_document)."""
+        self.insert_documents_many([document])
+
+    def insert_thought(
+        self,
+        content: str,
+        tags: Optional[List[str]] = None,
+        category: Optional[str] = None,
+    ) -> str:
+        """
+        Save a thought into the current year's user shard.
+
+        Same arguments and return value as Database.insert_thought.
+        """
+        year = datetime.now().year
+        doc_id = self.shard("user", year).insert_thought(content, tags=tags, category=category)
+        self.refresh(shard_name("user", year))
+        self.manifest.save()
+        return doc_id
+
+    def refresh(self, name: str) -> None:
+        """Update a shard's manifest entry from its contents (not saved)."""
+        database = self._writers.get(name)
+        if database is None:
+            return
+        row = database.conn.execute(
+            "SELECT MIN(created_at), MAX(created_at), COUNT(*) FROM documents"
+        ).fetchone()
+        entry = self.manifest.shards[name]
+        entry["min_created_at"] = str(row[0] or "")
+        entry["max_created_at"] = str(row[1] or "")
+        entry["documents"] = row[2]
+
+    def freeze(self, name: str) -> None:
+        """
+        Compact a shard and mark it cold.
+
+        Cold shards are never written again, so readers open them with
+        immutable=1 and skip file locking and change detection entirely.
+        """
+        database = self._writers.pop(name, None) or Database(
+            str(self._path(name)), **self.database_options
+        )
+        try:
+            for table in FTS_TABLES:
+                database.conn.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+            database.conn.commit()
+            # Immutable readers cannot see a WAL, so fold it back into the file
+            database.conn.execute("PRAGMA journal_mode = DELETE")
+            database.conn.execute("VACUUM")
+        finally:
+            database.close()
+
+        self.manifest.shards[name]["cold"] = True
+        self.manifest.save()
+        logger.info(f"Froze shard {name}")
+
+    def freeze_before(self, year: int) -> List[str]:
+        """
+        Freeze every warm shard older than `year`.
+
+        Returns:
+            Names of the shards frozen
+        """
+        names = [
+            name
+            for name, entry in self.manifest.shards.items()
+            if entry["year"] < year and not entry["cold"]
+        ]
+        for name in names:
+            self.freeze(name)
+        return names
+
+    def thaw(self, name: str) -> None:
+        """Mark a cold shard writable again."""
+        self.manifest.shards[name]["cold"] = False
+        self.manifest.save()
+
+    @contextmanager
+    def shard_readers(
+        self,
+        source_type: Optional[str] = None,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+    ) -> Iterator[List[Tuple[sqlite3.Connection, str]]]:
+        """
+        Attach the shards that can match and yield (connection, schema) pairs.
+
+        Shards are attached read-only, at most DEFAULT_MAX_ATTACHED per
+        connection; queries address each one as `{schema}.documents`.
+
+        Args:
+            source_type: Only shards of this source type
+            min_date: Skip shards entirely older than this date
+            max_date: Skip shards entirely newer than this date
+
+        Yields:
+            List of (connection, schema name) pairs
+        """
+        names = self.manifest.matching(source_type, min_date, max_date)
+
+        with ExitStack() as stack:
+            readers = []
+            for start in range(0, len(names), DEFAULT_MAX_ATTACHED):
+                group = names[start:start + DEFAULT_MAX_ATTACHED]
+                conn = self._attach(group)
+                stack.callback(conn.close)
+                readers.extend((conn, f"s{i}") for i in range(len(group)))
+            yield readers
+
+    def set_progress_handler(self, handler: Callable[[], int], n: int) -> None:
+        """
+        Install a SQLite progress handler on the writers and every reader.
+
+        Readers attached after this call get the handler too.
+
+        Args:
+            handler: Called every `n` VM instructions; a nonzero return
+                interrupts the running statement
+            n: Instructions between calls
+        """
+        self._progress_handler = (handler, n)
+        for database in self._writers.values():
+            database.set_progress_handler(handler, n)
+
+    def data_version(self) -> Optional[Tuple[Any, ...]]:
+        """
+        Get a value that changes whenever any shard's data may have changed.
+
+        Combines the open writers' Database.data_version() with the size and
+        mtime of each shard file and its WAL, which move when another
+        process writes.
+
+        Returns:
+            Tuple of versions, or None while a writer has a transaction open
+        """
+        versions: List[Any] = []
+        for name in sorted(self._writers):
+            version = self._writers[name].data_version()
+            if version is None:
+                return None
+            versions.append(version)
+
+        for name in sorted(self.manifest.shards):
+            path = self._path(name)
+            for file in (path, path.with_name(f"{path.name}-wal")):
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                versions.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(versions)
+
+    def _attach(self, names: List[str]) -> sqlite3.Connection:
+        """Open a connection with the given shards attached as s0, s1, ..."""
+        conn = sqlite3.connect(
+            ":memory:", uri=True, timeout=self.busy_timeout_ms / 1000, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        register_functions(conn)
+        if self._progress_handler:
+            conn.set_progress_handler(*self._progress_handler)
+        for i, name in enumerate(names):
+            mode = "mode=ro&immutable=1" if self.manifest.shards[name]["cold"] else "mode=ro"
+            conn.execute(
+                f"ATTACH DATABASE ? AS s{i}", (f"{self._path(name).resolve().as_uri()}?{mode}",)
+            )
+        return conn
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get statistics summed over every shard's counters."""
+        counters: Dict[Tuple[str, str], int] = {}
+        with self.shard_readers() as shards:
+            for conn, schema in shards:
+                for row in conn.execute(
+                    f"SELECT dimension, key, count FROM {schema}.doc_counters WHERE count != 0"
+                ):
+                    key = (row["dimension"], row["key"])
+                    counters[key] = counters.get(key, 0) + row["count"]
+
+        stats = Database.stats_from_counters(counters)
+        stats["shards"] = len(self.manifest.shards)
+        return stats
+
+    def tag_counts(
+        self,
+        source_type: Optional[str] = None,
+        content_type: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """Count documents per tag over every shard (see Database.tag_counts)."""
+        counts: Dict[str, int] = {}
+        with self.shard_readers(source_type) as shards:
+            for conn, schema in shards:
+                sql, params = Database.tag_counts_sql(source_type, content_type, schema)
+                for row in conn.execute(sql, params):
+                    counts[row["tag"]] = counts.get(row["tag"], 0) + row["count"]
+
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return dict(ranked[:limit] if limit else ranked)
+
+    @classmethod
+    def split(
+        cls,
+        source: Database,
+        shard_dir: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        **database_options: Any,
+    ) -> "ShardedDatabase":
+        """
+        Copy a single-file database into a new shard directory.
+
+        Args:
+            source: Database to read from (left unchanged)
+            shard_dir: Directory for the shards and manifest
+            batch_size: Documents written per transaction
+            **database_options: Database keyword arguments for the shards
+
+        Returns:
+            ShardedDatabase over the new directory
+        """
+        sharded = cls(shard_dir, **database_options)
+
+        cursor = source.conn.execute(
+            """
+            SELECT lower(hex(d.id)) AS id, d.source_type, d.content_type, d.title, d.author,
+                   pos_body(b.content, b.content_z) AS content, d.source_path,
+                   d.is_chunked, d.metadata, d.tags, d.created_at
+            FROM documents d
+            LEFT JOIN bodies b ON b.hash = d.body_hash
+            ORDER BY d.created_at
+            """
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            sharded.insert_documents_many(
+                [
+                    {
+                        "doc_id": row["id"],
+                        "source_type": row["source_type"],
+                        "content_type": row["content_type"],
+                        "title": row["title"],
+                        "author": row["author"],
+                        "content": row["content"],
+                        "source_path": row["source_path"],
+                        "is_chunked": bool(row["is_chunked"]),
+                        "metadata": json.loads(row["metadata"]) if row["metadata"] else None,
+                        "tags": json.loads(row["tags"]) if row["tags"] else None,
+                        "created_at": row["created_at"],
+                    }
+                    for row in rows
+                ],
+                batch_size,
+            )
+            for row in rows:
+                if row["is_chunked"]:
+                    sharded._copy_chunks(source, row)
+
+        logger.info(f"Split {source.db_path} into {len(sharded.manifest.shards)} shards")
+        return sharded
+
+    def _copy_chunks(self, source: Database, document: sqlite3.Row) -> None:
+        """Copy one document's chunks into its shard."""
+        database = self.shard(document["source_type"], _shard_year(document["created_at"]))
+        database.insert_chunks_many(
+            {
+                "chunk_id": chunk["id"],
+                "document_id": chunk["document_id"],
+                "chunk_index": chunk["chunk_index"],
+                # Spans stay spans: the shard stores the same body text
+                "content": chunk["content"] if chunk["start_offset"] is None else None,
+                "start_offset": chunk["start_offset"],
+                "end_offset": chunk["end_offset"],
+                "metadata": json.loads(chunk["metadata"]) if chunk["metadata"] else None,
+            }
+            for chunk in source.get_chunks(document["id"])
+        )
+
+    def close(self) -> None:
+        """Close the writable shards."""
+        for database in self._writers.values():
+            database.close()
+        self._writers.clear()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
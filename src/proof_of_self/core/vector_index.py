@@ -0,0 +1,806 @@
+"""
+Vector index for Proof-of-Self semantic search
+
+Holds one embedding per distinct document body and one per chunk, in a
+directory next to the database file:
+
+    proof-of-self.db.vectors/
+        manifest.json          embedder, dim, dtype, count, generation, nlist
+        vectors-<gen>.npy      (count, dim) matrix, memory-mapped for search
+        keys-<gen>.npy         (count,) keys: 16-byte document id + chunk index
+        centroids-<gen>.npy    (nlist, dim) IVF list centroids
+        offsets-<gen>.npy      (nlist + 1,) first row of each list
+        delta-vectors-<gen>.bin, delta-keys-<gen>.bin
+                               raw rows appended by add() since <gen>
+
+Once an index reaches ann_min_vectors, its rows are stored grouped by IVF
+list (see core/ivf.py) and a search reads only the lists nearest the
+query; smaller indexes are scanned in full. Writes produce a new generation
+and then swap the manifest, so a server reading the old generation keeps a
+consistent view until it reloads. Documents embedded as they are indexed
+are appended to the generation's delta instead, which searches scan in
+full and the next rewrite folds into the lists.
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from proof_of_self.core.chunker import document_key
+from proof_of_self.core.database import DEFAULT_FETCH_SIZE, chunk_text_sql, iter_cursor
+from proof_of_self.core.embeddings import Embedder, np, require_numpy
+from proof_of_self.core.ivf import (
+    DEFAULT_ANN_MIN_VECTORS,
+    DEFAULT_NPROBE,
+    KMEANS_SAMPLE_PER_LIST,
+    assign_lists,
+    default_nlist,
+    needs_training,
+    probe_lists,
+    train_centroids,
+)
+
+logger = logging.getLogger(__name__)
+
+# Storage type of the vectors; float16 halves the file, but every search
+# then converts the matrix to float32 (several times slower)
+DEFAULT_VECTOR_DTYPE = "float32"
+VECTOR_DTYPES = ("float16", "float32")
+
+# Texts embedded per embedder call
+DEFAULT_EMBED_BATCH = 256
+
+# Matrix rows scored per step of a search
+SEARCH_BLOCK_ROWS = 16384
+
+# Characters of a document or chunk that are embedded
+EMBED_TEXT_CHARS = 2000
+
+# Chunk index recorded for a whole-document vector
+DOCUMENT_VECTOR = -1
+
+# Documents whose texts are read per query when embedding
+_ID_BATCH = 500
+
+# Vectors add() appends to a generation's delta, which every search scans
+# in full, before it folds them into the IVF lists with a rewrite
+MAX_DELTA_ROWS = 20000
+
+MANIFEST_NAME = "manifest.json"
+
+# Vectors embedded by update() before they are written into a generation
+STAGING_NAME = "staging.npy"
+
+# Key of a vector: the document's 16-byte id and a big-endian chunk index
+_KEY = struct.Struct(">16si")
+_KEY_DTYPE = f"S{_KEY.size}"
+
+# One row per distinct body (its first copy, which search results widen to
+# the other copies) plus documents without a body
+DOCUMENT_TEXTS_SQL = """
+    SELECT d.id AS doc_key, -1 AS chunk_index, {text} AS text
+    FROM {schema}.documents d
+    LEFT JOIN {schema}.bodies b ON b.hash = d.body_hash
+    WHERE (d.body_hash IS NULL OR NOT EXISTS (
+        SELECT 1 FROM {schema}.documents o
+        WHERE o.body_hash = d.body_hash AND o.rowid < d.rowid
+    )) {filter}
+"""
+
+# Chunks in storage order, so consecutive spans reuse the decoded body
+CHUNK_TEXTS_SQL = """
+    SELECT d.id AS doc_key, c.chunk_index, {text} AS text
+    FROM {schema}.chunks c
+    JOIN {schema}.documents d ON d.rowid = c.document_id
+    WHERE 1=1 {filter}
+    ORDER BY c.rowid
+"""
+
+
+def vector_index_path(db_path: Union[str, Path]) -> Path:
+    """Default index directory for a database file (or shard directory)."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.name}.vectors")
+
+
+def pack_key(doc_key: bytes, chunk_index: int) -> bytes:
+    """Vector key for a document (chunk_index DOCUMENT_VECTOR) or one of its chunks."""
+    return _KEY.pack(doc_key, chunk_index)
+
+
+def unpack_key(key: bytes) -> Tuple[bytes, int]:
+    """(document id, chunk index) of a vector key."""
+    # NumPy drops trailing NUL bytes from fixed-width byte strings
+    return _KEY.unpack(key.ljust(_KEY.size, b"\0"))
+
+
+def _text_sql(template: str, schema: str, with_text: bool, filter_sql: str = "") -> str:
+    """Fill in DOCUMENT_TEXTS_SQL or CHUNK_TEXTS_SQL for one shard."""
+    if not with_text:
+        text = "NULL"
+    elif template is DOCUMENT_TEXTS_SQL:
+        text = (
+            "COALESCE(d.title || char(10), '') || "
+            f"COALESCE(pos_preview(b.content, b.content_z, {EMBED_TEXT_CHARS}), '')"
+        )
+    else:
+        text = f"substr({chunk_text_sql('c', f'{schema}.bodies')}, 1, {EMBED_TEXT_CHARS})"
+    return template.format(schema=schema, text=text, filter=filter_sql)
+
+
+def _is_chunk(keys: "np.ndarray") -> "np.ndarray":
+    """Whether each key is a chunk's (its last 4 bytes are a big-endian chunk index)."""
+    chunk_index = keys.view(np.uint8).reshape(-1, _KEY.size)[:, 16:]
+    return chunk_index.copy().view(">i4").ravel() != DOCUMENT_VECTOR
+
+
+def _keep_best(
+    scores: List["np.ndarray"], rows: List["np.ndarray"], k: int
+) -> Tuple[List["np.ndarray"], List["np.ndarray"]]:
+    """Merge blocks of (queries, rows) scores, keeping the k best rows per query."""
+    merged_scores = np.concatenate(scores, axis=1)
+    merged_rows = np.concatenate(rows, axis=1)
+    if merged_scores.shape[1] > k:
+        top = np.argpartition(merged_scores, -k, axis=1)[:, -k:]
+        merged_scores = np.take_along_axis(merged_scores, top, axis=1)
+        merged_rows = np.take_along_axis(merged_rows, top, axis=1)
+    return [merged_scores], [merged_rows]
+
+
+class _Snapshot(NamedTuple):
+    """Arrays of one loaded generation."""
+
+    vectors: Any  # (count, dim) memory map, rows grouped by list
+    keys: Any  # (count + delta rows,) vector keys in the same order, then the delta's
+    is_chunk: Any  # (count + delta rows,) whether each row is a chunk's vector
+    offsets: Any  # (nlist + 1,) first row of each list, then count
+    centroids: Any  # (nlist, dim) list centroids, or None for a flat index
+    delta: Any  # (delta rows, dim) memory map of rows appended since, numbered after count
+
+
+def _block(snapshot: _Snapshot, start: int, stop: int) -> Any:
+    """Vectors of rows start..stop, which lie either in the generation or in its delta."""
+    count = len(snapshot.vectors)
+    if start >= count:
+        return snapshot.delta[start - count:stop - count]
+    return snapshot.vectors[start:stop]
+
+
+def _take(snapshot: _Snapshot, rows: "np.ndarray") -> "np.ndarray":
+    """Vectors of any rows of a snapshot, delta rows included."""
+    out = np.empty((len(rows), snapshot.vectors.shape[1]), dtype=np.float32)
+    count = len(snapshot.vectors)
+    in_generation = rows < count
+    out[in_generation] = snapshot.vectors[rows[in_generation]]
+    out[~in_generation] = snapshot.delta[rows[~in_generation] - count]
+    return out
+
+
+class VectorIndex:
+    """Memory-mapped embeddings of documents and chunks, searched by cosine similarity."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        embedder: Embedder,
+        nprobe: int = DEFAULT_NPROBE,
+        ann_min_vectors: int = DEFAULT_ANN_MIN_VECTORS,
+    ):
+        """
+        Open (or prepare to create) an index directory.
+
+        Args:
+            path: Index directory (see vector_index_path)
+            embedder: Embedder for queries and new rows; must be the one
+                the index was built with
+            nprobe: IVF lists searched per query; higher finds more of the
+                true nearest neighbours and takes longer
+            ann_min_vectors: Index size from which writes partition the
+                vectors into IVF lists (smaller indexes are searched exactly)
+        """
+        require_numpy()
+        if nprobe < 1:
+            raise ValueError(f"nprobe must be at least 1, got {nprobe}")
+        self.path = Path(path)
+        self.embedder = embedder
+        self.nprobe = nprobe
+        self.ann_min_vectors = ann_min_vectors
+        self._lock = threading.Lock()
+        self._loaded: Optional[Tuple[int, int]] = None
+        self._snapshot_arrays = _Snapshot(
+            vectors=np.zeros((0, embedder.dim), dtype=np.float32),
+            keys=np.zeros(0, dtype=_KEY_DTYPE),
+            is_chunk=np.zeros(0, dtype=bool),
+            offsets=np.zeros(2, dtype=np.int64),
+            centroids=None,
+            delta=np.zeros((0, embedder.dim), dtype=np.float32),
+        )
+        # Generation number and snapshot (without delta) it was last loaded as
+        self._generation: Optional[Tuple[int, _Snapshot]] = None
+
+    def version(self) -> Optional[Tuple[int, int]]:
+        """
+        Get a value that changes whenever the index is written.
+
+        Returns:
+            (inode, mtime_ns) of the manifest, or None if there is no index
+        """
+        try:
+            stat = (self.path / MANIFEST_NAME).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _snapshot(self) -> _Snapshot:
+        """
+        Load the current generation if it changed, and return its arrays.
+
+        Only the keys are read into memory; vectors and centroids are
+        memory-mapped, so loading a large index is quick. When only the
+        delta grew, the generation's arrays are reused.
+
+        Raises:
+            ValueError: If the index was built with a different embedder
+        """
+        with self._lock:
+            version = self.version()
+            if version is not None and version != self._loaded:
+                manifest = json.loads((self.path / MANIFEST_NAME).read_text(encoding="utf-8"))
+                if manifest["embedder"] != self.embedder.name:
+                    raise ValueError(
+                        f"Vector index {self.path} was built with '{manifest['embedder']}', "
+                        f"not '{self.embedder.name}'; "
+                        "rebuild it with `proof-of-self embed --rebuild`"
+                    )
+                generation = manifest["generation"]
+                if self._generation is None or self._generation[0] != generation:
+                    self._generation = generation, self._load_generation(manifest)
+                base = self._generation[1]
+
+                delta_count = manifest.get("delta_count", 0)
+                delta = np.zeros((0, self.embedder.dim), dtype=np.float32)
+                delta_keys = np.zeros(0, dtype=_KEY_DTYPE)
+                if delta_count:
+                    vectors_path, keys_path = self._delta_paths(generation)
+                    delta = np.memmap(
+                        vectors_path,
+                        dtype=manifest["dtype"],
+                        mode="r",
+                        shape=(delta_count, self.embedder.dim),
+                    )
+                    delta_keys = np.fromfile(keys_path, dtype=_KEY_DTYPE, count=delta_count)
+                self._snapshot_arrays = base._replace(
+                    keys=np.concatenate([base.keys, delta_keys]),
+                    is_chunk=np.concatenate([base.is_chunk, _is_chunk(delta_keys)]),
+                    delta=delta,
+                )
+                self._loaded = version
+                logger.info(f"Loaded {manifest['count'] + delta_count} vectors from {self.path}")
+            return self._snapshot_arrays
+
+    def _load_generation(self, manifest: Dict[str, Any]) -> _Snapshot:
+        """Arrays of the manifest's generation, without its delta."""
+        generation = manifest["generation"]
+        count = manifest["count"]
+        keys = np.load(self.path / f"keys-{generation}.npy")[:count]
+        centroids = None
+        offsets = np.array([0, count], dtype=np.int64)
+        if manifest.get("nlist"):
+            centroids = np.load(self.path / f"centroids-{generation}.npy", mmap_mode="r")
+            offsets = np.load(self.path / f"offsets-{generation}.npy")
+        return _Snapshot(
+            vectors=np.load(self.path / f"vectors-{generation}.npy", mmap_mode="r")[:count],
+            keys=keys,
+            is_chunk=_is_chunk(keys),
+            offsets=offsets,
+            centroids=centroids,
+            delta=None,
+        )
+
+    def __len__(self) -> int:
+        """Number of vectors in the index."""
+        return len(self._snapshot().keys)
+
+    def search(
+        self,
+        queries: "np.ndarray",
+        k: int,
+        chunks: Optional[bool] = None,
+        nprobe: Optional[int] = None,
+        exact: bool = False,
+    ) -> List[List[Tuple[bytes, int, float]]]:
+        """
+        Find the k vectors most similar to each query vector.
+
+        A partitioned index scores the rows of the `nprobe` lists nearest
+        each query (approximate); a flat one, or `exact`, scores every row,
+        for all queries in one pass over the matrix. Rows in the delta are
+        always scored.
+
+        Args:
+            queries: Unit-length query vectors, shape (dim,) or (n, dim)
+            k: Matches per query
+            chunks: True for chunk vectors only, False for document vectors
+                only, None for both
+            nprobe: Lists searched per query (default: VectorIndex.nprobe)
+            exact: Score every vector even if the index is partitioned
+
+        Returns:
+            Per query, up to k (document id, chunk index, cosine) tuples,
+            best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        snapshot = self._snapshot()
+        if k < 1:
+            return [[] for _ in queries]
+
+        count = len(snapshot.vectors)
+        delta = [(count, len(snapshot.keys))] if len(snapshot.keys) > count else []
+        if snapshot.centroids is None or exact:
+            ranges = [(0, count), *delta]
+            return self._top_k(snapshot, queries, ranges, k, chunks)
+
+        # Each query reads its own lists; a list is one contiguous slice
+        results = []
+        for query in queries:
+            lists = probe_lists(query, snapshot.centroids, nprobe or self.nprobe)
+            ranges = [(snapshot.offsets[i], snapshot.offsets[i + 1]) for i in lists] + delta
+            results.extend(self._top_k(snapshot, query[None, :], ranges, k, chunks))
+        return results
+
+    @staticmethod
+    def _top_k(
+        snapshot: _Snapshot,
+        queries: "np.ndarray",
+        ranges: List[Tuple[int, int]],
+        k: int,
+        chunks: Optional[bool],
+    ) -> List[List[Tuple[bytes, int, float]]]:
+        """Score the rows in `ranges` against every query and keep the best k of each."""
+        best_scores = [np.zeros((len(queries), 0), dtype=np.float32)]
+        best_rows = [np.zeros((len(queries), 0), dtype=np.int64)]
+        pending = 0
+        for first, last in ranges:
+            for start in range(int(first), int(last), SEARCH_BLOCK_ROWS):
+                stop = min(start + SEARCH_BLOCK_ROWS, int(last))
+                scores = queries @ np.asarray(_block(snapshot, start, stop), dtype=np.float32).T
+                if chunks is not None:
+                    scores[:, snapshot.is_chunk[start:stop] != chunks] = -np.inf
+                best_scores.append(scores)
+                best_rows.append(np.broadcast_to(np.arange(start, stop), scores.shape))
+                pending += stop - start
+
+                # Keep the running top k per query once a block's worth is pending
+                if pending >= SEARCH_BLOCK_ROWS:
+                    best_scores, best_rows = _keep_best(best_scores, best_rows, k)
+                    pending = 0
+        best_scores, best_rows = _keep_best(best_scores, best_rows, k)
+
+        results = []
+        for scores, rows in zip(best_scores[0], best_rows[0]):
+            order = np.argsort(-scores, kind="stable")
+            results.append([
+                (*unpack_key(snapshot.keys[rows[i]]), float(scores[i]))
+                for i in order
+                if scores[i] > -np.inf
+            ])
+        return results
+
+    def search_text(
+        self, text: str, k: int, chunks: Optional[bool] = None
+    ) -> List[Tuple[bytes, int, float]]:
+        """
+        Find the k vectors most similar to a text.
+
+        Args:
+            text: Query text, embedded with the index's embedder
+            k: Maximum matches
+            chunks: See search()
+
+        Returns:
+            (document id, chunk index, cosine) tuples, best first
+        """
+        query = self.embedder.embed([text])
+        if not query.any():
+            return []
+        return self.search(query, k, chunks)[0]
+
+    def update(
+        self,
+        database: Any,
+        batch_size: int = DEFAULT_EMBED_BATCH,
+        rebuild: bool = False,
+        dtype: str = DEFAULT_VECTOR_DTYPE,
+        retrain: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Bring the index up to date with a database.
+
+        Only documents and chunks without a vector are embedded; vectors of
+        deleted rows are dropped. The existing vectors are copied into the
+        new generation, so the embedder never sees unchanged text again.
+
+        Args:
+            database: Database or ShardedDatabase to read
+            batch_size: Texts per embedder call
+            rebuild: Embed everything again (e.g. after changing embedder)
+            dtype: Storage type of the vectors ("float16" or "float32")
+            retrain: Train new IVF centroids even if the current ones fit
+
+        Returns:
+            Dictionary with added, removed, total, nlist and seconds
+        """
+        start_time = time.perf_counter()
+        manifest = self._read_manifest()
+        reuse = bool(manifest) and not rebuild and manifest["embedder"] == self.embedder.name
+        old = self._snapshot() if reuse else None
+
+        current = np.array(list(self._iter_keys(database)), dtype=_KEY_DTYPE)
+        old_keys = old.keys if old else current[:0]
+        keep = np.isin(old_keys, current)
+        missing = {
+            key.ljust(_KEY.size, b"\0") for key in current[~np.isin(current, old_keys)].tolist()
+        }
+        if reuse and not missing and keep.all() and not retrain:
+            return {
+                "added": 0, "removed": 0, "total": len(old_keys),
+                "nlist": manifest.get("nlist", 0), "seconds": 0.0,
+            }
+
+        # Embed the new rows into a staging file (rows deleted since the
+        # key scan are simply not found)
+        self.path.mkdir(parents=True, exist_ok=True)
+        staging_path = self.path / STAGING_NAME
+        staged = np.lib.format.open_memmap(
+            staging_path, mode="w+", dtype=np.float32, shape=(len(missing), self.embedder.dim)
+        )
+        staged_keys = np.zeros(len(missing), dtype=_KEY_DTYPE)
+        written = 0
+        pending: List[Tuple[bytes, str]] = []
+        doc_keys = {unpack_key(key)[0] for key in missing}
+        for key, text in self._iter_texts(database, doc_keys, missing):
+            pending.append((key, text))
+            if len(pending) >= batch_size:
+                written = self._embed_into(staged, staged_keys, written, pending)
+        written = self._embed_into(staged, staged_keys, written, pending)
+
+        try:
+            report = self._write_generation(
+                old, keep, staged[:written], staged_keys[:written], dtype, retrain
+            )
+        finally:
+            del staged
+            staging_path.unlink()
+        report["seconds"] = time.perf_counter() - start_time
+        return report
+
+    def add(
+        self,
+        database: Any,
+        doc_ids: Iterable[str],
+        batch_size: int = DEFAULT_EMBED_BATCH,
+    ) -> Dict[str, Any]:
+        """
+        Embed documents, and their chunks, as they are indexed.
+
+        The vectors are appended to the current generation's delta, so an
+        add costs what its new rows do rather than a rewrite of the index.
+        A delta that would outgrow MAX_DELTA_ROWS, or vectors replacing
+        existing ones, go through insert() instead, which folds the delta
+        into the IVF lists. An index that was never built is left to
+        update(), as are documents whose body already has a vector.
+
+        Args:
+            database: Database or ShardedDatabase the documents were written to
+            doc_ids: External ids of the documents
+            batch_size: Texts per embedder call
+
+        Returns:
+            Dictionary with added, removed, total and nlist
+        """
+        manifest = self._read_manifest()
+        if not manifest:
+            logger.info(f"No vector index at {self.path}; `proof-of-self embed` builds it")
+            return {"added": 0, "removed": 0, "total": 0, "nlist": 0}
+        snapshot = self._snapshot()
+
+        texts = list(self._iter_texts(database, {document_key(doc_id) for doc_id in doc_ids}))
+        vectors = np.empty((len(texts), self.embedder.dim), dtype=np.float32)
+        keys = np.zeros(len(texts), dtype=_KEY_DTYPE)
+        for start in range(0, len(texts), batch_size):
+            self._embed_into(vectors, keys, start, texts[start:start + batch_size])
+
+        delta_count = manifest.get("delta_count", 0)
+        if delta_count + len(keys) > MAX_DELTA_ROWS or np.isin(keys, snapshot.keys).any():
+            return self.insert([unpack_key(key) for key in keys.tolist()], vectors)
+
+        if len(keys):
+            self._append_delta(manifest, keys, vectors)
+            logger.info(f"Vector index: {len(keys)} appended, {delta_count + len(keys)} in delta")
+        return {
+            "added": len(keys),
+            "removed": 0,
+            "total": len(snapshot.keys) + len(keys),
+            "nlist": manifest.get("nlist", 0),
+        }
+
+    def _append_delta(
+        self, manifest: Dict[str, Any], keys: "np.ndarray", vectors: "np.ndarray"
+    ) -> None:
+        """Append rows to the generation's delta files, then publish them in the manifest."""
+        count = manifest.get("delta_count", 0)
+        dtype = np.dtype(manifest["dtype"])
+        vectors_path, keys_path = self._delta_paths(manifest["generation"])
+        for path, data, row_bytes in (
+            (vectors_path, vectors.astype(dtype), dtype.itemsize * self.embedder.dim),
+            (keys_path, keys, _KEY.size),
+        ):
+            with open(path, "ab") as f:
+                # Rows past delta_count were never published (an interrupted add)
+                f.truncate(count * row_bytes)
+                f.write(data.tobytes())
+        self._write_manifest({**manifest, "delta_count": count + len(keys)})
+
+    def _delta_paths(self, generation: int) -> Tuple[Path, Path]:
+        """Vectors and keys files of a generation's delta."""
+        return (
+            self.path / f"delta-vectors-{generation}.bin",
+            self.path / f"delta-keys-{generation}.bin",
+        )
+
+    def insert(
+        self,
+        keys: List[Tuple[bytes, int]],
+        vectors: Any,
+        dtype: str = DEFAULT_VECTOR_DTYPE,
+        retrain: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Add or replace vectors computed elsewhere (update() embeds its own).
+
+        New vectors join their nearest IVF list; the centroids are retrained
+        only once the index has outgrown them (or with `retrain`).
+
+        Args:
+            keys: (document id, chunk index) of each vector
+            vectors: (len(keys), dim) unit vectors, e.g. a memory map
+            dtype: Storage type for a new index
+            retrain: Train new IVF centroids even if the current ones fit
+
+        Returns:
+            Dictionary with added, removed, total and nlist
+        """
+        new_keys = np.array([pack_key(*key) for key in keys], dtype=_KEY_DTYPE)
+        manifest = self._read_manifest()
+        old = self._snapshot() if manifest else None
+        keep = ~np.isin(old.keys, new_keys) if old else np.zeros(0, dtype=bool)
+        return self._write_generation(old, keep, vectors, new_keys, dtype, retrain)
+
+    def _write_generation(
+        self,
+        old: Optional[_Snapshot],
+        keep: "np.ndarray",
+        new_vectors: Any,
+        new_keys: "np.ndarray",
+        dtype: str,
+        retrain: bool,
+    ) -> Dict[str, Any]:
+        """
+        Write the kept old rows plus new rows as the next generation, grouped by list.
+
+        Args:
+            old: Current generation (None for a new index)
+            keep: Which of its rows, delta included, to carry over
+            new_vectors: Vectors to add
+            new_keys: Their keys
+            dtype: Storage type for a new index (an existing one keeps its own)
+            retrain: Train new centroids even if the current ones fit
+
+        Returns:
+            Dictionary with added, removed, total and nlist
+        """
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(
+                f"Unknown vector dtype '{dtype}', expected one of {list(VECTOR_DTYPES)}"
+            )
+        manifest = self._read_manifest() or {}
+        if old is not None:
+            dtype = manifest["dtype"]
+        old_rows = np.flatnonzero(keep)
+        kept, added = len(old_rows), len(new_keys)
+        total = kept + added
+
+        def gather(rows: "np.ndarray") -> "np.ndarray":
+            """Vectors of rows numbered across the kept rows, then the new ones."""
+            out = np.empty((len(rows), self.embedder.dim), dtype=np.float32)
+            from_old = rows < kept
+            if from_old.any():
+                out[from_old] = _take(old, old_rows[rows[from_old]])
+            out[~from_old] = new_vectors[rows[~from_old] - kept]
+            return out
+
+        # Partition into IVF lists: keep the old centroids while they fit
+        centroids = None
+        trained_count = 0
+        if total >= self.ann_min_vectors:
+            if old is not None and old.centroids is not None and not retrain and not (
+                needs_training(total, manifest["trained_count"])
+            ):
+                centroids = np.array(old.centroids)
+                trained_count = manifest["trained_count"]
+                old_lists = np.repeat(
+                    np.arange(len(centroids), dtype=np.int32), np.diff(old.offsets)
+                )
+                if len(old.delta):
+                    delta_lists = assign_lists(np.asarray(old.delta, dtype=np.float32), centroids)
+                    old_lists = np.concatenate([old_lists, delta_lists])
+                lists = np.concatenate([old_lists[old_rows], assign_lists(new_vectors, centroids)])
+            else:
+                nlist = default_nlist(total)
+                rng = np.random.default_rng(total)
+                sample_size = min(total, nlist * KMEANS_SAMPLE_PER_LIST)
+                sample = gather(np.sort(rng.choice(total, sample_size, replace=False)))
+                centroids = train_centroids(sample, nlist)
+                trained_count = total
+                lists = np.empty(total, dtype=np.int32)
+                for start in range(0, total, SEARCH_BLOCK_ROWS):
+                    rows = np.arange(start, min(start + SEARCH_BLOCK_ROWS, total))
+                    lists[rows] = assign_lists(gather(rows), centroids)
+            order = np.argsort(lists, kind="stable")
+            offsets = np.concatenate(
+                [[0], np.cumsum(np.bincount(lists, minlength=len(centroids)))]
+            ).astype(np.int64)
+        else:
+            order = np.arange(total)
+            offsets = np.array([0, total], dtype=np.int64)
+
+        # Copy rows into list order, a block at a time
+        generation = manifest.get("generation", 0) + 1
+        self.path.mkdir(parents=True, exist_ok=True)
+        vectors = np.lib.format.open_memmap(
+            self.path / f"vectors-{generation}.npy",
+            mode="w+",
+            dtype=dtype,
+            shape=(total, self.embedder.dim),
+        )
+        keys = np.concatenate([old.keys[old_rows] if old else new_keys[:0], new_keys])[order]
+        for start in range(0, total, SEARCH_BLOCK_ROWS):
+            stop = start + SEARCH_BLOCK_ROWS
+            vectors[start:stop] = gather(order[start:stop])
+        vectors.flush()
+        del vectors
+
+        np.save(self.path / f"keys-{generation}.npy", keys)
+        nlist = 0
+        if centroids is not None:
+            nlist = len(centroids)
+            np.save(self.path / f"centroids-{generation}.npy", centroids.astype(np.float32))
+            np.save(self.path / f"offsets-{generation}.npy", offsets)
+        self._write_manifest({
+            "embedder": self.embedder.name,
+            "dim": self.embedder.dim,
+            "dtype": dtype,
+            "count": total,
+            "generation": generation,
+            "nlist": nlist,
+            "trained_count": trained_count,
+        })
+        self._remove_generation(generation - 1)
+
+        removed = len(keep) - kept
+        logger.info(
+            f"Vector index: {added} added, {removed} removed, {total} total in {nlist} lists"
+        )
+        return {"added": added, "removed": removed, "total": total, "nlist": nlist}
+
+    def _embed_into(
+        self, vectors: Any, keys: Any, written: int, pending: List[Tuple[bytes, str]]
+    ) -> int:
+        """Embed pending (key, text) pairs into rows from `written` on, and clear them."""
+        if not pending:
+            return written
+        embedded = self.embedder.embed([text for _, text in pending])
+        vectors[written:written + len(pending)] = embedded
+        keys[written:written + len(pending)] = [key for key, _ in pending]
+        written += len(pending)
+        pending.clear()
+        return written
+
+    @staticmethod
+    def _iter_keys(database: Any) -> Iterator[bytes]:
+        """Keys of every document and chunk that should have a vector."""
+        with database.shard_readers() as shards:
+            for conn, schema in shards:
+                for template in (DOCUMENT_TEXTS_SQL, CHUNK_TEXTS_SQL):
+                    sql = _text_sql(template, schema, with_text=False)
+                    for row in iter_cursor(conn.execute(sql), DEFAULT_FETCH_SIZE):
+                        yield pack_key(row["doc_key"], row["chunk_index"])
+
+    @staticmethod
+    def _iter_texts(
+        database: Any, doc_keys: Set[bytes], wanted: Optional[Set[bytes]] = None
+    ) -> Iterator[Tuple[bytes, str]]:
+        """(key, text) of the documents' vectors (only the `wanted` keys), read in batches."""
+        doc_keys = sorted(doc_keys)
+        with database.shard_readers() as shards:
+            for start in range(0, len(doc_keys), _ID_BATCH):
+                batch = doc_keys[start:start + _ID_BATCH]
+                filter_sql = f"AND d.id IN ({', '.join('?' * len(batch))})"
+                for conn, schema in shards:
+                    for template in (DOCUMENT_TEXTS_SQL, CHUNK_TEXTS_SQL):
+                        sql = _text_sql(template, schema, with_text=True, filter_sql=filter_sql)
+                        with closing(conn.execute(sql, batch)) as cursor:
+                            for row in cursor:
+                                key = pack_key(row["doc_key"], row["chunk_index"])
+                                if wanted is None or key in wanted:
+                                    yield key, row["text"] or ""
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        """The manifest, or None if the index has not been built."""
+        path = self.path / MANIFEST_NAME
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Replace the manifest atomically (this is what publishes a generation)."""
+        tmp = self.path / f"{MANIFEST_NAME}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path / MANIFEST_NAME)
+
+    def _remove_generation(self, generation: int) -> None:
+        """Delete an old generation's files (open memory maps keep their data)."""
+        names = [f"{kind}-{generation}.npy" for kind in ("vectors", "keys", "centroids", "offsets")]
+        names += [path.name for path in self._delta_paths(generation)]
+        for name in names:
+            try:
+                (self.path / name).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:  # Windows cannot delete a mapped file
+                logger.warning(f"Could not remove old vector file {name}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the index's size and settings.
+
+        Returns:
+            Dictionary with embedder, dim, dtype, count, delta (rows not
+            yet in the IVF lists), chunks, nlist, nprobe and bytes (empty if
+            the index has not been built)
+        """
+        manifest = self._read_manifest()
+        if not manifest:
+            return {}
+        snapshot = self._snapshot()
+        paths = [self.path / f"vectors-{manifest['generation']}.npy"]
+        paths.append(self._delta_paths(manifest["generation"])[0])
+        delta_count = manifest.get("delta_count", 0)
+        return {
+            "embedder": manifest["embedder"],
+            "dim": manifest["dim"],
+            "dtype": manifest["dtype"],
+            "count": manifest["count"] + delta_count,
+            "delta": delta_count,
+            "chunks": int(snapshot.is_chunk.sum()),
+            "nlist": manifest.get("nlist", 0),
+            "nprobe": self.nprobe,
+            "bytes": sum(path.stat().st_size for path in paths if path.exists()),
+        }
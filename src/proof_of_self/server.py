@@ -14,7 +14,19 @@ from typing import Any
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 
+from proof_of_self.config import (
+    backup_options,
+    load_config,
+    open_database,
+    open_vector_index,
+    shard_directory,
+)
+from proof_of_self.core.async_database import AsyncDatabase, AsyncSearch
+from proof_of_self.core.backup import BackupManager, run_backup_loop
 from proof_of_self.core.database import Database
+from proof_of_self.core.maintenance import IndexMaintenance, run_maintenance_loop
+from proof_of_self.core.query_cache import DEFAULT_CACHE_BYTES, QueryCache
+from proof_of_self.core.ranking import Ranking
 from proof_of_self.core.search import Search
 from proof_of_self.tools.tweet_tools import register_tweet_tools
 from proof_of_self.tools.thought_tools import register_thought_tools
@@ -33,19 +45,42 @@ async def main() -> None:
     db_path = os.getenv("PROOF_OF_SELF_DB", "./data/proof-of-self.db")
     db_path = Path(db_path).expanduser()
 
-    if not db_path.exists():
+    # A configured shard directory replaces the database file
+    config = load_config()
+    shard_dir = shard_directory(config)
+
+    if shard_dir is None and not db_path.exists():
         logger.error(f"Database not found at {db_path}")
         logger.error("Please run 'proof-of-self index' first to index your data")
         return
 
-    logger.info(f"Using database: {db_path}")
+    logger.info(f"Using database: {shard_dir or db_path}")
+
+    # Initialize database and search (tool handlers read through the pool)
+    db = open_database(config, db_path, role="serve")
+
+    # Repeated searches are answered from memory until the data changes
+    search_config = config.get("search") or {}
+    cache = None
+    cache_mb = search_config.get("cache_mb", DEFAULT_CACHE_BYTES / (1024 * 1024))
+    if cache_mb:
+        cache = QueryCache(max_bytes=int(cache_mb * 1024 * 1024))
+    ranking = Ranking.from_config(search_config.get("ranking"))
 
-    # Initialize database and search
-    db = Database(str(db_path))
-    search = Search(db)
+    # Semantic search reads the vectors `proof-of-self embed` wrote; new
+    # thoughts are embedded as they are dumped
+    vectors = None
+    try:
+        vectors = open_vector_index(config, shard_dir or db_path)
+    except ImportError as e:
+        logger.warning(f"Semantic search disabled: {e}")
+
+    # Tool handlers run queries on worker threads, off the event loop
+    async_db = AsyncDatabase(db, vectors=vectors)
+    search = AsyncSearch(Search(db, cache=cache, ranking=ranking, vectors=vectors), async_db)
 
     # Get stats
-    stats = db.get_stats()
+    stats = await async_db.get_stats()
     logger.info(
         f"Loaded: {stats.get('total_documents', 0)} documents"
     )
@@ -55,19 +90,60 @@ async def main() -> None:
 
     # Register tools
     register_tweet_tools(server, search)
-    register_thought_tools(server, db)
-    register_document_tools(server, db)
+    register_thought_tools(server, async_db, search)
+    register_document_tools(
+        server, search, similarity_threshold=float(search_config.get("similarity_threshold", 0.0))
+    )
 
     logger.info("Proof-of-Self is ready!")
-    logger.info("Available tools: search_documents, list_recent_documents, dump_thought, list_thoughts")
+    logger.info("Available tools: search_documents, semantic_search, list_recent_documents, dump_thought, list_thoughts")
+
+    # Background maintenance and backups work on a single database file
+    single_file = isinstance(db, Database)
+    if not single_file:
+        logger.info("Serving shards: background maintenance and backups are off")
+
+    # Optionally compact the search indexes in the background
+    maintenance_task = None
+    maintenance_interval = (config.get("database") or {}).get("maintenance_interval_seconds")
+    if maintenance_interval and single_file:
+        maintenance_task = asyncio.create_task(
+            run_maintenance_loop(IndexMaintenance(db), async_db, float(maintenance_interval))
+        )
+        logger.info(f"Background index maintenance every {maintenance_interval}s")
+
+    # Optionally take periodic online backups
+    backup_task = None
+    backups = backup_options(config)
+    if backups["enabled"] and backups["interval_hours"] > 0 and single_file:
+        manager = BackupManager(
+            str(db_path), backups["path"], keep=backups["keep"], compress=backups["compress"]
+        )
+        backup_task = asyncio.create_task(
+            run_backup_loop(
+                manager,
+                backups["interval_hours"] * 3600,
+                backups["pages_per_step"],
+                backups["sleep_ms"],
+            )
+        )
+        logger.info(f"Backing up to {backups['path']} every {backups['interval_hours']}h")
 
     # Run the server
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options()
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options()
+            )
+    finally:
+        if maintenance_task:
+            maintenance_task.cancel()
+        if backup_task:
+            backup_task.cancel()
+        async_db.close()
+        db.close()
 
 
 if __name__ == "__main__":
@@ -7,16 +7,21 @@ from typing import Any
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
-from proof_of_self.core.database import Database
+from proof_of_self.core.async_database import AsyncSearch
+from proof_of_self.core.search import SEARCH_MODES
 
 
-def register_document_tools(server: Server, db: Database) -> None:
+def register_document_tools(
+    server: Server, search: AsyncSearch, similarity_threshold: float = 0.0
+) -> None:
     """
     Register document search MCP tools.
 
     Args:
         server: MCP server instance
-        db: Database instance
+        search: Async search engine (queries run off the event loop)
+        similarity_threshold: Minimum score of semantic matches (semantic_search
+            and the semantic and hybrid modes of search_documents)
     """
 
     @server.list_tools()
@@ -25,7 +30,7 @@ def register_document_tools(server: Server, db: Database) -> None:
         return [
             Tool(
                 name="search_documents",
-                description="Search all documents in your knowledge base (markdown files, notes, PDFs, etc.). Returns matching documents with relevant snippets.",
+                description="Search all documents in your knowledge base (markdown files, notes, PDFs, etc.). Returns matching documents with relevant snippets. Hybrid mode also finds documents that say the same thing in other words.",
                 inputSchema={
                     "type": "object",
                     "properties": {
@@ -42,10 +47,71 @@ def register_document_tools(server: Server, db: Database) -> None:
                             "description": "Maximum number of results (default: 10)",
                             "default": 10,
                         },
+                        "mode": {
+                            "type": "string",
+                            "enum": list(SEARCH_MODES),
+                            "description": "Match exact words (keyword), meaning (semantic), or both merged (hybrid; needs semantic search enabled) (default: keyword)",
+                            "default": "keyword",
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor from the end of the previous page, to read the next page of the same search (keyword mode only)",
+                        },
+                    },
+                    "required": ["query"],
+                },
+            ),
+            Tool(
+                name="semantic_search",
+                description="Search your knowledge base by meaning rather than exact words. Finds documents, tweets and passages of long documents that are about the same thing as the query.",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "What you are looking for, in plain language",
+                        },
+                        "content_type": {
+                            "type": "string",
+                            "description": "Filter by content type (e.g., 'markdown', 'tweet', 'pdf')",
+                        },
+                        "source_type": {
+                            "type": "string",
+                            "description": "Filter by source (e.g., 'twitter', 'file')",
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "Maximum number of results (default: 10)",
+                            "default": 10,
+                        },
                     },
                     "required": ["query"],
                 },
             ),
+            Tool(
+                name="get_passages",
+                description="Read consecutive passages of a long document, e.g. to read on from a passage that search_documents or semantic_search returned.",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "document_id": {
+                            "type": "string",
+                            "description": "Document ID from a search result",
+                        },
+                        "start": {
+                            "type": "integer",
+                            "description": "Number of the first passage to read (default: 1)",
+                            "default": 1,
+                        },
+                        "count": {
+                            "type": "integer",
+                            "description": "Number of passages to read (default: 3)",
+                            "default": 3,
+                        },
+                    },
+                    "required": ["document_id"],
+                },
+            ),
             Tool(
                 name="list_recent_documents",
                 description="List recently added documents in the knowledge base.",
@@ -61,6 +127,10 @@ def register_document_tools(server: Server, db: Database) -> None:
                             "type": "string",
                             "description": "Filter by content type (e.g., 'markdown', 'text', 'pdf')",
                         },
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor from the end of the previous page, to read the next page",
+                        },
                     },
                 },
             ),
@@ -74,37 +144,27 @@ def register_document_tools(server: Server, db: Database) -> None:
             query = arguments["query"]
             content_type = arguments.get("content_type")
             limit = arguments.get("limit", 10)
-
-            cursor = db.conn.cursor()
-
-            # Build search query
-            where_clauses = ["documents_fts MATCH ?"]
-            params = [query]
-
-            if content_type:
-                where_clauses.append("content_type = ?")
-                params.append(content_type)
-
-            where_sql = " AND ".join(where_clauses)
-            params.append(limit)
-
-            cursor.execute(
-                f"""
-                SELECT
-                    d.id, d.title, d.content, d.content_type,
-                    d.tags, d.source_path, d.created_at,
-                    snippet(documents_fts, 1, '<mark>', '</mark>', '...', 40) as snippet
-                FROM documents_fts
-                JOIN documents d ON documents_fts.rowid = d.rowid
-                WHERE {where_sql}
-                ORDER BY rank
-                LIMIT ?
-                """,
-                params,
+            mode = arguments.get("mode", "keyword")
+            cursor = arguments.get("cursor")
+
+            if mode != "keyword" and search.vectors is None:
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"Search mode '{mode}' needs semantic search. Set "
+                        "search.semantic_search in config.yaml and run 'proof-of-self embed'.",
+                    )
+                ]
+
+            results = await search.search_documents(
+                query=query,
+                content_type=content_type,
+                limit=limit,
+                mode=mode,
+                min_score=similarity_threshold,
+                after=cursor,
             )
 
-            results = [dict(row) for row in cursor.fetchall()]
-
             if not results:
                 return [TextContent(type="text", text=f"No documents found matching '{query}'")]
 
@@ -114,7 +174,12 @@ def register_document_tools(server: Server, db: Database) -> None:
                 title = doc["title"] or doc["source_path"] or "Untitled"
                 content_type = doc["content_type"] or "unknown"
                 date = doc["created_at"][:10] if doc["created_at"] else "unknown"
-                snippet = doc["snippet"] or doc["content"][:200]
+                snippet = doc.get("snippet") or doc["preview"] or ""
+                # A long document shows the passage that matched best (its
+                # highlighted snippet for keyword matches)
+                if doc.get("passage"):
+                    text = snippet if mode == "keyword" else doc["passage"]
+                    snippet = f"Passage {doc['chunk_index'] + 1}: {text}"
 
                 output += f"📄 {title}\n"
                 output += f"   Type: {content_type} | Date: {date}\n"
@@ -125,38 +190,98 @@ def register_document_tools(server: Server, db: Database) -> None:
                     if tags:
                         output += f"   Tags: {', '.join(tags)}\n"
 
+                # Identical copies collapse into one result
+                paths = [path for path in json.loads(doc["source_paths"]) if path]
+                if len(paths) > 1:
+                    output += f"   Also at: {', '.join(paths[1:])}\n"
+
                 output += f"   {snippet}\n"
                 output += f"   ID: {doc['id']}\n\n"
 
+            # Fused results have no order to continue in
+            if mode == "keyword" and len(results) == limit:
+                output += f"More results: cursor={results[-1]['cursor']}\n"
+
             return [TextContent(type="text", text=output)]
 
-        elif name == "list_recent_documents":
+        elif name == "semantic_search":
+            query = arguments["query"]
             limit = arguments.get("limit", 10)
-            content_type = arguments.get("content_type")
 
-            cursor = db.conn.cursor()
+            if search.vectors is None:
+                return [
+                    TextContent(
+                        type="text",
+                        text="Semantic search is not enabled. Set search.semantic_search in "
+                        "config.yaml and run 'proof-of-self embed'.",
+                    )
+                ]
+
+            results = await search.semantic_search(
+                query=query,
+                content_type=arguments.get("content_type"),
+                source_type=arguments.get("source_type"),
+                limit=limit,
+                min_score=similarity_threshold,
+            )
 
-            where_clause = ""
-            params = []
+            if not results:
+                return [TextContent(type="text", text=f"Nothing found similar to '{query}'")]
 
-            if content_type:
-                where_clause = "WHERE content_type = ?"
-                params.append(content_type)
+            output = f"Found {len(results)} documents similar to '{query}':\n\n"
 
-            params.append(limit)
+            for doc in results:
+                title = doc["title"] or doc["source_path"] or "Untitled"
+                content_type = doc["content_type"] or "unknown"
+                date = doc["created_at"][:10] if doc["created_at"] else "unknown"
 
-            cursor.execute(
-                f"""
-                SELECT id, title, content, content_type, tags, source_path, created_at, indexed_at
-                FROM documents
-                {where_clause}
-                ORDER BY indexed_at DESC
-                LIMIT ?
-                """,
-                params,
+                output += f"📄 {title} (similarity {doc['score']:.2f})\n"
+                output += f"   Type: {content_type} | Date: {date}\n"
+
+                paths = [path for path in json.loads(doc["source_paths"]) if path]
+                if len(paths) > 1:
+                    output += f"   Also at: {', '.join(paths[1:])}\n"
+
+                if doc["passage"]:
+                    output += f"   Passage {doc['chunk_index'] + 1}: {doc['passage']}\n"
+                else:
+                    output += f"   {doc['preview'] or ''}\n"
+                output += f"   ID: {doc['id']}\n\n"
+
+            return [TextContent(type="text", text=output)]
+
+        elif name == "get_passages":
+            document_id = arguments["document_id"]
+            start = arguments.get("start", 1)
+
+            # Passages are numbered from 1, chunk_index from 0
+            passages = await search.get_passages(
+                document_id, start=start - 1, count=arguments.get("count", 3)
             )
 
-            results = [dict(row) for row in cursor.fetchall()]
+            if not passages:
+                return [
+                    TextContent(
+                        type="text",
+                        text=f"No passages from {start} on in document {document_id}",
+                    )
+                ]
+
+            total = passages[0]["chunk_count"]
+            output = ""
+            for passage in passages:
+                output += f"Passage {passage['chunk_index'] + 1} of {total}:\n"
+                output += f"{passage['content']}\n\n"
+
+            return [TextContent(type="text", text=output)]
+
+        elif name == "list_recent_documents":
+            limit = arguments.get("limit", 10)
+            content_type = arguments.get("content_type")
+
+            results = await search.list_recent_documents(
+                content_type=content_type, limit=limit, after=arguments.get("cursor")
+            )
 
             if not results:
                 filter_str = f" of type '{content_type}'" if content_type else ""
@@ -168,7 +293,7 @@ def register_document_tools(server: Server, db: Database) -> None:
                 title = doc["title"] or doc["source_path"] or "Untitled"
                 content_type = doc["content_type"] or "unknown"
                 date = doc["indexed_at"][:10] if doc["indexed_at"] else "unknown"
-                content_preview = doc["content"][:150].replace("\n", " ")
+                content_preview = (doc["preview"] or "").replace("\n", " ")
 
                 output += f"📄 {title}\n"
                 output += f"   Type: {content_type} | Added: {date}\n"
@@ -182,6 +307,9 @@ def register_document_tools(server: Server, db: Database) -> None:
                 output += f"   {content_preview}...\n"
                 output += f"   ID: {doc['id']}\n\n"
 
+            if len(results) == limit:
+                output += f"More results: cursor={results[-1]['cursor']}\n"
+
             return [TextContent(type="text", text=output)]
 
         else:
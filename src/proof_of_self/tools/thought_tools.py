@@ -7,16 +7,17 @@ from typing import Any
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
-from proof_of_self.core.database import Database
+from proof_of_self.core.async_database import AsyncDatabase, AsyncSearch
 
 
-def register_thought_tools(server: Server, db: Database) -> None:
+def register_thought_tools(server: Server, db: AsyncDatabase, search: AsyncSearch) -> None:
     """
     Register thought/note-taking MCP tools.
 
     Args:
         server: MCP server instance
-        db: Database instance
+        db: Async database (writes run off the event loop)
+        search: Async search engine
     """
 
     @server.list_tools()
@@ -56,6 +57,17 @@ def register_thought_tools(server: Server, db: Database) -> None:
                             "type": "string",
                             "description": "Filter by tag",
                         },
+                        "tags": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Filter by several tags",
+                        },
+                        "match": {
+                            "type": "string",
+                            "enum": ["any", "all"],
+                            "description": "Whether thoughts need any or all of the tags (default: any)",
+                            "default": "any",
+                        },
                         "category": {
                             "type": "string",
                             "description": "Filter by category",
@@ -65,6 +77,10 @@ def register_thought_tools(server: Server, db: Database) -> None:
                             "description": "Maximum number of results (default: 20)",
                             "default": 20,
                         },
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor from the end of the previous page, to read the next page",
+                        },
                     },
                 },
             ),
@@ -79,7 +95,7 @@ def register_thought_tools(server: Server, db: Database) -> None:
             tags = arguments.get("tags", [])
             category = arguments.get("category")
 
-            thought_id = db.insert_thought(content=content, tags=tags, category=category)
+            thought_id = await db.insert_thought(content=content, tags=tags, category=category)
 
             output = f"✓ Thought saved (ID: {thought_id})\n\n"
             output += f"Content: {content}\n"
@@ -91,44 +107,28 @@ def register_thought_tools(server: Server, db: Database) -> None:
             return [TextContent(type="text", text=output)]
 
         elif name == "list_thoughts":
-            tag = arguments.get("tag")
+            tags = list(arguments.get("tags", []))
+            if arguments.get("tag"):
+                tags.append(arguments["tag"])
+            match_all = arguments.get("match", "any") == "all"
             category = arguments.get("category")
             limit = arguments.get("limit", 20)
 
-            cursor = db.conn.cursor()
-
-            # Build query
-            where_clauses = []
-            params = []
-
-            if tag:
-                where_clauses.append("tags LIKE ?")
-                params.append(f'%"{tag}"%')
-
-            if category:
-                where_clauses.append("category = ?")
-                params.append(category)
-
-            where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-            params.append(limit)
-
-            cursor.execute(
-                f"""
-                SELECT id, content, tags, category, created_at
-                FROM thoughts
-                WHERE {where_sql}
-                ORDER BY created_at DESC
-                LIMIT ?
-                """,
-                params,
+            results = await search.list_documents(
+                tags=tags,
+                match_all=match_all,
+                source_type="user",
+                content_type="note",
+                category=category,
+                limit=limit,
+                after=arguments.get("cursor"),
             )
 
-            results = [dict(row) for row in cursor.fetchall()]
-
             if not results:
                 filters = []
-                if tag:
-                    filters.append(f"tag={tag}")
+                if tags:
+                    joiner = " and " if match_all else " or "
+                    filters.append(f"tag={joiner.join(tags)}")
                 if category:
                     filters.append(f"category={category}")
                 filter_str = f" ({', '.join(filters)})" if filters else ""
@@ -147,6 +147,9 @@ def register_thought_tools(server: Server, db: Database) -> None:
                     output += f"Tags: {', '.join(tags_str)}\n"
                 output += f"ID: {thought['id']}\n\n"
 
+            if len(results) == limit:
+                output += f"More results: cursor={results[-1]['cursor']}\n"
+
             return [TextContent(type="text", text=output)]
 
         else:
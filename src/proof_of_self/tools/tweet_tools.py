@@ -7,16 +7,16 @@ from typing import Any
 from mcp.server import Server
 from mcp.types import Tool, TextContent
 
-from proof_of_self.core.search import Search
+from proof_of_self.core.async_database import AsyncSearch
 
 
-def register_tweet_tools(server: Server, search: Search) -> None:
+def register_tweet_tools(server: Server, search: AsyncSearch) -> None:
     """
     Register tweet-related MCP tools.
 
     Args:
         server: MCP server instance
-        search: Search engine instance
+        search: Async search engine (queries run off the event loop)
     """
 
     @server.list_tools()
@@ -48,6 +48,16 @@ def register_tweet_tools(server: Server, search: Search) -> None:
                             "description": "Include retweets (default: false)",
                             "default": False,
                         },
+                        "sort_by": {
+                            "type": "string",
+                            "enum": ["date", "engagement", "relevance"],
+                            "description": "Order by newest first, by likes + retweets, or by best match (default: date)",
+                            "default": "date",
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor from the end of the previous page, to read the next page of the same search",
+                        },
                     },
                     "required": ["query"],
                 },
@@ -128,12 +138,15 @@ def register_tweet_tools(server: Server, search: Search) -> None:
             limit = arguments.get("limit", 20)
             include_replies = arguments.get("include_replies", True)
             include_retweets = arguments.get("include_retweets", False)
+            sort_by = arguments.get("sort_by", "date")
 
-            results = search.search_tweets(
+            results = await search.search_tweets(
                 query=query,
                 limit=limit,
                 include_replies=include_replies,
                 include_retweets=include_retweets,
+                sort_by=sort_by,
+                after=arguments.get("cursor"),
             )
 
             # Format results
@@ -147,12 +160,15 @@ def register_tweet_tools(server: Server, search: Search) -> None:
                 output += f"[{date}] {engagement}♥ {text}\n"
                 output += f"  Tweet: https://twitter.com/{user_id}/status/{tweet_id}\n\n"
 
+            if len(results) == limit:
+                output += f"More results: cursor={results[-1]['cursor']}\n"
+
             return [TextContent(type="text", text=output)]
 
         elif name == "find_thread":
             tweet_id = arguments["tweet_id"]
 
-            results = search.find_thread(tweet_id)
+            results = await search.find_thread(tweet_id)
 
             if not results:
                 return [TextContent(type="text", text=f"No thread found for tweet {tweet_id}")]
@@ -163,8 +179,9 @@ def register_tweet_tools(server: Server, search: Search) -> None:
                 text = tweet["full_text"]
                 tweet_id = tweet["tweet_id"]
                 user_id = tweet.get("user_id", "unknown")
-                output += f"{i}. [{date}] {text}\n"
-                output += f"   Tweet: https://twitter.com/{user_id}/status/{tweet_id}\n\n"
+                indent = "   " * tweet["depth"]  # Replies sit under their parent
+                output += f"{indent}{i}. [{date}] {text}\n"
+                output += f"{indent}   Tweet: https://twitter.com/{user_id}/status/{tweet_id}\n\n"
 
             return [TextContent(type="text", text=output)]
 
@@ -173,7 +190,7 @@ def register_tweet_tools(server: Server, search: Search) -> None:
             min_engagement = arguments.get("min_engagement", 10)
             limit = arguments.get("limit", 10)
 
-            results = search.find_hot_takes(
+            results = await search.find_hot_takes(
                 topic=topic, min_engagement=min_engagement, limit=limit
             )
 
@@ -201,7 +218,7 @@ def register_tweet_tools(server: Server, search: Search) -> None:
             limit = arguments.get("limit", 20)
             include_replies = arguments.get("include_replies", True)
 
-            results = search.get_recent_tweets(limit=limit, include_replies=include_replies)
+            results = await search.get_recent_tweets(limit=limit, include_replies=include_replies)
 
             output = f"Your {len(results)} most recent tweets:\n\n"
             for tweet in results:
@@ -216,17 +233,23 @@ def register_tweet_tools(server: Server, search: Search) -> None:
             return [TextContent(type="text", text=output)]
 
         elif name == "get_tweet_stats":
-            stats = search.db.get_stats()
+            stats = await search.async_db.get_stats()
 
             output = "Your Twitter Archive Statistics:\n\n"
-            output += f"Total Tweets: {stats['total_tweets']}\n"
-            output += f"  - Original Tweets: {stats['original_tweets']}\n"
-            output += f"  - Replies: {stats['replies']}\n"
-            output += f"  - Retweets: {stats['retweets']}\n"
-            output += f"\nBookmarks: {stats['bookmarks']}\n"
-            output += f"Likes: {stats['likes']}\n"
-            output += f"\nNotes/Thoughts: {stats['thoughts']}\n"
-            output += f"Articles: {stats['articles']}\n"
+            output += f"Total Tweets: {stats.get('source_twitter', 0)}\n"
+            output += f"  - Original Tweets: {stats.get('type_tweet', 0)}\n"
+            output += f"  - Replies: {stats.get('type_reply', 0)}\n"
+            output += f"  - Retweets: {stats.get('type_retweet', 0)}\n"
+            output += f"\nNotes/Thoughts: {stats.get('type_note', 0)}\n"
+            output += f"All Documents: {stats['total_documents']}\n"
+
+            cache = await search.cache_stats()
+            if cache:
+                output += (
+                    f"\nSearch cache: {cache['hit_rate']:.0%} hit rate "
+                    f"({cache['hits']} hits, {cache['misses']} misses), "
+                    f"{cache['entries']} results in {cache['bytes'] / 1024:.0f} KB\n"
+                )
 
             return [TextContent(type="text", text=output)]
 
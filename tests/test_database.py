@@ -0,0 +1,1163 @@
+"""
+Unit tests for the Database storage layer
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+
+from proof_of_self.config import database_options, open_database
+from proof_of_self.core import search as search_module
+from proof_of_self.core.async_database import AsyncDatabase, AsyncSearch
+from proof_of_self.core.backup import BackupManager
+from proof_of_self.core.chunker import document_key, generate_document_id
+from proof_of_self.core.database import SCHEMA_VERSION, Database
+from proof_of_self.core.profiles import PROFILES, resolve_profile
+from proof_of_self.core.query_cache import QueryCache, estimate_size
+from proof_of_self.core.ranking import Ranking
+from proof_of_self.core.search import Search
+from proof_of_self.core.shards import ShardedDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh database in a temporary directory."""
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+
+def make_documents(count, source_type="file"):
+    """Build `count` document records for the bulk insert API."""
+    return [
+        {
+            "doc_id": f"doc-{i}",
+            "source_type": source_type,
+            "content": f"document number {i} about bitcoin",
+            "content_type": "note",
+            "tags": ["bitcoin"] if i % 2 == 0 else None,
+        }
+        for i in range(count)
+    ]
+
+
+def test_insert_documents_many_reports_batches(db):
+    counts = db.insert_documents_many(make_documents(25), batch_size=10)
+
+    assert counts == [10, 10, 5]
+    assert db.get_stats()["total_documents"] == 25
+
+
+def test_insert_documents_many_updates_fts(db):
+    db.insert_documents_many(make_documents(5))
+
+    rows = db.conn.execute(
+        "SELECT COUNT(*) FROM documents_fts WHERE documents_fts MATCH 'bitcoin'"
+    ).fetchone()
+    assert rows[0] == 5
+
+
+def test_indexer_skips_only_the_bad_record_of_a_batch(db):
+    from proof_of_self.adapters.base import BaseAdapter
+    from proof_of_self.core.indexer import Indexer
+
+    class Records(BaseAdapter):
+        def parse(self):
+            for i in range(5):
+                yield {
+                    "type": "document",
+                    "source_type": "file",
+                    "content": f"note {i}",
+                    "source_path": f"notes/{i}.md",
+                    "metadata": {"bad": object()} if i == 2 else None,  # Not JSON
+                }
+
+        def validate_source(self):
+            return True
+
+        def get_source_info(self):
+            return {}
+
+    class Vectors:
+        def __init__(self):
+            self.added = []
+
+        def add(self, database, doc_ids):
+            self.added.extend(doc_ids)
+
+    vectors = Vectors()
+    counts = Indexer(db, batch_size=5, vectors=vectors).index_from_adapter(Records({}))
+    assert counts == {"documents": 4, "errors": 1}
+    assert db.get_stats()["total_documents"] == 4
+    stored = {row[0] for row in db.conn.execute("SELECT id FROM documents")}
+    assert {document_key(doc_id) for doc_id in vectors.added} == stored
+
+
+def test_insert_chunks_many(db):
+    db.insert_document(doc_id="book", source_type="file", content="long text", is_chunked=True)
+    chunks = [
+        {
+            "chunk_id": f"book_chunk_{i}",
+            "document_id": "book",
+            "chunk_index": i,
+            "content": f"passage {i}",
+        }
+        for i in range(3)
+    ]
+
+    assert db.insert_chunks_many(chunks, batch_size=2) == [2, 1]
+    assert [c["chunk_index"] for c in db.get_chunks("book")] == [0, 1, 2]
+
+
+def test_chunks_are_spans_of_the_document_body(db):
+    from proof_of_self.core.chunker import DocumentChunker
+
+    book = "\n\n".join(f"Paragraph {i} on sovereign money and time." * 8 for i in range(40))
+    chunks = DocumentChunker(chunk_size=300).chunk_document("book", book)
+    db.insert_document(doc_id="book", source_type="file", content=book, is_chunked=True)
+    db.insert_chunks_many(
+        {
+            "chunk_id": chunk.chunk_id,
+            "document_id": chunk.document_id,
+            "chunk_index": chunk.chunk_index,
+            "start_offset": chunk.start_offset,
+            "end_offset": chunk.end_offset,
+        }
+        for chunk in chunks
+    )
+
+    stored = db.conn.execute("SELECT SUM(length(content)) FROM chunks").fetchone()[0]
+    assert stored == 0
+    assert [c["content"] for c in db.get_chunks("book")] == [chunk.content for chunk in chunks]
+    assert chunks[1].start_offset < chunks[0].end_offset  # Overlapping spans
+
+    matches = db.conn.execute(
+        "SELECT COUNT(*) FROM chunks_fts WHERE chunks_fts MATCH '\"paragraph 39\"'"
+    ).fetchone()[0]
+    assert matches == 1
+
+    # Deleting the document removes its chunks' postings cleanly
+    db.conn.execute("DELETE FROM documents WHERE id = ?", (document_key("book"),))
+    db.conn.execute("INSERT INTO chunks_fts(chunks_fts, rank) VALUES ('integrity-check', 1)")
+    assert db.conn.execute("SELECT COUNT(*) FROM chunks_fts").fetchone()[0] == 0
+
+
+def test_failed_batch_rolls_back(db):
+    documents = make_documents(3)
+    documents[2]["source_type"] = None  # violates NOT NULL
+
+    with pytest.raises(Exception):
+        db.insert_documents_many(documents)
+
+    assert db.get_stats()["total_documents"] == 0
+
+
+def test_wal_readers_do_not_block_on_open_write(tmp_path):
+    database = Database(str(tmp_path / "wal.db"), wal_mode=True, read_pool_size=2)
+    try:
+        database.insert_documents_many(make_documents(3))
+
+        # Hold a write transaction open, as a long indexing batch would
+        database.conn.execute("BEGIN IMMEDIATE")
+        database.conn.execute(
+            "INSERT INTO documents (id, source_type, content) VALUES ('new', 'file', 'x')"
+        )
+
+        with database.reader() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            assert count == 3  # Sees the last committed snapshot
+            with pytest.raises(Exception):
+                conn.execute("DELETE FROM documents")  # Pool is read-only
+
+        database.conn.commit()
+        with database.reader() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 4
+    finally:
+        database.close()
+
+
+def trigger_names(database):
+    rows = database.conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    return {row["name"] for row in rows}
+
+
+def test_bulk_load_rebuilds_fts_and_reports_timings(db):
+    with db.bulk_load() as timings:
+        assert not trigger_names(db) & {"documents_ai", "chunks_ai"}
+        db.insert_documents_many(make_documents(10))
+
+    assert set(timings) == {"load_seconds", "rebuild_seconds", "optimize_seconds"}
+    assert {"documents_ai", "documents_ad", "chunks_ai"} <= trigger_names(db)
+    matches = db.conn.execute(
+        "SELECT COUNT(*) FROM documents_fts WHERE documents_fts MATCH 'bitcoin'"
+    ).fetchone()[0]
+    assert matches == 10
+
+
+def test_bulk_load_restores_triggers_on_failure(db):
+    with pytest.raises(RuntimeError):
+        with db.bulk_load():
+            db.insert_documents_many(make_documents(4))
+            raise RuntimeError("parse failed")
+
+    assert {"documents_ai", "documents_ad", "documents_au"} <= trigger_names(db)
+    # Rows committed before the failure are still searchable
+    matches = db.conn.execute(
+        "SELECT COUNT(*) FROM documents_fts WHERE documents_fts MATCH 'bitcoin'"
+    ).fetchone()[0]
+    assert matches == 4
+
+
+def test_maintenance_merges_fts_segments(db):
+    from proof_of_self.core.maintenance import IndexMaintenance
+
+    for document in make_documents(20):
+        db.insert_document(**document)  # One commit (and FTS segment) per row
+
+    report = IndexMaintenance(db).run()
+
+    assert report["before"]["documents_fts"]["segments"] > 1
+    assert report["after"]["documents_fts"]["segments"] == 1
+
+
+def insert_tweet(database, tweet_id, text, reply_to=None, likes=0, created_at=None):
+    metadata = {
+        "tweet_id": tweet_id,
+        "favorite_count": likes,
+        "retweet_count": 0,
+        "is_retweet": False,
+        "is_reply": reply_to is not None,
+    }
+    if reply_to:
+        metadata["reply_to_tweet_id"] = reply_to
+    database.insert_document(
+        doc_id=f"tweet-{tweet_id}",
+        source_type="twitter",
+        content=text,
+        content_type="reply" if reply_to else "tweet",
+        author="monk",
+        metadata=metadata,
+        created_at=created_at,
+    )
+
+
+def test_metadata_columns_are_indexed(db):
+    insert_tweet(db, "1", "root tweet about bitcoin", likes=5)
+
+    row = db.conn.execute(
+        "SELECT tweet_id, favorite_count, is_reply FROM documents WHERE tweet_id = '1'"
+    ).fetchone()
+    assert tuple(row) == ("1", 5, 0)
+
+    plan = " ".join(
+        row["detail"]
+        for row in db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM documents WHERE reply_to_tweet_id = '1'"
+        )
+    )
+    assert "idx_documents_reply_to" in plan
+
+
+def test_search_uses_metadata_columns(db):
+    from datetime import datetime
+
+    insert_tweet(db, "1", "bitcoin thread start", likes=1, created_at=datetime(2024, 1, 1))
+    insert_tweet(db, "2", "bitcoin reply", reply_to="1", likes=50, created_at=datetime(2024, 1, 2))
+    insert_tweet(db, "3", "nested bitcoin reply", reply_to="2", created_at=datetime(2024, 1, 3))
+    search = Search(db)
+
+    assert [t["tweet_id"] for t in search.find_thread("3")] == ["1", "2", "3"]
+    assert [t["tweet_id"] for t in search.search_tweets("bitcoin", include_replies=False)] == ["1"]
+    assert search.find_hot_takes("bitcoin", min_engagement=10)[0]["tweet_id"] == "2"
+
+
+def test_weighted_ranking_and_top_k_plans(db):
+    from datetime import datetime, timedelta
+
+    db.insert_thought("notes from the conference", tags=["bitcoin"])
+    db.insert_document(doc_id="t", source_type="file", content="bitcoin bitcoin", title="bitcoin")
+    db.insert_document(doc_id="c", source_type="file", content="bitcoin bitcoin bitcoin")
+    ranked = [row["id"] for row in Search(db).search_documents("bitcoin")]
+    assert ranked[0] == document_key("t").hex()
+    content_only = Search(db, ranking=Ranking(title=0.0, tags=0.0))
+    assert content_only.search_documents("bitcoin")[0]["id"] == document_key("c").hex()
+
+    for i in range(30):
+        text = "same words on bitcoin" if i % 10 == 0 else f"bitcoin note {i}"
+        created_at = datetime(2024, 1, 1) + timedelta(hours=i * 7 % 30)
+        insert_tweet(db, str(i), text, likes=i % 7, created_at=created_at)
+
+    # Broad queries walk; the probe stops counting matches past the break-even
+    assert Search(db)._walk_is_cheaper("bitcoin", 1)
+    assert not Search(db)._walk_is_cheaper("same", 50)
+    walk, scan = Search(db), Search(db)
+    walk._walk_is_cheaper = lambda *args: True
+    scan._walk_is_cheaper = lambda *args: False
+    for options in [{}, {"sort_by": "engagement"}, {"offset": 5, "limit": 10}]:
+        walked = walk.search_tweets("bitcoin", **options)
+        scanned = scan.search_tweets("bitcoin", **options)
+        assert [t["tweet_id"] for t in walked] == [t["tweet_id"] for t in scanned]
+    repeated = [
+        t for t in walk.search_tweets("same words") if len(json.loads(t["source_paths"])) == 3
+    ]
+    assert len(repeated) == 1
+
+    by_engagement = Search(db, ranking=Ranking(engagement_weight=5.0, candidates=None))
+    top = by_engagement.search_tweets("note", sort_by="relevance", limit=3)
+    assert [t["favorite_count"] for t in top] == [6, 6, 6]
+    assert top[0]["rank"] < 0
+    # Only the 10 most recently indexed matches are scored
+    pooled = Search(db, ranking=Ranking(engagement_weight=5.0, candidates=10))
+    top = pooled.search_tweets("note", sort_by="relevance", limit=3)
+    assert [t["favorite_count"] for t in top] == [6, 5, 5]
+    with pytest.raises(ValueError, match="candidates"):
+        Ranking(candidates=0)
+
+
+def read_pages(fetch, limit):
+    """Follow cursors from a paged Search method until a short page."""
+    rows, after = [], None
+    while True:
+        page = fetch(limit=limit, after=after)
+        rows += page
+        if len(page) < limit:
+            return rows
+        after = page[-1]["cursor"]
+
+
+def test_cursor_pages_continue_where_the_last_page_ended(db, tmp_path):
+    from datetime import datetime, timedelta
+
+    for i in range(30):
+        text = "same words on bitcoin" if i % 10 == 0 else f"bitcoin note {i}"
+        # Three tweets per timestamp, so pages split runs of equal sort keys
+        created_at = datetime(2024, 1, 1) + timedelta(days=i % 10)
+        insert_tweet(db, str(i), text, likes=i % 4, created_at=created_at)
+    for i in range(7):
+        db.insert_thought(f"bitcoin thought {i}", tags=["bitcoin"])
+
+    walk, scan = Search(db), Search(db)
+    walk._walk_is_cheaper = lambda *args: True
+    scan._walk_is_cheaper = lambda *args: False
+    for sort_by in ("date", "engagement", "relevance"):
+        full = [t["tweet_id"] for t in scan.search_tweets("bitcoin", limit=100, sort_by=sort_by)]
+        assert len(full) == 28
+        for search in (walk, scan):
+            paged = read_pages(
+                lambda **page: search.search_tweets("bitcoin", sort_by=sort_by, **page), 4
+            )
+            assert [t["tweet_id"] for t in paged] == full
+
+    search = Search(db, cache=QueryCache())
+    documents = [d["id"] for d in search.search_documents("bitcoin", limit=100)]
+    assert [d["id"] for d in read_pages(
+        lambda **page: search.search_documents("bitcoin", **page), 5
+    )] == documents
+    recent = [d["id"] for d in search.list_recent_documents(limit=100)]
+    assert [d["id"] for d in read_pages(search.list_recent_documents, 6)] == recent
+
+    def thoughts(**page):
+        return search.list_documents(source_type="user", **page)
+
+    assert len(read_pages(thoughts, 3)) == 7
+
+    # Documents indexed between pages do not shift the pages still to come
+    first = search.list_recent_documents(limit=10)
+    notes = thoughts(limit=3)
+    for i in range(5):
+        db.insert_thought(f"late bitcoin thought {i}")
+    later = search.list_recent_documents(limit=10, after=first[-1]["cursor"])
+    assert [d["id"] for d in later] == recent[10:20]
+    newest = thoughts(limit=100)
+    assert thoughts(limit=3, after=notes[-1]["cursor"]) == newest[8:11]
+
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        search.search_tweets("bitcoin", after="not a cursor")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        search.search_tweets("bitcoin", sort_by="engagement", after=first[-1]["cursor"])
+    with pytest.raises(ValueError, match="keyword"):
+        search.search_documents("bitcoin", mode="semantic", after=first[-1]["cursor"])
+
+    # Shards number their rows from 1; ties between them are broken by id
+    sharded = ShardedDatabase.split(db, str(tmp_path / "shards"), batch_size=8)
+    try:
+        split = Search(sharded)
+        full = [d["id"] for d in split.list_recent_documents(limit=100)]
+        assert len(full) == 42
+        assert [d["id"] for d in read_pages(split.list_recent_documents, 5)] == full
+    finally:
+        sharded.close()
+
+
+def test_thread_index_follows_later_imports(db):
+    from datetime import datetime
+
+    # A reply and its own reply arrive before the tweet they answer
+    insert_tweet(db, "2", "reply", reply_to="1", created_at=datetime(2024, 1, 2))
+    insert_tweet(db, "3", "nested reply", reply_to="2", created_at=datetime(2024, 1, 3))
+    search = Search(db)
+    assert [t["tweet_id"] for t in search.find_thread("3")] == ["2", "3"]
+
+    insert_tweet(db, "1", "thread start", created_at=datetime(2024, 1, 1))
+    insert_tweet(db, "4", "second reply", reply_to="1", created_at=datetime(2024, 1, 4))
+    thread = search.find_thread("2")
+    assert [(t["tweet_id"], t["depth"], t["position"]) for t in thread] == [
+        ("1", 0, 0), ("2", 1, 1), ("3", 2, 2), ("4", 1, 3)
+    ]
+
+    plan = " ".join(
+        row["detail"]
+        for row in db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT tweet_id FROM tweet_threads "
+            "WHERE thread_root_id = '1' ORDER BY position"
+        )
+    )
+    assert "idx_tweet_threads_root" in plan
+
+
+def test_tag_index_tracks_documents(db):
+    db.insert_document(doc_id="a", source_type="file", content="x", tags=["Bitcoin", "ideas"])
+    db.insert_document(doc_id="b", source_type="file", content="y", tags=["bitcoin"])
+    db.insert_document(doc_id="c", source_type="file", content="z", tags=['"bitcoin"-ish'])
+
+    assert db.tag_counts() == {"bitcoin": 2, '"bitcoin"-ish': 1, "ideas": 1}
+
+    # Replacing a document rewrites its tags; deleting removes them
+    db.insert_document(doc_id="a", source_type="file", content="x", tags=["ideas"])
+    db.conn.execute("DELETE FROM documents WHERE id = ?", (document_key("b"),))
+    db.conn.commit()
+    assert db.tag_counts() == {'"bitcoin"-ish': 1, "ideas": 1}
+
+
+def test_list_documents_tag_and_or(db):
+    db.insert_thought("both tags", tags=["bitcoin", "draft"], category="idea")
+    db.insert_thought("one tag", tags=["bitcoin"])
+    db.insert_thought("other tag", tags=["draft"])
+    search = Search(db)
+
+    any_match = search.list_documents(tags=["bitcoin", "draft"], source_type="user")
+    all_match = search.list_documents(tags=["bitcoin", "draft"], match_all=True)
+    assert len(any_match) == 3
+    assert [d["content"] for d in all_match] == ["both tags"]
+    assert all_match[0]["category"] == "idea"
+
+
+def test_query_cache_is_invalidated_by_writes(tmp_path):
+    database = Database(str(tmp_path / "cached.db"), read_pool_size=1)
+    try:
+        database.insert_documents_many(make_documents(5))
+        search = Search(database, cache=QueryCache())
+
+        first = search.search_documents("bitcoin")
+        first[0]["title"] = "changed by caller"
+        assert search.search_documents("  bitcoin ") == search.search_documents("bitcoin")
+        assert search.search_documents("bitcoin")[0]["title"] != "changed by caller"
+        assert search.cache_stats()["hits"] == 3
+        assert search.cache_stats()["entries"] == 1
+
+        database.insert_thought("fresh thought about bitcoin")
+        assert len(search.search_documents("bitcoin")) == 6
+        stats = search.cache_stats()
+        assert stats["invalidations"] == 1 and stats["misses"] == 2
+
+        # Writes from another connection move PRAGMA data_version
+        other = Database(str(tmp_path / "cached.db"))
+        other.insert_thought("another bitcoin thought")
+        other.close()
+        assert len(search.search_documents("bitcoin")) == 7
+
+        with database.conn:
+            database.conn.execute("DELETE FROM doc_counters WHERE 0")
+            assert database.data_version() is None
+
+        small = QueryCache(max_bytes=estimate_size(search.search_documents("bitcoin")) + 1)
+        search = Search(database, cache=small)
+        search.search_documents("bitcoin")
+        search.search_documents("thought")
+        assert small.stats()["evictions"] == 1 and small.stats()["entries"] == 1
+    finally:
+        database.close()
+
+
+def test_semantic_search_over_documents_and_chunks(db, tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    from proof_of_self.core.chunker import DocumentChunker
+    from proof_of_self.core.embeddings import HashingEmbedder
+    from proof_of_self.core.vector_index import VectorIndex
+
+    mining = "Proof of work mining turns energy into security"
+    for doc_id, path in [("mining", "notes/mining.md"), ("mining-copy", "backup/mining.md")]:
+        db.insert_document(doc_id=doc_id, source_type="file", content=mining, source_path=path)
+    db.insert_document(doc_id="pasta", source_type="file", content="Boil pasta in tomato sauce")
+    insert_tweet(db, "1", "bitcoin mining energy use is a feature")
+    book = "\n\n".join(
+        ["Chapter on sound money and saving in a currency that cannot be debased."] * 6
+        + ["Lightning channels route payments off chain between peers."]
+    )
+    db.insert_document(doc_id="book", source_type="file", content=book, is_chunked=True)
+    db.insert_chunks_many(
+        {
+            "chunk_id": chunk.chunk_id,
+            "document_id": chunk.document_id,
+            "chunk_index": chunk.chunk_index,
+            "start_offset": chunk.start_offset,
+            "end_offset": chunk.end_offset,
+        }
+        for chunk in DocumentChunker(chunk_size=40, overlap_percent=0).chunk_document("book", book)
+    )
+    chunk_count = len(db.get_chunks("book"))
+
+    index = VectorIndex(tmp_path / "vectors", HashingEmbedder(dim=256))
+    assert index.update(db)["added"] == 4 + chunk_count  # Copies share one vector
+    search = Search(db, cache=QueryCache(), vectors=index)
+
+    results = search.semantic_search("energy used by mining", limit=3)
+    assert results[0]["id"] in {document_key("mining").hex(), document_key("tweet-1").hex()}
+    assert document_key("pasta").hex() not in [r["id"] for r in results[:2]]
+    collapsed = [r for r in results if len(json.loads(r["source_paths"])) == 2]
+    assert len(collapsed) == 1
+
+    passage = search.semantic_search("lightning channels route payments", limit=1)[0]
+    assert passage["id"] == document_key("book").hex()
+    assert "Lightning" in passage["passage"] and passage["chunk_index"] is not None
+    assert [r["source_type"] for r in search.semantic_search("mining", source_type="twitter")] == [
+        "twitter"
+    ]
+    assert search.semantic_search("mining", min_score=0.99) == []
+
+    # Several queries are scored in one pass over the matrix
+    queries = index.embedder.embed(["mining energy", "tomato sauce"])
+    assert [len(hits) for hits in index.search(queries, k=2, chunks=False)] == [2, 2]
+
+    # Updates embed only new rows and drop deleted ones
+    assert index.update(db)["added"] == 0
+
+    # Newly indexed documents are appended without writing a generation
+    generations = sorted((tmp_path / "vectors").glob("vectors-*.npy"))
+    bread = "Knead sourdough bread dough overnight"
+    db.insert_document(doc_id="bread", source_type="file", content=bread)
+    assert index.add(db, ["bread", "not-indexed"])["added"] == 1
+    assert index.stats()["delta"] == 1
+    assert sorted((tmp_path / "vectors").glob("vectors-*.npy")) == generations
+    hit = search.semantic_search("sourdough bread dough", limit=1)[0]
+    assert hit["id"] == document_key("bread").hex()
+    async_db = AsyncDatabase(db, vectors=index)
+    try:
+        thought = asyncio.run(async_db.insert_thought("feed the sourdough starter daily"))
+    finally:
+        async_db.close()
+    assert index.stats()["delta"] == 2
+    starter = search.semantic_search("feed the sourdough starter", limit=1)[0]
+    assert starter["id"] == document_key(thought).hex()
+    assert index.update(db)["added"] == 0
+
+    db.conn.execute("DELETE FROM documents WHERE id = ?", (document_key("pasta"),))
+    db.insert_thought("a thought about tomato sauce and pasta")
+    report = index.update(db)
+    assert (report["added"], report["removed"]) == (1, 1)
+    assert index.stats()["delta"] == 0
+    assert search.semantic_search("tomato pasta", limit=1)[0]["source_type"] == "user"
+    assert search.semantic_search("sourdough bread", limit=1)[0]["id"] == hit["id"]
+
+    with pytest.raises(ValueError):
+        len(VectorIndex(tmp_path / "vectors", HashingEmbedder(dim=128)))
+
+    # Ids are looked up in batches, and matches that never pass the filters
+    # stop the refetching after SEMANTIC_ROUNDS
+    uncached = Search(db, vectors=index)
+    unbatched = uncached.semantic_search("energy used by mining", limit=3)
+    monkeypatch.setattr(search_module, "SEMANTIC_ID_BATCH", 1)
+    assert uncached.semantic_search("energy used by mining", limit=3) == unbatched
+    fetched = []
+
+    def unknown_hits(text, k, chunks=None):
+        fetched.append(k)
+        return [(document_key("unknown"), -1, 1.0)] * k
+
+    monkeypatch.setattr(index, "search_text", unknown_hits)
+    assert uncached.semantic_search("mining", limit=2) == []
+    assert fetched == [2 * 4**round for round in range(1, search_module.SEMANTIC_ROUNDS + 2)]
+
+
+def test_ivf_vector_index_searches_nearest_lists(tmp_path):
+    np = pytest.importorskip("numpy")
+    from proof_of_self.core.embeddings import HashingEmbedder, normalize_rows
+    from proof_of_self.core.vector_index import VectorIndex, pack_key
+
+    # 2,000 vectors around 40 topics; partitioned from 1,000 vectors up
+    rng = np.random.default_rng(7)
+    centers = normalize_rows(rng.standard_normal((40, 32)).astype(np.float32))
+
+    def clustered(count):
+        noise = rng.standard_normal((count, 32)).astype(np.float32) * 0.05
+        return normalize_rows(centers[rng.integers(40, size=count)] + noise)
+
+    def keys(first, count):
+        return [(i.to_bytes(16, "big"), -1) for i in range(first, first + count)]
+
+    index = VectorIndex(tmp_path / "vectors", HashingEmbedder(dim=32), ann_min_vectors=1000)
+    assert index.insert(keys(0, 500), clustered(500))["nlist"] == 0  # Small: scanned exactly
+    report = index.insert(keys(500, 1500), clustered(1500))
+    assert report["total"] == 2000 and report["nlist"] == 45
+    assert index.stats()["nlist"] == 45
+
+    # Probing a few lists finds what an exact scan finds
+    queries = clustered(20)
+    exact = index.search(queries, k=5, exact=True)
+    approximate = index.search(queries, k=5, nprobe=4)
+    for found, truth in zip(approximate, exact):
+        assert {hit[0] for hit in found} == {hit[0] for hit in truth}
+        assert [hit[2] for hit in found] == sorted((hit[2] for hit in found), reverse=True)
+
+    # New vectors join the existing lists until the index doubles
+    centroids = np.load(tmp_path / "vectors" / "centroids-2.npy")
+    index.insert(keys(2000, 300), clustered(300))
+    assert np.array_equal(np.load(tmp_path / "vectors" / "centroids-3.npy"), centroids)
+    assert index.search(queries[:1], k=1, nprobe=1)[0][0][2] > 0.9
+
+    # Rows appended to the delta are scored by every probe, then folded into lists
+    appended = clustered(5)
+    appended_keys = np.array([pack_key(*key) for key in keys(3000, 5)], dtype="S20")
+    index._append_delta(index._read_manifest(), appended_keys, appended)
+    assert index.stats()["count"] == 2305 and index.stats()["delta"] == 5
+    appended_ids = [key for key, _ in keys(3000, 5)]
+    assert [hits[0][0] for hits in index.search(appended, k=1, nprobe=1)] == appended_ids
+    index.insert(keys(4000, 1), clustered(1))
+    assert index.stats()["count"] == 2306 and index.stats()["delta"] == 0
+    assert [hits[0][0] for hits in index.search(appended, k=1, nprobe=1)] == appended_ids
+    assert np.array_equal(np.load(tmp_path / "vectors" / "centroids-4.npy"), centroids)
+    assert index.insert(keys(0, 1), clustered(1), retrain=True)["nlist"] == 48
+
+
+def test_hybrid_search_fuses_keyword_and_semantic_results(db, tmp_path):
+    pytest.importorskip("numpy")
+    from proof_of_self.core.chunker import DocumentChunker
+    from proof_of_self.core.embeddings import HashingEmbedder
+    from proof_of_self.core.ranking import reciprocal_rank_fusion
+    from proof_of_self.core.vector_index import VectorIndex
+
+    assert [key for key, _ in reciprocal_rank_fusion([(1.0, "abc"), (1.0, "cd")])] == list("cabd")
+    assert reciprocal_rank_fusion([(0.0, "ab"), (1.0, "b")]) == [("b", 1 / 61)]
+
+    mining = "Proof of work mining turns energy into security"
+    db.insert_document(doc_id="mining", source_type="file", content=mining, source_path="a.md")
+    db.insert_document(doc_id="copy", source_type="file", content=mining, source_path="b.md")
+    db.insert_document(doc_id="miners", source_type="file", content="Miners burn energy for work")
+    db.insert_document(doc_id="pasta", source_type="file", content="Boil pasta in tomato sauce")
+    book = "\n\n".join(
+        ["Chapter on sound money and saving in a currency that cannot be debased."] * 6
+        + ["Lightning channels route payments off chain between peers."]
+    )
+    db.insert_document(doc_id="book", source_type="file", content=book, is_chunked=True)
+    db.insert_chunks_many(
+        {
+            "chunk_id": chunk.chunk_id,
+            "document_id": chunk.document_id,
+            "chunk_index": chunk.chunk_index,
+            "start_offset": chunk.start_offset,
+            "end_offset": chunk.end_offset,
+        }
+        for chunk in DocumentChunker(chunk_size=40, overlap_percent=0).chunk_document("book", book)
+    )
+    index = VectorIndex(tmp_path / "vectors", HashingEmbedder(dim=256))
+    index.update(db)
+
+    with pytest.raises(RuntimeError):
+        Search(db).search_documents("mining", mode="hybrid")
+    with pytest.raises(ValueError):
+        Search(db, vectors=index).search_documents("mining", mode="fuzzy")
+
+    # Found by both legs: ranked first, once for both copies, with both scores
+    search = Search(db, cache=QueryCache(), vectors=index)
+    results = search.search_documents("proof mining energy", mode="hybrid")
+    top = results[0]
+    assert len(json.loads(top["source_paths"])) == 2
+    assert top["rank"] is not None and top["similarity"] > 0
+    assert len({r["id"] for r in results}) == len(results)
+    # "miners" shares no keyword match but is close in meaning
+    assert document_key("miners").hex() in [r["id"] for r in results]
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+
+    # A matching chunk counts for its book, which keeps the passage
+    lightning = search.search_documents("lightning payments", mode="hybrid")[0]
+    assert lightning["id"] == document_key("book").hex()
+    assert lightning["rank"] is not None and "Lightning" in lightning["passage"]
+
+    # Zero weights turn a leg off; each mode alone matches its own method
+    keyword_only = Search(db, ranking=Ranking(semantic_weight=0), vectors=index)
+    assert [r["id"] for r in keyword_only.search_documents("energy", mode="hybrid")] == [
+        r["id"] for r in search.search_documents("energy")
+    ]
+    semantic_only = Search(db, ranking=Ranking(keyword_weight=0), vectors=index)
+    assert [r["id"] for r in semantic_only.search_documents("energy", mode="hybrid")] == [
+        r["id"] for r in search.search_documents("energy", mode="semantic")
+    ]
+
+
+def test_search_documents_returns_best_chunk_passage(db):
+    from proof_of_self.core.chunker import DocumentChunker
+
+    chapters = [f"Chapter {i} is about sound money and saving." for i in range(30)]
+    chapters[17] = "Chapter 17 explains how lightning channels route payments."
+    book = "\n\n".join(chapters)
+    for doc_id, path in [("book", "books/money.md"), ("book-copy", "backup/money.md")]:
+        db.insert_document(doc_id=doc_id, source_type="file", content=book, source_path=path)
+    db.insert_chunks_many(
+        {
+            "chunk_id": chunk.chunk_id,
+            "document_id": chunk.document_id,
+            "chunk_index": chunk.chunk_index,
+            "start_offset": chunk.start_offset,
+            "end_offset": chunk.end_offset,
+        }
+        for chunk in DocumentChunker(chunk_size=40, overlap_percent=0).chunk_document("book", book)
+    )
+    db.insert_document(doc_id="note", source_type="file", content="Sound money is saving.")
+    chunks = db.get_chunks("book")
+    lightning = next(c["chunk_index"] for c in chunks if "lightning" in c["content"])
+
+    search = Search(db)
+    [result] = search.search_documents("lightning payments")
+    assert result["chunk_index"] == lightning
+    assert "lightning channels" in result["passage"]
+    assert "<mark>lightning</mark>" in result["snippet"]
+    assert len(json.loads(result["source_paths"])) == 2
+
+    # The book scores by its best chunk; whole-document matches have none
+    saving = search.search_documents("saving", limit=5)
+    assert {r["id"]: r["chunk_index"] is None for r in saving} == {
+        document_key("note").hex(): True,
+        result["id"]: False,
+    }
+    # Scoring every match (no candidate window) ranks chunks the same way
+    assert [r["id"] for r in search.iter_search_documents("saving")] == [r["id"] for r in saving]
+
+    # Paging through the chunks around the passage, from either copy's id
+    page = search.get_passages(document_key("book-copy").hex(), start=lightning - 1, count=3)
+    assert [p["chunk_index"] for p in page] == [lightning - 1, lightning, lightning + 1]
+    assert page[1]["content"] == chunks[lightning]["content"]
+    assert page[0]["chunk_count"] == len(chunks)
+    assert search.get_passages(document_key("book").hex(), start=len(chunks)) == []
+    assert search.get_passages(document_key("note").hex()) == []
+
+
+def test_streaming_reads_fetch_in_batches(db):
+    from datetime import datetime
+
+    db.insert_documents_many(make_documents(25))
+    for i in range(12):
+        insert_tweet(db, str(i), f"tweet {i} about bitcoin", created_at=datetime(2020, 1, i + 1))
+
+    rows = db.iter_rows("SELECT id FROM documents", batch_size=4)
+    assert sum(1 for _ in rows) == 37
+    assert [row["id"] for row in db.iter_documents(content_type="note")][0] == (
+        document_key("doc-0").hex()
+    )
+
+    search = Search(db)
+    assert len(search.search_documents("bitcoin")) == 10
+    matches = list(search.iter_search_documents("bitcoin", batch_size=3))
+    assert len(matches) == 37
+    assert [row["rank"] for row in matches] == sorted(row["rank"] for row in matches)
+    assert [row["tweet_id"] for row in search.iter_tweets(min_date="2020-01-10")] == [
+        "9", "10", "11"
+    ]
+
+
+def test_migration_streams_legacy_rows(db):
+    from proof_of_self.core.migrate import DataMigration
+
+    db.conn.execute("CREATE TABLE thoughts (id, content, tags, category, created_at, updated_at)")
+    db.conn.executemany(
+        "INSERT INTO thoughts VALUES (?, ?, NULL, NULL, '2020-01-01T00:00:00', NULL)",
+        [(i, f"thought {i % 5}") for i in range(7)] + [(0, "thought 0")],  # One duplicate
+    )
+    db.conn.commit()
+
+    migration = DataMigration(db, batch_size=2)
+    assert migration.migrate_thoughts_to_documents(dry_run=True)["skipped"] == 1
+    stats = migration.migrate_thoughts_to_documents()
+    assert (stats["total"], stats["migrated"], stats["skipped"]) == (8, 7, 1)
+    assert migration.migrate_thoughts_to_documents()["skipped"] == 8
+
+
+def test_stats_counters_follow_writes(db):
+    db.insert_documents_many(make_documents(4))
+    db.insert_documents_many(make_documents(2, source_type="twitter"))  # Replaces doc-0, doc-1
+    db.insert_document(doc_id="book", source_type="file", content="long", is_chunked=True)
+    db.insert_chunk(chunk_id="book_chunk_0", document_id="book", chunk_index=0, content="x")
+    db.conn.execute(
+        "UPDATE documents SET content_type = 'essay' WHERE id = ?", (document_key("doc-3"),)
+    )
+    db.conn.execute("DELETE FROM documents WHERE id = ?", (document_key("doc-2"),))
+    db.conn.commit()
+
+    stats = db.get_stats()
+    assert stats["total_documents"] == 4
+    assert stats["chunked_documents"] == 1
+    assert stats["total_chunks"] == 1
+    assert stats["source_file"] == 2
+    assert stats["source_twitter"] == 2
+    assert stats["type_essay"] == 1
+    assert db.recount() == {}
+
+
+def test_recount_reports_drift(db):
+    db.insert_documents_many(make_documents(3))
+    db.conn.execute("UPDATE doc_counters SET count = 99 WHERE dimension = 'total'")
+    db.conn.commit()
+
+    assert db.recount() == {"total:": (99, 3)}
+    assert db.get_stats()["total_documents"] == 3
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_compressed_bodies_are_searchable(tmp_path, codec):
+    database = Database(str(tmp_path / "z.db"), compression=codec, compress_threshold=1024)
+    try:
+        book = "Satoshi wrote the whitepaper. " * 200
+        database.insert_document(doc_id="book", source_type="file", content=book)
+        database.insert_document(doc_id="note", source_type="file", content="short whitepaper note")
+
+        row = database.conn.execute(
+            """
+            SELECT b.content, b.content_z FROM documents d
+            JOIN bodies b ON b.hash = d.body_hash WHERE d.id = ?
+            """,
+            (document_key("book"),),
+        ).fetchone()
+        assert row["content"] is None and len(row["content_z"]) < len(book)
+
+        snippet = database.conn.execute(
+            """
+            SELECT snippet(documents_fts, 3, '[', ']', '...', 4) AS snippet
+            FROM documents_fts JOIN documents d ON d.rowid = documents_fts.rowid
+            WHERE documents_fts MATCH 'satoshi'
+            """
+        ).fetchone()["snippet"]
+        assert "[Satoshi]" in snippet
+
+        preview = database.conn.execute(
+            """
+            SELECT pos_preview(b.content, b.content_z, 7) FROM documents d
+            JOIN bodies b ON b.hash = d.body_hash WHERE d.id = ?
+            """,
+            (document_key("book"),),
+        ).fetchone()[0]
+        assert preview == "Satoshi"
+
+        # Deleting a compressed row removes its postings cleanly
+        database.conn.execute("DELETE FROM documents WHERE id = ?", (document_key("book"),))
+        database.conn.execute("INSERT INTO documents_fts(documents_fts, rank) VALUES ('integrity-check', 1)")
+    finally:
+        database.close()
+
+
+def test_identical_bodies_are_stored_and_indexed_once(db):
+    body = "the same markdown file dropped into the inbox twice"
+    db.insert_documents_many([
+        {"doc_id": "a", "source_type": "file", "content": body, "source_path": "inbox/a.md"},
+        {"doc_id": "b", "source_type": "file", "content": body, "source_path": "inbox/b.md"},
+        {"doc_id": "c", "source_type": "file", "content": "a different note"},
+    ])
+    assert db.conn.execute("SELECT COUNT(*) FROM bodies").fetchone()[0] == 2
+
+    results = Search(db).search_documents("markdown")
+    assert [row["id"] for row in results] == [document_key("a").hex()]
+    assert json.loads(results[0]["source_paths"]) == ["inbox/a.md", "inbox/b.md"]
+
+    report = db.duplication_report()
+    assert report["duplicate_documents"] == 1
+    assert report["saved_bytes"] == len(body)
+    assert report["fts_postings_saved"] == len(body.split())
+
+    # The remaining copy takes over the body's postings
+    db.conn.execute("DELETE FROM documents WHERE id = ?", (document_key("a"),))
+    db.conn.execute("INSERT INTO documents_fts(documents_fts, rank) VALUES ('integrity-check', 1)")
+    assert [row["id"] for row in Search(db).search_documents("markdown")] == [
+        document_key("b").hex()
+    ]
+
+    db.conn.execute("DELETE FROM documents WHERE id = ?", (document_key("b"),))
+    assert db.prune_bodies() == 1
+
+
+def test_documents_are_keyed_by_integer_rowid(db):
+    doc_id = generate_document_id("a long book", "inbox/book.md", "2024-01-01")
+    db.insert_document(
+        doc_id=doc_id, source_type="file", content="a long book", tags=["Books"], is_chunked=True
+    )
+    db.insert_chunk(
+        chunk_id=f"{doc_id}_chunk_0",
+        document_id=doc_id,
+        chunk_index=0,
+        start_offset=0,
+        end_offset=6,
+    )
+
+    row = db.conn.execute("SELECT doc_rowid, id FROM documents").fetchone()
+    assert row["id"] == bytes.fromhex(doc_id) and len(row["id"]) == 16
+    assert db.conn.execute("SELECT document_id FROM chunks").fetchone()[0] == row["doc_rowid"]
+    tag_row = db.conn.execute("SELECT document_id FROM document_tags").fetchone()
+    assert tag_row[0] == row["doc_rowid"]
+
+    # The 64-character ids of earlier releases name the same document
+    legacy_id = doc_id + "0" * 32
+    assert db.has_document(legacy_id) and not db.has_document("missing")
+    assert db.has_document(doc_id.upper()) and db.has_document(legacy_id[:40] + "Ab" * 12)
+    assert [chunk["content"] for chunk in db.get_chunks(legacy_id)] == ["a long"]
+    assert db.get_chunks(doc_id)[0]["document_id"] == doc_id
+    assert Search(db).list_documents(tags=["books"])[0]["id"] == doc_id
+
+
+def index_names(database):
+    rows = database.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    return {row["name"] for row in rows}
+
+
+def test_schema_version_is_recorded(db):
+    assert db.schema_version() == SCHEMA_VERSION
+    assert [number for number, _, _ in db._migrations()][-1] == SCHEMA_VERSION
+
+
+def test_current_schema_opens_without_write_lock(tmp_path):
+    path = str(tmp_path / "current.db")
+    writer = Database(path)
+    try:
+        writer.insert_documents_many(make_documents(2))
+        writer.conn.execute("BEGIN IMMEDIATE")  # Another process mid-write
+
+        reader = Database(path, read_only=True, busy_timeout_ms=100)
+        try:
+            assert reader.get_stats()["total_documents"] == 2
+        finally:
+            reader.close()
+        writer.conn.rollback()
+    finally:
+        writer.close()
+
+
+def test_pending_migrations_are_applied(tmp_path):
+    path = str(tmp_path / "old.db")
+    database = Database(path)
+    database.conn.execute("DROP INDEX idx_documents_indexed")
+    database.conn.execute("PRAGMA user_version = 1")
+    database.conn.commit()
+    database.close()
+
+    with pytest.raises(RuntimeError, match="out of date"):
+        Database(path, read_only=True)
+
+    database = Database(path)
+    try:
+        assert database.schema_version() == SCHEMA_VERSION
+        assert "idx_documents_indexed" in index_names(database)
+    finally:
+        database.close()
+
+
+SLOW_QUERY = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000)
+    SELECT COUNT(*) FROM n
+"""
+
+
+def slow_count(database):
+    with database.reader() as conn:
+        return conn.execute(SLOW_QUERY).fetchone()[0]
+
+
+def test_async_reads_overlap_and_can_be_cancelled(tmp_path):
+    database = Database(str(tmp_path / "async.db"), wal_mode=True, read_pool_size=2)
+    async_db = AsyncDatabase(database)
+    search = AsyncSearch(Search(database), async_db)
+
+    async def scenario():
+        await async_db.insert_thought("async thought about bitcoin", tags=["async"])
+
+        # A slow read on one worker does not hold up reads on the other
+        slow = asyncio.ensure_future(async_db.read(slow_count, database))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        thoughts = await search.list_documents(tags=["async"])
+        assert len(thoughts) == 1
+        assert time.perf_counter() - start < 1
+
+        # Cancelling the slow read interrupts its query and frees the worker
+        slow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        start = time.perf_counter()
+        for _ in range(2):
+            assert (await async_db.get_stats())["total_documents"] == 1
+        assert time.perf_counter() - start < 1
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        async_db.close()
+        database.close()
+
+
+def test_sharded_search_matches_single_file(db, tmp_path):
+    from datetime import datetime
+
+    for year in (2019, 2020, 2021):
+        for i in range(3):
+            insert_tweet(
+                db, f"{year}{i}", f"bitcoin tweet {i} from {year}",
+                likes=year - 2018 + i, created_at=datetime(year, 6, i + 1),
+            )
+    db.insert_thought("bitcoin thought", tags=["bitcoin"])
+    db.insert_thought("saving thought", tags=["ideas"])
+    # A thread crossing into the next two years
+    insert_tweet(db, "t1", "thread start", created_at=datetime(2019, 12, 31))
+    insert_tweet(db, "t2", "reply", reply_to="t1", created_at=datetime(2020, 1, 1))
+    insert_tweet(db, "t3", "nested reply", reply_to="t2", created_at=datetime(2020, 1, 2))
+    insert_tweet(db, "t4", "late reply", reply_to="t1", created_at=datetime(2021, 1, 1))
+
+    sharded = ShardedDatabase.split(db, str(tmp_path / "shards"), batch_size=4)
+    try:
+        assert sorted(sharded.manifest.shards) == [
+            "twitter-2019", "twitter-2020", "twitter-2021", f"user-{datetime.now().year}",
+        ]
+        assert sharded.get_stats()["total_documents"] == db.get_stats()["total_documents"]
+
+        single, split = Search(db), Search(sharded)
+        for kwargs in ({"sort_by": "date"}, {"sort_by": "engagement", "limit": 4, "offset": 2}):
+            expected = [t["tweet_id"] for t in single.search_tweets("bitcoin", **kwargs)]
+            assert [t["tweet_id"] for t in split.search_tweets("bitcoin", **kwargs)] == expected
+
+        assert sharded.manifest.matching("twitter", min_date="2020-12-31") == ["twitter-2021"]
+        assert sharded.manifest.matching(max_date="2019-06-02") == ["twitter-2019"]
+        recent = split.search_tweets("bitcoin", min_date="2021-01-01")
+        assert {t["tweet_id"] for t in recent} == {"20210", "20211", "20212"}
+
+        documents = split.search_documents("bitcoin", limit=20)
+        assert len(documents) == 10
+        assert [d["rank"] for d in documents] == sorted(d["rank"] for d in documents)
+
+        # Threads are joined across shards; lookups and listings federate
+        for tweet_id in ("t1", "t3", "t4"):
+            thread = [(t["tweet_id"], t["depth"], t["position"]) for t in split.find_thread(tweet_id)]
+            assert thread == [
+                (t["tweet_id"], t["depth"], t["position"]) for t in single.find_thread(tweet_id)
+            ]
+        assert thread == [("t1", 0, 0), ("t2", 1, 1), ("t3", 2, 2), ("t4", 1, 3)]
+        assert split.get_tweet_context("t2", 2) == single.get_tweet_context("t2", 2)
+        assert [d["id"] for d in split.list_documents(tags=["bitcoin", "ideas"])] == [
+            d["id"] for d in single.list_documents(tags=["bitcoin", "ideas"])
+        ]
+        assert split.tag_counts() == single.tag_counts() == {"bitcoin": 1, "ideas": 1}
+
+        # The server drives shards through the same async facade
+        async_db = AsyncDatabase(sharded)
+
+        async def scenario():
+            await async_db.insert_thought("a thought written to a shard", tags=["ideas"])
+            return await AsyncSearch(split, async_db).list_documents(tags=["ideas"])
+
+        try:
+            assert len(asyncio.run(scenario())) == 2
+        finally:
+            async_db.close()
+
+        config = {"database": {"shard_dir": str(tmp_path / "shards")}}
+        with open_database(config, tmp_path / "unused.db") as reopened:
+            assert isinstance(reopened, ShardedDatabase)
+            assert reopened.tag_counts() == {"ideas": 2, "bitcoin": 1}
+        assert not (tmp_path / "unused.db").exists()
+
+        # Cold shards are read with immutable=1 and refuse writes
+        assert sharded.freeze_before(2021) == ["twitter-2019", "twitter-2020"]
+        assert len(split.search_tweets("bitcoin", max_date="2020-12-31")) == 6
+        with pytest.raises(ValueError, match="cold"):
+            sharded.insert_document(
+                doc_id="late", source_type="twitter", content="x", created_at=datetime(2019, 1, 1)
+            )
+
+        # Maintenance commands visit the warm shards only
+        files = sharded.shard_files()
+        assert all(path.exists() for path in files.values()) and "twitter-2019" in files
+        warm = dict(sharded.warm_shards())
+        assert sorted(warm) == sorted(set(files) - {"twitter-2019", "twitter-2020"})
+        assert all(database.recount() == {} for database in warm.values())
+    finally:
+        sharded.close()
+
+
+def test_profile_settings_are_applied(tmp_path):
+    database = Database(str(tmp_path / "serve.db"), read_pool_size=1, profile="serve")
+    try:
+        settings = database.storage_settings()
+        assert settings["profile"] == "serve"
+        assert settings["journal_mode"] == "wal"
+        assert settings["synchronous"] == "normal"
+        assert settings["cache_size"] == PROFILES["serve"]["cache_size"]
+        assert settings["temp_store"] == "memory"
+        with database.reader() as conn:
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == PROFILES["serve"]["cache_size"]
+    finally:
+        database.close()
+
+    # wal_mode: false in the config keeps a role profile from switching to WAL
+    options = database_options({"database": {"wal_mode": False}}, role="serve")
+    database = Database(str(tmp_path / "rollback.db"), **options)
+    try:
+        settings = database.storage_settings()
+        assert settings["profile"] == "serve" and settings["journal_mode"] == "delete"
+        assert settings["cache_size"] == PROFILES["serve"]["cache_size"]
+    finally:
+        database.close()
+
+    options = database_options(
+        {"database": {"profiles": {"serve": {"cache_size": -1024}}}}, role="serve"
+    )
+    assert options["profile"]["cache_size"] == -1024
+    assert options["profile"]["mmap_size"] == PROFILES["serve"]["mmap_size"]
+    assert database_options({"database": {"profile": "low-memory"}}, role="serve")[
+        "profile"
+    ]["name"] == "low-memory"
+    with pytest.raises(ValueError, match="Unknown performance profile"):
+        resolve_profile("turbo")
+    with pytest.raises(ValueError, match="Invalid synchronous"):
+        resolve_profile({"synchronous": "sometimes"})
+
+
+def test_online_backup_rotates_and_verifies(tmp_path):
+    import gzip
+    import sqlite3
+
+    path = tmp_path / "live.db"
+    database = Database(str(path), wal_mode=True)
+    try:
+        database.insert_documents_many(make_documents(50))
+        manager = BackupManager(str(path), str(tmp_path / "backups"), keep=2)
+
+        reports = [manager.run(pages_per_step=2, sleep_ms=0) for _ in range(3)]
+        assert reports[0]["steps"] > 1
+        assert reports[2]["rotated"] == [reports[0]["path"]]
+        assert manager.backups() == [Path(reports[1]["path"]), Path(reports[2]["path"])]
+        assert all(manager.verify(backup) for backup in manager.backups())
+
+        copy = sqlite3.connect(reports[2]["path"])
+        assert copy.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert copy.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 50
+        copy.close()
+
+        manager.compress = True
+        packed = Path(manager.run()["path"])
+        assert packed.suffix == ".gz" and manager.verify(packed)
+        assert gzip.decompress(packed.read_bytes()).startswith(b"SQLite format 3")
+
+        packed.write_bytes(b"tampered")
+        assert not manager.verify(packed)
+    finally:
+        database.close()
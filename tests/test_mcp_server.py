@@ -13,6 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 os.environ["PROOF_OF_MONK_DB"] = str(Path(__file__).parent / "test.db")
 
 import asyncio
+from proof_of_self.core.async_database import AsyncDatabase, AsyncSearch
 from proof_of_self.core.database import Database
 from proof_of_self.core.search import Search
 from proof_of_self.tools.tweet_tools import register_tweet_tools
@@ -43,8 +44,10 @@ async def test_mcp_server():
     server = Server("test-server")
 
     # Register tools
-    register_tweet_tools(server, search)
-    register_thought_tools(server, db)
+    async_db = AsyncDatabase(db)
+    async_search = AsyncSearch(search, async_db)
+    register_tweet_tools(server, async_search)
+    register_thought_tools(server, async_db, async_search)
 
     print("✓ Server created")
     print("✓ Tools registered\n")